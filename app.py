@@ -1,21 +1,87 @@
+import os
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
 from starlette.responses import HTMLResponse, RedirectResponse
 from uvicorn import run as app_run
 
-from typing import Optional
+from typing import List, Optional
 
 # Importing constants and pipeline modules from the project
-from src.constants import APP_HOST, APP_PORT
-from src.pipeline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipeline.training_pipeline import TrainPipeline
+from src.constants import (APP_HOST, APP_PORT, MODEL_SERVING_BULK_SPOOL_BYTES, MODEL_SERVING_MAX_BATCH_ROWS,
+                           MODEL_SERVING_SHARED_MODEL_DIR, MODEL_SERVING_SHARED_MODEL_DIR_ENV_KEY,
+                           MODEL_SERVING_WORKERS_ENV_KEY)
+from src.logger import logging
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.bulk_scoring import SUPPORTED_FORMATS, stream_predictions
+from src.pipeline.inference_executor import InferenceExecutor, InferenceExecutorBusyError
+from src.pipeline.inference_scheduler import InferenceQueueFullError, InferenceScheduler
+from src.pipeline.model_holder import ModelHolder
+from src.pipeline.prediction_cache import PredictionCache
+from src.pipeline.prediction_pipeline import VehicleData, VehicleRecord
+from src.pipeline.serving_metrics import PREDICTION_ERRORS, STAGE_SECONDS, MetricsMiddleware, bind_serving_metrics
+from src.pipeline.training_jobs import TrainingJobConflictError, TrainingJobManager, TrainingJobNotFoundError
+from src.utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads and warms the production model once per process before serving requests,
+    then keeps it in sync with the pushed model in the background.
+    """
+    model_holder = ModelHolder.get_instance()
+    try:
+        await asyncio.to_thread(model_holder.load)
+    except Exception as e:
+        # Keep serving so the readiness endpoint can report the failure
+        logging.error(f"Model could not be loaded at startup: {e}")
+
+    reload_task = asyncio.create_task(model_holder.poll_for_updates())
+
+    # CPU-bound inference runs on a sized executor, never on the event loop
+    predictor_config = VehiclePredictorConfig()
+    app.state.inference_executor = InferenceExecutor(
+        max_workers=predictor_config.executor_max_workers,
+        max_queue=predictor_config.executor_max_queue,
+        kind=predictor_config.executor_kind,
+    )
+    app.state.inference_executor.start()
+
+    # Single-row requests are scored in micro-batches
+    app.state.inference_scheduler = InferenceScheduler(
+        predict_fn=app.state.inference_executor.model_function("predict_array", model_holder),
+        executor=app.state.inference_executor,
+        max_wait_ms=predictor_config.batch_max_wait_ms,
+        max_batch_size=predictor_config.batch_max_size,
+        max_queue_depth=predictor_config.batch_max_queue_depth,
+    )
+    app.state.inference_scheduler.start()
+
+    # Repeated feature vectors are answered from cache, identical concurrent ones share one prediction
+    app.state.prediction_cache = PredictionCache(
+        max_entries=predictor_config.cache_max_entries,
+        ttl_seconds=predictor_config.cache_ttl_seconds,
+    )
+    bind_serving_metrics(model_holder, app.state.inference_executor, app.state.inference_scheduler,
+                         app.state.prediction_cache)
+
+    # Training runs as a single-flight job in its own process, never inside a request
+    app.state.training_jobs = TrainingJobManager()
+    yield
+    await app.state.inference_scheduler.stop()
+    app.state.inference_executor.shutdown()
+    reload_task.cancel()
 
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount the 'static' directory for serving static files (like CSS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -35,6 +101,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counters, in-flight gauge and per-route latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 class DataForm:
     """
     DataForm class to handle and process incoming form data.
@@ -82,19 +151,85 @@ async def index(request: Request):
     return templates.TemplateResponse(
             "vehicledata.html",{"request": request, "context": "Rendering"})
 
+# Readiness probe: reports whether the process-wide model is loaded and warmed
+@app.get("/health/ready")
+async def readinessRouteClient():
+    """
+    Returns 200 once the model is loaded, 503 otherwise.
+    """
+    model_status = ModelHolder.get_instance().status()
+    return JSONResponse(model_status, status_code=200 if model_status["ready"] else 503)
+
+# Micro-batching statistics: batch-size and queue wait-time histograms
+@app.get("/metrics/inference")
+async def inferenceMetricsRouteClient(request: Request):
+    """
+    Returns the inference scheduler's queue depth and histograms, the executor's load and
+    the prediction cache counters.
+    """
+    return {
+        "scheduler": request.app.state.inference_scheduler.stats(),
+        "executor": request.app.state.inference_executor.stats(),
+        "cache": request.app.state.prediction_cache.stats(),
+    }
+
+# Prometheus scrape endpoint: per-stage latency histograms, request counters, gauges and model info
+@app.get("/metrics")
+async def metricsRouteClient():
+    """
+    Returns every serving metric in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Route to trigger the model training process
-@app.get("/train")
-async def trainRouteClient():
+@app.api_route("/train", methods=["GET", "POST"])
+async def trainRouteClient(request: Request):
     """
-    Endpoint to initiate the model training pipeline.
+    Starts the model training pipeline as a background job and returns its id right away.
+    Answers 409 with the running job's id while another training job is active.
+    `?full_refresh=true` re-exports the whole collection into the feature store.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        full_refresh = request.query_params.get("full_refresh", "").lower() in ("1", "true", "yes")
+        job_status = await asyncio.to_thread(request.app.state.training_jobs.submit, full_refresh)
+        return JSONResponse(job_status, status_code=202, headers={"Location": f"/train/{job_status['job_id']}"})
 
+    except TrainingJobConflictError as e:
+        return JSONResponse({"status": False, "error": f"{e}", "active_job_id": e.active_job_id}, status_code=409)
     except Exception as e:
-        return Response(f"Error Occurred! {e}")
+        return JSONResponse({"status": False, "error": f"Error Occurred! {e}"}, status_code=500)
+
+# Status, progress and cancellation of training jobs
+@app.get("/train/{job_id}")
+async def trainStatusRouteClient(request: Request, job_id: str):
+    """
+    Returns the full status of a training job.
+    """
+    try:
+        return request.app.state.training_jobs.get_status(job_id)
+    except TrainingJobNotFoundError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
+
+@app.get("/train/{job_id}/progress")
+async def trainProgressRouteClient(request: Request, job_id: str):
+    """
+    Returns the current stage of a training job and the fraction of pipeline stages completed.
+    """
+    try:
+        training_jobs = request.app.state.training_jobs
+        return training_jobs.get_progress(training_jobs.get_status(job_id))
+    except TrainingJobNotFoundError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
+
+@app.post("/train/{job_id}/cancel")
+async def trainCancelRouteClient(request: Request, job_id: str):
+    """
+    Cancels a pending or running training job.
+    """
+    try:
+        return request.app.state.training_jobs.cancel(job_id)
+    except TrainingJobNotFoundError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
 
 # Route to handle form submission and make predictions
 @app.post("/")
@@ -104,9 +239,11 @@ async def predictRouteClient(request: Request):
     """
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
-        
-        vehicle_data = VehicleData(
+        with STAGE_SECONDS.time(stage="form_parse"):
+            await form.get_vehicle_data()
+
+        with STAGE_SECONDS.time(stage="feature_build"):
+            vehicle_data = VehicleData(
                                 Gender= form.Gender,
                                 Age = form.Age,
                                 Driving_License = form.Driving_License,
@@ -120,27 +257,93 @@ async def predictRouteClient(request: Request):
                                 Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
                                 )
 
-        # Convert form data into a DataFrame for the model
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        # Serve from the prediction cache, or queue the row for the micro-batching scheduler
+        row = vehicle_data.features
+        with STAGE_SECONDS.time(stage="prediction"):
+            value = await request.app.state.prediction_cache.get_or_compute(
+                row, ModelHolder.get_instance().version,
+                lambda: request.app.state.inference_scheduler.submit(row),
+            )
 
         # Interpret the prediction result as 'Response-Yes' or 'Response-No'
         status = "Response-Yes" if value == 1 else "Response-No"
 
         # Render the same HTML page with the prediction result
-        return templates.TemplateResponse(
-            "vehicledata.html",
-            {"request": request, "context": status},
-        )
-        
+        with STAGE_SECONDS.time(stage="render"):
+            return templates.TemplateResponse(
+                "vehicledata.html",
+                {"request": request, "context": status},
+            )
+
+    except (InferenceQueueFullError, InferenceExecutorBusyError) as e:
+        PREDICTION_ERRORS.inc(route="/", reason="overloaded")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503, headers={"Retry-After": "1"})
+
     except Exception as e:
+        PREDICTION_ERRORS.inc(route="/", reason="error")
         return {"status": False, "error": f"{e}"}
 
+# Route to score a JSON array of records in a single vectorized call
+@app.post("/predict/batch")
+async def predictBatchRouteClient(request: Request, records: List[VehicleRecord]):
+    """
+    Endpoint to receive an array of vehicle records and return labels and
+    positive-class probabilities in input order.
+    """
+    if len(records) > MODEL_SERVING_MAX_BATCH_ROWS:
+        return JSONResponse({"status": False, "error": f"Batch exceeds {MODEL_SERVING_MAX_BATCH_ROWS} records."},
+                            status_code=413)
+    try:
+        executor = request.app.state.inference_executor
+        predictions, probabilities = await executor.run(executor.model_function("predict_records"), records)
+        return {
+            "status": True,
+            "predictions": predictions.astype(int).tolist(),
+            "probabilities": probabilities.tolist(),
+        }
+
+    except InferenceExecutorBusyError as e:
+        PREDICTION_ERRORS.inc(route="/predict/batch", reason="overloaded")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503, headers={"Retry-After": "1"})
+
+    except Exception as e:
+        PREDICTION_ERRORS.inc(route="/predict/batch", reason="error")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+# Route to score a streamed CSV/NDJSON upload of raw records in fixed-size chunks
+@app.post("/predict/bulk")
+async def predictBulkRouteClient(request: Request, format: Optional[str] = None):
+    """
+    Endpoint to score an upload with the raw schema from config/schema.yaml.
+    The upload is spooled (to disk beyond MODEL_SERVING_BULK_SPOOL_BYTES), then scored in
+    fixed-size chunks whose CSV predictions are streamed back as they are produced.
+    """
+    data_format = format or ("ndjson" if "ndjson" in request.headers.get("content-type", "") else "csv")
+    if data_format not in SUPPORTED_FORMATS:
+        PREDICTION_ERRORS.inc(route="/predict/bulk", reason="unsupported_format")
+        return JSONResponse({"status": False, "error": f"Unsupported format {data_format}."}, status_code=400)
+
+    executor = request.app.state.inference_executor
+    if not executor.has_capacity:
+        PREDICTION_ERRORS.inc(route="/predict/bulk", reason="overloaded")
+        return JSONResponse({"status": False, "error": "Inference executor is busy."}, status_code=503,
+                            headers={"Retry-After": "1"})
+
+    # Reading the whole body before responding avoids a request/response deadlock on HTTP/1.1
+    upload = tempfile.SpooledTemporaryFile(max_size=MODEL_SERVING_BULK_SPOOL_BYTES)
+    async for data in request.stream():
+        upload.write(data)
+    upload.seek(0)
+
+    predictions = stream_predictions(upload, data_format, executor.model_function("predict_batch"), executor)
+    return StreamingResponse(predictions, media_type="text/csv", background=BackgroundTask(upload.close))
+
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
-    app_run(app, host=APP_HOST, port=APP_PORT)
+    workers = int(os.getenv(MODEL_SERVING_WORKERS_ENV_KEY, "1"))
+    if workers > 1:
+        # Workers memory-map one shared copy of the compiled model instead of unpickling their own
+        os.environ.setdefault(MODEL_SERVING_SHARED_MODEL_DIR_ENV_KEY, MODEL_SERVING_SHARED_MODEL_DIR)
+        app_run("app:app", host=APP_HOST, port=APP_PORT, workers=workers)
+    else:
+        app_run(app, host=APP_HOST, port=APP_PORT)
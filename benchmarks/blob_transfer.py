@@ -0,0 +1,288 @@
+'''
+Benchmark of blob uploads and downloads: single-stream transfers (SDK defaults, readall) against
+the parallel block/range transfers of AzureStorageService and AsyncAzureStorageService.
+
+By default it runs against an in-process, Azurite-style stand-in that implements the part of the
+Blob REST API the SDK uses (Put Blob, Put Block, Put Block List, Get Blob with ranges, Get Blob
+Properties, Delete Blob). Cloud storage throughput is limited per connection, so the stand-in
+paces every request to --connection-mbps and adds --latency-ms to it; without that localhost
+makes a single connection look as fast as many. Pass --connection-string to benchmark Azurite
+or a real storage account instead (the benchmark container is created and deleted).
+
+Usage:
+    python -m benchmarks.blob_transfer [--size-mb 64] [--concurrency 1,4,8] [--connection-mbps 200]
+'''
+import os
+import re
+import time
+import shutil
+import uuid
+import asyncio
+import argparse
+import statistics
+import tempfile
+import threading
+import tracemalloc
+import multiprocessing
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Well-known development account of the Azurite emulator
+AZURITE_ACCOUNT_NAME = "devstoreaccount1"
+AZURITE_ACCOUNT_KEY = "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+
+BENCHMARK_CONTAINER = "blob-transfer-benchmark"
+
+
+class BlobStandInHandler(BaseHTTPRequestHandler):
+    '''
+    Handles one connection of the stand-in. Authentication headers are accepted as they are.
+    '''
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _target(self):
+        url = urlsplit(self.path)
+        parts = unquote(url.path).lstrip("/").split("/", 2)
+        container = parts[1] if len(parts) > 1 else None
+        blob = parts[2] if len(parts) > 2 else None
+        return container, blob, {key: values[0] for key, values in parse_qs(url.query).items()}
+
+    def _pace(self, started: float, n_bytes: int) -> None:
+        # Latency plus transfer time at the per-connection bandwidth
+        target = started + self.server.latency_seconds
+        if self.server.connection_bytes_per_second:
+            target += n_bytes / self.server.connection_bytes_per_second
+        delay = target - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _respond(self, status: int, headers: dict = None, body: bytes = b"", started: float = None) -> None:
+        self.send_response(status)
+        self.send_header("x-ms-request-id", str(uuid.uuid4()))
+        self.send_header("x-ms-version", "2025-01-05")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if started is not None:
+            self._pace(started, len(body))
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _not_found(self) -> None:
+        self._respond(404, {"x-ms-error-code": "BlobNotFound"})
+
+    def _blob_headers(self, entry) -> dict:
+        data, etag, last_modified = entry
+        return {"ETag": etag, "Last-Modified": last_modified, "x-ms-blob-type": "BlockBlob",
+                "Content-Type": "application/octet-stream", "Accept-Ranges": "bytes",
+                "x-ms-creation-time": last_modified}
+
+    def _store(self, container: str, blob: str, data: bytes) -> dict:
+        etag = f'"0x{uuid.uuid4().hex[:16].upper()}"'
+        last_modified = formatdate(usegmt=True)
+        with self.server.lock:
+            self.server.blobs[(container, blob)] = (data, etag, last_modified)
+            self.server.blocks.pop((container, blob), None)
+        return {"ETag": etag, "Last-Modified": last_modified, "x-ms-request-server-encrypted": "true"}
+
+    def do_PUT(self) -> None:
+        started = time.perf_counter()
+        container, blob, query = self._target()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._pace(started, len(body))
+
+        if query.get("restype") == "container":
+            with self.server.lock:
+                exists = container in self.server.containers
+                self.server.containers.add(container)
+            if exists:
+                self._respond(409, {"x-ms-error-code": "ContainerAlreadyExists"})
+            else:
+                self._respond(201, {"ETag": '"0x1"', "Last-Modified": formatdate(usegmt=True)})
+        elif query.get("comp") == "block":
+            with self.server.lock:
+                self.server.blocks.setdefault((container, blob), {})[query["blockid"]] = body
+            self._respond(201)
+        elif query.get("comp") == "blocklist":
+            block_ids = re.findall(rb"<(?:Latest|Committed|Uncommitted)>([^<]*)</", body)
+            with self.server.lock:
+                blocks = self.server.blocks.get((container, blob), {})
+                data = b"".join(blocks[block_id.decode()] for block_id in block_ids)
+            self._respond(201, self._store(container, blob, data))
+        else:
+            self._respond(201, self._store(container, blob, body))
+
+    def do_HEAD(self) -> None:
+        container, blob, _ = self._target()
+        entry = self.server.blobs.get((container, blob))
+        if entry is None:
+            self._not_found()
+            return
+        # Without a body, Content-Length still reports the blob size
+        self._respond(200, self._blob_headers(entry), entry[0])
+
+    def do_GET(self) -> None:
+        started = time.perf_counter()
+        container, blob, _ = self._target()
+        entry = self.server.blobs.get((container, blob))
+        if entry is None:
+            self._not_found()
+            return
+        data = entry[0]
+        headers = self._blob_headers(entry)
+        byte_range = self.headers.get("x-ms-range") or self.headers.get("Range")
+        if byte_range:
+            start, _, end = byte_range.split("=", 1)[1].partition("-")
+            start, end = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            self._respond(206, headers, memoryview(data)[start:end + 1], started)
+        else:
+            self._respond(200, headers, data, started)
+
+    def do_DELETE(self) -> None:
+        container, blob, query = self._target()
+        with self.server.lock:
+            if query.get("restype") == "container":
+                self.server.containers.discard(container)
+                for key in [key for key in self.server.blobs if key[0] == container]:
+                    del self.server.blobs[key]
+            else:
+                self.server.blobs.pop((container, blob), None)
+        self._respond(202)
+
+
+class BlobStandIn(ThreadingHTTPServer):
+    '''
+    In-memory blob endpoint for AZURITE_ACCOUNT_NAME on 127.0.0.1.
+    '''
+    daemon_threads = True
+
+    def __init__(self, connection_mbps: float = 0.0, latency_ms: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), BlobStandInHandler)
+        self.connection_bytes_per_second = connection_mbps * 1_000_000 / 8
+        self.latency_seconds = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.containers: set = set()
+        self.blobs: dict = {}
+        self.blocks: dict = {}
+
+
+def _serve_stand_in(connection_mbps: float, latency_ms: float, port_sender) -> None:
+    server = BlobStandIn(connection_mbps, latency_ms)
+    port_sender.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stand_in(connection_mbps: float, latency_ms: float) -> tuple:
+    '''
+    Runs the stand-in in its own process, so its buffers and threads do not show up in the
+    client's measurements. Returns the process and the connection string.
+    '''
+    port_receiver, port_sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve_stand_in, args=(connection_mbps, latency_ms, port_sender),
+                                      daemon=True)
+    process.start()
+    port = port_receiver.recv()
+    return process, (f"DefaultEndpointsProtocol=http;AccountName={AZURITE_ACCOUNT_NAME};"
+                     f"AccountKey={AZURITE_ACCOUNT_KEY};BlobEndpoint=http://127.0.0.1:{port}/{AZURITE_ACCOUNT_NAME};")
+
+
+def measure(function, runs: int) -> tuple:
+    '''
+    Returns the median wall time of function() over runs and, from one more run, its peak traced
+    Python allocations.
+    '''
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    seconds = statistics.median(samples)
+    tracemalloc.start()
+    function()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark single-stream against parallel blob transfers.")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated max_concurrency values")
+    parser.add_argument("--connection-mbps", type=float, default=200.0, help="Stand-in bandwidth per connection, 0 for unlimited")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stand-in latency per request")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--connection-string", help="Benchmark Azurite or a storage account instead of the stand-in")
+    args = parser.parse_args()
+
+    from azure.storage.blob import BlobServiceClient
+    from src.configuration.azure_connection import AzureBlobClient
+    from src.constants import AZURE_STORAGE_CONNECTION_STRING_KEY
+
+    connection_string = args.connection_string
+    if connection_string is None:
+        _, connection_string = start_stand_in(args.connection_mbps, args.latency_ms)
+        print(f"stand-in: {args.connection_mbps:g} Mbit/s per connection, {args.latency_ms:g} ms per request")
+    os.environ[AZURE_STORAGE_CONNECTION_STRING_KEY] = connection_string
+    AzureBlobClient.blob_service_client = None
+
+    from src.cloud_storage.async_azure_storage import AsyncAzureStorageService
+    from src.cloud_storage.azure_storage import AzureStorageService
+
+    work_dir = tempfile.mkdtemp()
+    source_path = os.path.join(work_dir, "source.bin")
+    target_path = os.path.join(work_dir, "target.bin")
+    with open(source_path, "wb") as file_obj:
+        file_obj.write(os.urandom(args.size_mb * 1024 * 1024))
+    blob_path = "benchmark/source.bin"
+
+    # Single stream with the SDK's default transfer sizes, as the storage service did before
+    baseline_client = BlobServiceClient.from_connection_string(connection_string)
+    baseline_client.create_container(BENCHMARK_CONTAINER)
+    baseline_blob = baseline_client.get_blob_client(BENCHMARK_CONTAINER, blob_path)
+
+    def baseline_upload() -> None:
+        with open(source_path, "rb") as data:
+            baseline_blob.upload_blob(data, overwrite=True)
+
+    rows = [("single stream, readall", *measure(baseline_upload, args.runs),
+             *measure(lambda: baseline_blob.download_blob().readall(), args.runs))]
+
+    for max_concurrency in [int(value) for value in args.concurrency.split(",")]:
+        storage = AzureStorageService(cache_max_bytes=0, max_concurrency=max_concurrency)
+        rows.append((f"AzureStorageService x{max_concurrency}",
+                     *measure(lambda: storage.upload_file(source_path, BENCHMARK_CONTAINER, blob_path, remove=False),
+                              args.runs),
+                     *measure(lambda: storage.download_file(BENCHMARK_CONTAINER, blob_path, target_path), args.runs)))
+
+        async def async_transfer(method: str) -> None:
+            async with AsyncAzureStorageService(max_concurrency=max_concurrency) as async_storage:
+                if method == "upload":
+                    await async_storage.upload_file(source_path, BENCHMARK_CONTAINER, blob_path, remove=False)
+                else:
+                    await async_storage.download_file(BENCHMARK_CONTAINER, blob_path, target_path)
+
+        rows.append((f"AsyncAzureStorageService x{max_concurrency}",
+                     *measure(lambda: asyncio.run(async_transfer("upload")), args.runs),
+                     *measure(lambda: asyncio.run(async_transfer("download")), args.runs)))
+
+    with open(source_path, "rb") as source, open(target_path, "rb") as target:
+        if source.read() != target.read():
+            raise Exception("Downloaded blob differs from the uploaded file")
+    baseline_client.delete_container(BENCHMARK_CONTAINER)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    size_mib = args.size_mb
+    print(f"{'':<32}{'upload':>10}{'MiB/s':>9}{'peak MiB':>10}{'download':>11}{'MiB/s':>9}{'peak MiB':>10}")
+    for name, upload_seconds, upload_peak, download_seconds, download_peak in rows:
+        print(f"{name:<32}{upload_seconds:>9.2f}s{size_mib / upload_seconds:>9.1f}{upload_peak / 2 ** 20:>10.1f}"
+              f"{download_seconds:>10.2f}s{size_mib / download_seconds:>9.1f}{download_peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
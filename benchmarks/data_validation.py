@@ -0,0 +1,131 @@
+'''
+Benchmark of the value checks of data validation on train and test Parquet files.
+
+The full-load variant reads both files into dataframes and runs every rule as its own pandas
+expression over the whole columns, the way checks are written when memory is not a concern.
+The engine variants stream the files in chunks of --chunk-rows rows through ValidationEngine,
+the splits one after the other and concurrently. Every variant runs in its own process, which
+reports its wall time and peak resident memory.
+
+The synthetic files hold --rows policies split 3:1, with a few rows breaking every rule, and
+the benchmark checks that all variants count the same violations.
+
+Usage:
+    python -m benchmarks.data_validation [--rows 4000000] [--chunk-rows 100000]
+'''
+import os
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml
+from src.utils.validation_engine import ValidationEngine
+
+ROW_GROUP_ROWS = 250000
+
+
+def write_split(file_path: str, n_rows: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    writer = None
+    for start in range(0, n_rows, ROW_GROUP_ROWS):
+        n = min(ROW_GROUP_ROWS, n_rows - start)
+        age = rng.integers(20, 86, n).astype(np.float64)
+        age[rng.random(n) < 0.001] = np.nan
+        table = pa.table({
+            "id": np.arange(start, start + n) + seed * n_rows,
+            "Gender": pa.array(rng.choice(["Male", "Female", "Other"], n, p=[0.4995, 0.4995, 0.001])).dictionary_encode(),
+            "Age": age,
+            "Driving_License": rng.integers(0, 2, n),
+            "Region_Code": rng.integers(0, 53, n).astype(np.float64),
+            "Previously_Insured": rng.integers(0, 2, n),
+            "Vehicle_Age": pa.array(rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"], n)).dictionary_encode(),
+            "Vehicle_Damage": pa.array(rng.choice(["Yes", "No"], n)).dictionary_encode(),
+            "Annual_Premium": rng.uniform(-10.0, 60000.0, n),
+            "Policy_Sales_Channel": rng.integers(1, 164, n).astype(np.float64),
+            "Vintage": rng.integers(10, 370, n),
+            "Response": rng.integers(0, 2, n),
+        })
+        writer = writer or pq.ParquetWriter(file_path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def full_load(paths: dict, schema_config: dict, chunk_rows: int) -> dict:
+    rules = schema_config["validation_rules"]
+    columns = schema_config["numerical_columns"] + schema_config["categorical_columns"]
+    violations = {}
+    for name, path in paths.items():
+        df = pd.read_parquet(path)
+        counts = {("null_rate", column): int(df[column].isna().sum()) for column in columns}
+        for column, (low, high) in rules["ranges"].items():
+            counts[("range", column)] = int(((df[column] < low) | (df[column] > high)).sum())
+        for column, domain in schema_config["categorical_domains"].items():
+            counts[("category", column)] = int((df[column].notna() & ~df[column].astype(str).isin(domain)).sum())
+        violations[name] = counts
+    return violations
+
+
+def engine(paths: dict, schema_config: dict, chunk_rows: int, parallel: bool) -> dict:
+    reports = ValidationEngine(schema_config, chunk_rows=chunk_rows).run_all(paths, parallel=parallel)
+    return {name: {(result["rule"], result["column"]): result["violations"] for result in report["rules"]}
+            for name, report in reports.items()}
+
+
+VARIANTS = {
+    "full load": full_load,
+    "engine": lambda paths, schema_config, chunk_rows: engine(paths, schema_config, chunk_rows, False),
+    "engine, parallel": lambda paths, schema_config, chunk_rows: engine(paths, schema_config, chunk_rows, True),
+}
+
+
+def run_variant(name: str, paths: dict, schema_config: dict, chunk_rows: int, queue) -> None:
+    start = time.perf_counter()
+    violations = VARIANTS[name](paths, schema_config, chunk_rows)
+    seconds = time.perf_counter() - start
+    queue.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, violations))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the data validation value checks.")
+    parser.add_argument("--rows", type=int, default=4000000)
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    work_dir = tempfile.mkdtemp()
+    try:
+        paths = {"train": os.path.join(work_dir, "train.parquet"), "test": os.path.join(work_dir, "test.parquet")}
+        write_split(paths["train"], args.rows * 3 // 4, seed=1)
+        write_split(paths["test"], args.rows - args.rows * 3 // 4, seed=2)
+        size = sum(os.path.getsize(path) for path in paths.values())
+
+        context = multiprocessing.get_context("spawn")
+        results = {}
+        for name in VARIANTS:
+            queue = context.Queue()
+            process = context.Process(target=run_variant, args=(name, paths, schema_config, args.chunk_rows, queue))
+            process.start()
+            results[name] = queue.get()
+            process.join()
+    finally:
+        shutil.rmtree(work_dir)
+
+    print(f"{args.rows} rows in {size / 2**20:.1f} MiB of Parquet, chunks of {args.chunk_rows} rows")
+    print(f"{'variant':<20}{'seconds':>10}{'peak MiB':>10}")
+    for name, (seconds, peak_mib, _) in results.items():
+        print(f"{name:<20}{seconds:>10.2f}{peak_mib:>10.0f}")
+    reference = results["full load"][2]
+    print("violations match:", all(result[2] == reference for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
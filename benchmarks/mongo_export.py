@@ -0,0 +1,190 @@
+'''
+Benchmark of the MongoDB export with 1 to N parallel id-range partitions.
+
+By default it runs against an in-process stand-in collection. It answers find() with the id range
+filters, projection, sort and batching Proj1Data uses, and it charges every cursor batch a round
+trip (--latency-ms) plus its transfer time at --connection-mbps. The same as a real server, a
+single cursor is bound by one connection. Pass --mongodb-url to seed and export a throwaway
+collection on a real mongod instead.
+
+Every run writes the feature store CSV. The benchmark checks that all worker counts produce
+byte-identical files.
+
+Usage:
+    python -m benchmarks.mongo_export [--documents 200000] [--workers 1,2,4,8] [--mongodb-url mongodb://localhost]
+'''
+import os
+import time
+import random
+import bisect
+import hashlib
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+BENCHMARK_DATABASE = "Proj1_benchmark"
+BENCHMARK_COLLECTION = "export_benchmark"
+# Approximate BSON size of one document, used to pace the stand-in
+DOCUMENT_BYTES = 260
+
+
+def generate_documents(n_documents: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    documents = []
+    for index in range(1, n_documents + 1):
+        documents.append({
+            "id": index,
+            "Gender": rng.choice(("Male", "Female")),
+            "Age": rng.randint(20, 85),
+            "Driving_License": int(rng.random() < 0.998),
+            "Region_Code": float(rng.randint(0, 52)),
+            "Previously_Insured": rng.randint(0, 1),
+            "Vehicle_Age": rng.choice(("< 1 Year", "1-2 Year", "> 2 Years")),
+            "Vehicle_Damage": rng.choice(("Yes", "No")),
+            "Annual_Premium": "na" if index % 997 == 0 else round(rng.uniform(2630.0, 60000.0), 1),
+            "Policy_Sales_Channel": float(rng.randint(1, 163)),
+            "Vintage": rng.randint(10, 299),
+            "Response": int(rng.random() < 0.12),
+        })
+    return documents
+
+
+class StandInCursor:
+    def __init__(self, collection: "StandInCollection", documents: list, projection: dict, batch_size: int) -> None:
+        self.collection = collection
+        self.documents = documents
+        projection = projection or {}
+        self.excluded = {field for field, include in projection.items() if not include}
+        # An inclusion projection returns the listed fields only
+        self.included = {field for field, include in projection.items() if include} or None
+        self.batch_size = batch_size or 101
+        self.position = 0
+        self.batch: list = []
+
+    def sort(self, field: str, direction: int = 1) -> "StandInCursor":
+        self.documents = sorted(self.documents, key=lambda document: document.get(field, 0), reverse=direction < 0)
+        return self
+
+    def limit(self, n: int) -> "StandInCursor":
+        self.documents = self.documents[:n]
+        return self
+
+    def allow_disk_use(self, allow: bool) -> "StandInCursor":
+        return self
+
+    def close(self) -> None:
+        self.documents = []
+
+    def __iter__(self) -> "StandInCursor":
+        return self
+
+    def __next__(self) -> dict:
+        if not self.batch:
+            batch = self.documents[self.position:self.position + self.batch_size]
+            if not batch:
+                raise StopIteration
+            self.position += len(batch)
+            self.collection.pace(len(batch))
+            # Decoding a batch allocates new dicts
+            self.batch = [{key: value for key, value in document.items()
+                           if key not in self.excluded and (self.included is None or key in self.included)}
+                          for document in reversed(batch)]
+        return self.batch.pop()
+
+
+class StandInCollection:
+    '''
+    In-memory collection indexed on id.
+    '''
+    def __init__(self, documents: list, connection_mbps: float, latency_ms: float) -> None:
+        self.documents = sorted(documents, key=lambda document: document["id"])
+        self.ids = [document["id"] for document in self.documents]
+        self.connection_bytes_per_second = connection_mbps * 1_000_000 / 8
+        self.latency_seconds = latency_ms / 1000
+
+    def pace(self, n_documents: int) -> None:
+        delay = self.latency_seconds
+        if self.connection_bytes_per_second:
+            delay += n_documents * DOCUMENT_BYTES / self.connection_bytes_per_second
+        time.sleep(delay)
+
+    def _select(self, query: dict) -> list:
+        condition = query.get("id")
+        if isinstance(condition, dict) and "$gte" in condition:
+            start = bisect.bisect_left(self.ids, condition["$gte"])
+            if "$lt" in condition:
+                stop = bisect.bisect_left(self.ids, condition["$lt"])
+            else:
+                stop = bisect.bisect_right(self.ids, condition["$lte"])
+            return self.documents[start:stop]
+        if "$or" in query:
+            # The stand-in only holds numeric ids
+            return []
+        if condition is not None and not isinstance(condition, dict):
+            index = bisect.bisect_left(self.ids, condition)
+            return self.documents[index:index + 1] if index < len(self.ids) and self.ids[index] == condition else []
+        return self.documents
+
+    def find(self, query: dict = None, projection: dict = None, batch_size: int = 0) -> StandInCursor:
+        return StandInCursor(self, self._select(query or {}), projection, batch_size)
+
+    def find_one(self, query: dict = None, projection: dict = None):
+        return next(iter(self.find(query, projection, 1)), None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the parallel partitioned MongoDB export.")
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--connection-mbps", type=float, default=100.0, help="Stand-in bandwidth per cursor")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in round trip per cursor batch")
+    parser.add_argument("--mongodb-url", help="Benchmark a real mongod instead of the stand-in")
+    args = parser.parse_args()
+
+    from src.data_access.proj1_data import Proj1Data
+
+    documents = generate_documents(args.documents)
+    client = None
+    if args.mongodb_url:
+        import pymongo
+
+        client = pymongo.MongoClient(args.mongodb_url)
+        database = client[BENCHMARK_DATABASE]
+        database.drop_collection(BENCHMARK_COLLECTION)
+        database[BENCHMARK_COLLECTION].insert_many(documents)
+        database[BENCHMARK_COLLECTION].create_index("id")
+        print(f"mongod: {args.documents} documents in {BENCHMARK_DATABASE}.{BENCHMARK_COLLECTION}")
+    else:
+        database = {BENCHMARK_COLLECTION: StandInCollection(documents, args.connection_mbps, args.latency_ms)}
+        print(f"stand-in: {args.documents} documents, {args.connection_mbps:g} Mbit/s and "
+              f"{args.latency_ms:g} ms per cursor batch")
+    del documents
+
+    proj1_data = Proj1Data(mongo_client=SimpleNamespace(database=database))
+    work_dir = tempfile.mkdtemp()
+    digests = set()
+    baseline_seconds = None
+    try:
+        print(f"{'workers':>8}{'seconds':>10}{'rows/s':>12}{'speedup':>9}")
+        for n_workers in [int(value) for value in args.workers.split(",")]:
+            file_path = os.path.join(work_dir, f"export_{n_workers}.csv")
+            start = time.perf_counter()
+            n_rows = proj1_data.export_collection_to_csv(BENCHMARK_COLLECTION, file_path,
+                                                         batch_size=args.batch_size, n_workers=n_workers)
+            seconds = time.perf_counter() - start
+            baseline_seconds = baseline_seconds or seconds
+            with open(file_path, "rb") as file_obj:
+                digests.add(hashlib.sha256(file_obj.read()).hexdigest())
+            os.remove(file_path)
+            print(f"{n_workers:>8}{seconds:>10.2f}{n_rows / seconds:>12.0f}{baseline_seconds / seconds:>8.2f}x")
+    finally:
+        os.rmdir(work_dir)
+        if client is not None:
+            client[BENCHMARK_DATABASE].drop_collection(BENCHMARK_COLLECTION)
+
+    print(f"identical output for every worker count: {len(digests) == 1}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+'''
+Benchmark of model memory and startup time across serving worker processes.
+
+Starts --workers processes that each load the model through ModelHolder, once with a private
+unpickled copy per worker and once memory-mapping the shared compiled model, and reports every
+worker's load time and memory once all of them are serving. RSS counts shared pages in every
+process that maps them, PSS splits them between those processes.
+
+Usage:
+    python -m benchmarks.multi_worker_memory --model-path artifact/<timestamp>/model_trainer/trained_model/model.pkl --workers 4
+'''
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+from src.cloud_storage.local_storage import LocalStorageService
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.model_holder import ModelHolder, process_memory
+
+
+def worker(storage_root: str, shared_model_dir: str, barrier, results) -> None:
+    config = VehiclePredictorConfig(shared_model_dir=shared_model_dir)
+    model_holder = ModelHolder(config, storage=LocalStorageService(storage_root))
+    baseline = process_memory()
+
+    start = time.perf_counter()
+    model_holder.load()
+    load_seconds = time.perf_counter() - start
+
+    # Measure once every worker holds its model, so shared pages are split between all of them
+    barrier.wait()
+    memory = process_memory()
+    results.put({
+        "load_seconds": load_seconds,
+        "model_rss_mib": (memory["rss_bytes"] - baseline["rss_bytes"]) / 2 ** 20,
+        "rss_mib": memory["rss_bytes"] / 2 ** 20,
+        "pss_mib": memory["pss_bytes"] / 2 ** 20,
+    })
+    barrier.wait()
+
+
+def run_mode(storage_root: str, shared_model_dir: str, workers: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(storage_root, shared_model_dir, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    worker_results = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return worker_results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-worker model memory and startup time.")
+    parser.add_argument("--model-path", required=True, help="Pickled MyModel, e.g. the model trainer artifact")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    storage_root = tempfile.mkdtemp()
+    shared_model_dir = tempfile.mkdtemp()
+    try:
+        config = VehiclePredictorConfig()
+        LocalStorageService(storage_root).upload_file(args.model_path, config.model_bucket_name,
+                                                      config.model_file_path, remove=False)
+        modes = {
+            "private copy per worker": run_mode(storage_root, None, args.workers),
+            "shared mmap model": run_mode(storage_root, shared_model_dir, args.workers),
+        }
+    finally:
+        shutil.rmtree(storage_root, ignore_errors=True)
+        shutil.rmtree(shared_model_dir, ignore_errors=True)
+
+    print(f"workers: {args.workers}")
+    print(f"{'mode':<26}{'worker':>8}{'load s':>10}{'model RSS MiB':>15}{'RSS MiB':>10}{'PSS MiB':>10}")
+    for mode, results in modes.items():
+        for index, result in enumerate(sorted(results, key=lambda r: -r["load_seconds"])):
+            print(f"{mode:<26}{index:>8}{result['load_seconds']:>10.3f}{result['model_rss_mib']:>15.1f}"
+                  f"{result['rss_mib']:>10.1f}{result['pss_mib']:>10.1f}")
+        print(f"{mode:<26}{'total':>8}{'':>10}{sum(r['model_rss_mib'] for r in results):>15.1f}"
+              f"{sum(r['rss_mib'] for r in results):>10.1f}{sum(r['pss_mib'] for r in results):>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+'''
+Benchmark of the artifact I/O of one training run: CSV round-trips against the typed Parquet artifacts.
+
+Both variants replay the reads and writes the pipeline stages make on a synthetic dataset of
+--rows policies:
+
+- data ingestion writes the feature store file, reads it back and writes train and test
+- data validation reads train and test
+- data transformation reads train and test
+- model evaluation reads test
+
+The CSV variant is what the pipeline did before: every read re-parses the text and re-infers
+the dtypes. The Parquet variant reads schemas only for validation and the model columns typed
+by config/schema.yaml everywhere else. Every step is timed as the median of --runs runs.
+
+Usage:
+    python -m benchmarks.pipeline_io [--rows 400000] [--runs 3]
+'''
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.mongo_export import generate_documents
+from src.constants import SCHEMA_FILE_PATH, DATA_INGESTION_EXCLUDED_FIELDS
+from src.utils.main_utils import (read_yaml, apply_schema_dtypes, save_dataframe, load_dataframe,
+                                  load_dataframe_schema)
+
+
+def csv_run(work_dir: str, dataframe: pd.DataFrame) -> dict:
+    paths = {name: os.path.join(work_dir, f"{name}.csv") for name in ("data", "train", "test")}
+    timings = {}
+
+    start = time.perf_counter()
+    dataframe.to_csv(paths["data"], index=False)
+    feature_store = pd.read_csv(paths["data"])
+    train_set, test_set = train_test_split(feature_store, test_size=0.25, random_state=0)
+    train_set.to_csv(paths["train"], index=False)
+    test_set.to_csv(paths["test"], index=False)
+    timings["data_ingestion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pd.read_csv(paths["train"]), pd.read_csv(paths["test"])
+    timings["data_validation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pd.read_csv(paths["train"]), pd.read_csv(paths["test"])
+    timings["data_transformation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pd.read_csv(paths["test"])
+    timings["model_evaluation"] = time.perf_counter() - start
+    timings["bytes"] = sum(os.path.getsize(path) for path in paths.values())
+    return timings
+
+
+def parquet_run(work_dir: str, dataframe: pd.DataFrame, columns: list, schema_config: dict) -> dict:
+    paths = {name: os.path.join(work_dir, f"{name}.parquet") for name in ("data", "train", "test")}
+    timings = {}
+
+    start = time.perf_counter()
+    save_dataframe(paths["data"], dataframe)
+    feature_store = load_dataframe(paths["data"], schema_config=schema_config)
+    train_set, test_set = train_test_split(feature_store, test_size=0.25, random_state=0)
+    save_dataframe(paths["train"], train_set)
+    save_dataframe(paths["test"], test_set)
+    timings["data_ingestion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_dataframe_schema(paths["train"]), load_dataframe_schema(paths["test"])
+    timings["data_validation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_dataframe(paths["train"], columns, schema_config), load_dataframe(paths["test"], columns, schema_config)
+    timings["data_transformation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_dataframe(paths["test"], columns, schema_config)
+    timings["model_evaluation"] = time.perf_counter() - start
+    timings["bytes"] = sum(os.path.getsize(path) for path in paths.values())
+    return timings
+
+
+def median_timings(runs: list) -> dict:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline artifact I/O, CSV against Parquet.")
+    parser.add_argument("--rows", type=int, default=400000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    columns = schema_config["numerical_columns"] + schema_config["categorical_columns"]
+    documents = generate_documents(args.rows)
+    for document in documents:
+        for field in DATA_INGESTION_EXCLUDED_FIELDS:
+            document.pop(field, None)
+    dataframe = pd.DataFrame.from_records(documents)
+    del documents
+    dataframe["Annual_Premium"] = pd.to_numeric(dataframe["Annual_Premium"].mask(dataframe["Annual_Premium"].eq("na")))
+    dataframe = apply_schema_dtypes(dataframe, schema_config)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        results = {
+            "csv": median_timings([csv_run(work_dir, dataframe) for _ in range(args.runs)]),
+            "parquet": median_timings([parquet_run(work_dir, dataframe, columns, schema_config) for _ in range(args.runs)]),
+        }
+    finally:
+        shutil.rmtree(work_dir)
+
+    stages = ("data_ingestion", "data_validation", "data_transformation", "model_evaluation")
+    print(f"{args.rows} rows, median of {args.runs} runs (seconds)")
+    print(f"{'stage':<22}{'csv':>10}{'parquet':>10}{'speedup':>10}")
+    for stage in stages:
+        csv_seconds, parquet_seconds = results["csv"][stage], results["parquet"][stage]
+        print(f"{stage:<22}{csv_seconds:>10.3f}{parquet_seconds:>10.3f}{csv_seconds / parquet_seconds:>9.1f}x")
+    csv_total = sum(results["csv"][stage] for stage in stages)
+    parquet_total = sum(results["parquet"][stage] for stage in stages)
+    print(f"{'total':<22}{csv_total:>10.3f}{parquet_total:>10.3f}{csv_total / parquet_total:>9.1f}x")
+    print(f"{'artifact MiB':<22}{results['csv']['bytes'] / 2**20:>10.1f}{results['parquet']['bytes'] / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
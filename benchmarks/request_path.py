@@ -0,0 +1,107 @@
+'''
+Benchmark of the single-row request path, before and after the array-backed VehicleData.
+
+  before: form values -> VehicleData dict -> one-row DataFrame -> MyModel.predict
+  after:  form values -> VehicleData float64 row -> VehicleDataClassifier.predict_array
+
+Reports p50/p99 latency per request and the memory allocated per request (tracemalloc).
+
+Usage:
+    python -m benchmarks.request_path --model-path artifact/<timestamp>/model_trainer/trained_model/model.pkl
+'''
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+from pandas import DataFrame
+
+from src.cloud_storage.local_storage import LocalStorageService
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.model_holder import ModelHolder
+from src.pipeline.prediction_pipeline import VehicleData, VehicleDataClassifier
+
+
+# Form values arrive as strings
+FORM_ROW = {
+    "Gender": "1", "Age": "35", "Driving_License": "1", "Region_Code": "28.0",
+    "Previously_Insured": "0", "Annual_Premium": "30000.0", "Policy_Sales_Channel": "152.0",
+    "Vintage": "150", "Vehicle_Age_It_1_Year": "0", "Vehicle_Age_gt_2_Years": "0", "Vehicle_Damage_Yes": "1",
+}
+
+
+def dataframe_request(model) -> None:
+    row = {column: [float(FORM_ROW[column])] for column in MODEL_FEATURE_COLUMNS}
+    model.predict(DataFrame(row))
+
+
+def array_request(classifier: VehicleDataClassifier) -> None:
+    vehicle_data = VehicleData(**FORM_ROW)
+    classifier.predict_array(vehicle_data.features[np.newaxis, :])
+
+
+def measure(name: str, fn, iterations: int) -> dict:
+    for _ in range(min(iterations, 50)):
+        fn()
+
+    latencies = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = time.perf_counter() - start
+
+    # Peak Python-heap growth while serving one request, averaged over a few requests
+    allocation_runs = min(iterations, 100)
+    peaks = np.empty(allocation_runs, dtype=np.float64)
+    tracemalloc.start()
+    for i in range(allocation_runs):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - before
+    tracemalloc.stop()
+
+    return {
+        "path": name,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "peak_kib_per_request": float(peaks.mean() / 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the single-row prediction request path.")
+    parser.add_argument("--model-path", required=True, help="Pickled MyModel, e.g. the model trainer artifact")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Serve the model through the regular ModelHolder from a scratch local storage root
+    storage_root = tempfile.mkdtemp()
+    try:
+        config = VehiclePredictorConfig()
+        storage = LocalStorageService(storage_root)
+        storage.upload_file(args.model_path, config.model_bucket_name, config.model_file_path, remove=False)
+        model_holder = ModelHolder(config, storage=storage)
+        model_holder.load()
+        classifier = VehicleDataClassifier(config, model_holder=model_holder)
+
+        results = [
+            measure("dict -> DataFrame -> MyModel.predict", lambda: dataframe_request(model_holder.model), args.iterations),
+            measure("VehicleData -> predict_array", lambda: array_request(classifier), args.iterations),
+        ]
+    finally:
+        shutil.rmtree(storage_root, ignore_errors=True)
+
+    print(f"compiled scorer: {model_holder.status()['compiled']}, iterations: {args.iterations}")
+    print(f"{'path':<40}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB/req':>14}")
+    for result in results:
+        print(f"{result['path']:<40}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['peak_kib_per_request']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
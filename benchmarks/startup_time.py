@@ -0,0 +1,112 @@
+'''
+Benchmark of serving cold start: interpreter + import of app.py, then time to the first prediction
+(lifespan start-up with model download/load/warm-up, plus one single-row prediction).
+
+Every sample runs in a fresh interpreter. Also lists which heavy training-side packages the
+serving entry point imported.
+
+Usage:
+    python -m benchmarks.startup_time --model-path artifact/<timestamp>/model_trainer/trained_model/model.pkl \
+        [--compiled-model-path artifact/<timestamp>/model_trainer/trained_model/model_compiled.bin]
+
+Without --compiled-model-path only the pickle is pushed, as before the compiled model was uploaded.
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Packages only the training pipeline should need
+TRAINING_MODULES = ("imblearn", "pymongo", "certifi", "sklearn", "scipy", "src.components", "src.pipeline.training_pipeline")
+
+FIRST_PREDICTION_ROW = {
+    "Gender": "1", "Age": "35", "Driving_License": "1", "Region_Code": "28.0",
+    "Previously_Insured": "0", "Annual_Premium": "30000.0", "Policy_Sales_Channel": "152.0",
+    "Vintage": "150", "Vehicle_Age_It_1_Year": "0", "Vehicle_Age_gt_2_Years": "0", "Vehicle_Damage_Yes": "1",
+}
+
+
+def measure_cold_start(storage_root: str) -> dict:
+    '''
+    Runs in the child interpreter.
+    '''
+    start = time.perf_counter()
+    import app as serving_app
+    import_seconds = time.perf_counter() - start
+    imported_after_import = [name for name in TRAINING_MODULES if name in sys.modules]
+
+    from src.cloud_storage.local_storage import LocalStorageService
+    from src.pipeline.model_holder import ModelHolder
+    from src.pipeline.prediction_pipeline import VehicleData
+
+    ModelHolder.instance = ModelHolder(storage=LocalStorageService(storage_root))
+
+    async def first_prediction() -> None:
+        async with serving_app.app.router.lifespan_context(serving_app.app):
+            row = VehicleData(**FIRST_PREDICTION_ROW).features
+            await serving_app.app.state.inference_scheduler.submit(row)
+
+    asyncio.run(first_prediction())
+    return {
+        "import_seconds": import_seconds,
+        "first_prediction_seconds": time.perf_counter() - start,
+        "model_source": ModelHolder.instance.model_source,
+        "training_modules_after_import": imported_after_import,
+        "training_modules_after_prediction": [name for name in TRAINING_MODULES if name in sys.modules],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serving import time and time-to-first-prediction.")
+    parser.add_argument("--model-path", help="Pickled MyModel, e.g. the model trainer artifact")
+    parser.add_argument("--compiled-model-path", help="Compiled model pushed next to the pickle")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child-storage-root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_storage_root:
+        print(json.dumps(measure_cold_start(args.child_storage_root)))
+        return
+    if not args.model_path:
+        parser.error("--model-path is required")
+
+    from src.cloud_storage.local_storage import LocalStorageService
+    from src.entity.config_entity import VehiclePredictorConfig
+
+    storage_root = tempfile.mkdtemp()
+    try:
+        config = VehiclePredictorConfig()
+        LocalStorageService(storage_root).upload_file(args.model_path, config.model_bucket_name,
+                                                      config.model_file_path, remove=False)
+        if args.compiled_model_path:
+            LocalStorageService(storage_root).upload_file(args.compiled_model_path, config.model_bucket_name,
+                                                          config.compiled_model_file_path, remove=False)
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.startup_time", "--child-storage-root", storage_root],
+                capture_output=True, text=True, check=True, env=dict(os.environ),
+            )
+            sample = json.loads(completed.stdout.strip().splitlines()[-1])
+            sample["process_seconds"] = time.perf_counter() - start
+            samples.append(sample)
+    finally:
+        shutil.rmtree(storage_root, ignore_errors=True)
+
+    for key in ("import_seconds", "first_prediction_seconds", "process_seconds"):
+        values = [sample[key] for sample in samples]
+        print(f"{key:<28} median {statistics.median(values):.3f}s  min {min(values):.3f}s  max {max(values):.3f}s")
+    print(f"model loaded from:                            {samples[-1]['model_source']}")
+    print(f"training modules imported by app.py:          {samples[-1]['training_modules_after_import']}")
+    print(f"training modules loaded by first prediction:  {samples[-1]['training_modules_after_prediction']}")
+
+
+if __name__ == "__main__":
+    main()
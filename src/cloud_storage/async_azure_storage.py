@@ -0,0 +1,95 @@
+import os
+import pickle
+import asyncio
+from io import BytesIO
+
+import pandas as pd
+
+from src.configuration.azure_connection import TRANSFER_OPTIONS, get_connection_string
+from src.constants import BLOB_TRANSFER_MAX_CONCURRENCY, BLOB_TRANSFER_MAX_CONCURRENCY_ENV_KEY
+
+
+class AsyncAzureStorageService:
+    '''
+    asyncio variant of AzureStorageService built on azure.storage.blob.aio.
+
+    Transfers never block the event loop. Blobs larger than the single put/get sizes of
+    TRANSFER_OPTIONS are uploaded as blocks and downloaded as byte ranges by max_concurrency
+    parallel requests, written straight to the file or buffer as they arrive, so no full copy
+    of the blob is assembled in Python bytes first.
+
+    The client is bound to the event loop it is first used on: create the service inside the
+    loop and close it (or use it as an async context manager) when done.
+    '''
+    def __init__(self, max_concurrency: int = None, connection_string: str = None):
+        '''
+        :param max_concurrency: Parallel requests per transfer, defaults to $BLOB_TRANSFER_MAX_CONCURRENCY
+        :param connection_string: Defaults to $AZURE_STORAGE_CONNECTION_STRING
+        '''
+        # The aio client needs aiohttp, only import it when the async service is used
+        from azure.storage.blob.aio import BlobServiceClient
+
+        self.client = BlobServiceClient.from_connection_string(connection_string or get_connection_string(),
+                                                               **TRANSFER_OPTIONS)
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv(BLOB_TRANSFER_MAX_CONCURRENCY_ENV_KEY, BLOB_TRANSFER_MAX_CONCURRENCY))
+        self.max_concurrency = max_concurrency
+
+    async def __aenter__(self) -> "AsyncAzureStorageService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def _blob_client(self, container_name, blob_path):
+        return self.client.get_blob_client(container=container_name, blob=blob_path)
+
+    async def upload_file(self, local_path, container_name, blob_path, remove=True):
+        # The SDK reads the blocks from the file itself, the file is never loaded whole
+        with open(local_path, "rb") as data:
+            await self._blob_client(container_name, blob_path).upload_blob(
+                data, overwrite=True, length=os.fstat(data.fileno()).st_size, max_concurrency=self.max_concurrency)
+        if remove:
+            os.remove(local_path)
+
+    async def download_file(self, container_name, blob_path, local_path):
+        stream = await self._blob_client(container_name, blob_path).download_blob(max_concurrency=self.max_concurrency)
+        with open(local_path, "wb") as file_obj:
+            await stream.readinto(file_obj)
+
+    async def _download_to_buffer(self, container_name, blob_path) -> BytesIO:
+        stream = await self._blob_client(container_name, blob_path).download_blob(max_concurrency=self.max_concurrency)
+        buffer = BytesIO()
+        await stream.readinto(buffer)
+        buffer.seek(0)
+        return buffer
+
+    async def get_blob_as_object(self, container_name, blob_path):
+        buffer = await self._download_to_buffer(container_name, blob_path)
+        # Unpickling a model is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(pickle.loads, buffer.getbuffer())
+
+    async def get_blob_as_dataframe(self, container_name, blob_path):
+        buffer = await self._download_to_buffer(container_name, blob_path)
+        # Parsing is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(pd.read_csv, buffer)
+
+    async def upload_object(self, obj, container_name, blob_path):
+        data = await asyncio.to_thread(pickle.dumps, obj)
+        await self._blob_client(container_name, blob_path).upload_blob(
+            data, overwrite=True, max_concurrency=self.max_concurrency)
+
+    async def blob_exists(self, container_name, blob_path):
+        return await self._blob_client(container_name, blob_path).exists()
+
+    async def get_blob_properties(self, container_name, blob_path):
+        properties = await self._blob_client(container_name, blob_path).get_blob_properties()
+        return {"etag": properties.etag, "last_modified": properties.last_modified}
+
+    async def delete_blob(self, container_name, blob_path):
+        blob_client = self._blob_client(container_name, blob_path)
+        if await blob_client.exists():
+            await blob_client.delete_blob()
@@ -1,18 +1,58 @@
 import os
 import pickle
+import shutil
 from src.configuration.azure_connection import AzureBlobClient
+from src.cloud_storage.blob_cache import BlobCache
+from src.constants import (BLOB_CACHE_DIR, BLOB_CACHE_DIR_ENV_KEY, BLOB_CACHE_MAX_BYTES, BLOB_CACHE_MAX_BYTES_ENV_KEY,
+                           BLOB_TRANSFER_MAX_CONCURRENCY, BLOB_TRANSFER_MAX_CONCURRENCY_ENV_KEY)
 from azure.storage.blob import ContentSettings
 from io import BytesIO, StringIO
 import pandas as pd
 
 class AzureStorageService:
-    def __init__(self):
+    '''
+    Blob Storage helpers used by the pipeline and the serving app.
+
+    Reads of whole blobs (get_blob_as_object, get_blob_as_dataframe, download_file) go through
+    an on-disk BlobCache: a properties request checks the blob's ETag and only a blob that
+    changed since it was cached is downloaded again.
+    Large blobs are uploaded as blocks and downloaded as ranges over max_concurrency parallel
+    connections, straight from/to the file or buffer.
+    See AsyncAzureStorageService for the asyncio variant.
+    '''
+    def __init__(self, cache_dir: str = None, cache_max_bytes: int = None, max_concurrency: int = None):
+        '''
+        :param cache_dir: Blob cache directory, defaults to $BLOB_CACHE_DIR or artifact/blob_cache
+        :param cache_max_bytes: Blob cache size limit, defaults to $BLOB_CACHE_MAX_BYTES, 0 disables the cache
+        :param max_concurrency: Parallel connections per transfer, defaults to $BLOB_TRANSFER_MAX_CONCURRENCY
+        '''
         self.client = AzureBlobClient().blob_service_client
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv(BLOB_TRANSFER_MAX_CONCURRENCY_ENV_KEY, BLOB_TRANSFER_MAX_CONCURRENCY))
+        self.max_concurrency = max_concurrency
+        if cache_dir is None:
+            cache_dir = os.getenv(BLOB_CACHE_DIR_ENV_KEY, BLOB_CACHE_DIR)
+        if cache_max_bytes is None:
+            cache_max_bytes = int(os.getenv(BLOB_CACHE_MAX_BYTES_ENV_KEY, BLOB_CACHE_MAX_BYTES))
+        self.cache = BlobCache(cache_dir, cache_max_bytes) if cache_max_bytes > 0 else None
+
+    def _get_cached_blob_path(self, blob_client) -> str:
+        '''
+        Returns the local path of the blob's current content, downloading it on a cache miss.
+        '''
+        etag = blob_client.get_blob_properties().etag
+        path = self.cache.get(blob_client.container_name, blob_client.blob_name, etag)
+        if path is None:
+            stream = blob_client.download_blob(max_concurrency=self.max_concurrency)
+            # Cached under the ETag of the content actually downloaded, in case the blob changed meanwhile
+            path = self.cache.put(blob_client.container_name, blob_client.blob_name,
+                                  stream.properties.etag, stream.readinto)
+        return path
 
     def upload_file(self, local_path, container_name, blob_path, remove=True):
         blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
         with open(local_path, "rb") as data:
-            blob_client.upload_blob(data, overwrite=True)
+            blob_client.upload_blob(data, overwrite=True, max_concurrency=self.max_concurrency)
         if remove:
             os.remove(local_path)
 
@@ -30,19 +70,48 @@ class AzureStorageService:
         blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
         return blob_client.exists()
 
+    def get_blob_properties(self, container_name, blob_path):
+        blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
+        properties = blob_client.get_blob_properties()
+        return {"etag": properties.etag, "last_modified": properties.last_modified}
+
     def get_blob_as_dataframe(self, container_name, blob_path):
         blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
-        stream = blob_client.download_blob()
-        return pd.read_csv(BytesIO(stream.readall()))
+        if self.cache is not None:
+            return pd.read_csv(self._get_cached_blob_path(blob_client))
+        buffer = BytesIO()
+        blob_client.download_blob(max_concurrency=self.max_concurrency).readinto(buffer)
+        buffer.seek(0)
+        return pd.read_csv(buffer)
 
     def get_blob_as_object(self, container_name, blob_path):
         blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
-        stream = blob_client.download_blob()
-        return pickle.loads(stream.readall())
+        if self.cache is not None:
+            with open(self._get_cached_blob_path(blob_client), "rb") as file_obj:
+                return pickle.load(file_obj)
+        buffer = BytesIO()
+        blob_client.download_blob(max_concurrency=self.max_concurrency).readinto(buffer)
+        return pickle.loads(buffer.getbuffer())
+
+    def download_file(self, container_name, blob_path, local_path):
+        blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
+        if self.cache is not None:
+            shutil.copyfile(self._get_cached_blob_path(blob_client), local_path)
+            return
+        with open(local_path, "wb") as file_obj:
+            blob_client.download_blob(max_concurrency=self.max_concurrency).readinto(file_obj)
+
+    def delete_blob(self, container_name, blob_path):
+        blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
+        if blob_client.exists():
+            blob_client.delete_blob()
 
     def upload_object(self, obj, container_name, blob_path):
         blob_client = self.client.get_blob_client(container=container_name, blob=blob_path)
-        blob_client.upload_blob(pickle.dumps(obj), overwrite=True)
+        blob_client.upload_blob(pickle.dumps(obj), overwrite=True, max_concurrency=self.max_concurrency)
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else None
 
     def list_blobs(self, container_name, prefix=""):
         return self.client.get_container_client(container_name).list_blobs(name_starts_with=prefix)
\ No newline at end of file
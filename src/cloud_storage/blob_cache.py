@@ -0,0 +1,150 @@
+import os
+import hashlib
+import threading
+from typing import Callable, Optional
+
+from src.logger import logging
+
+
+class BlobCache:
+    '''
+    Size-bounded, on-disk read-through cache of blob contents.
+
+    Every cached copy is a file named after the container/blob path and the ETag it was
+    downloaded at, so a lookup for the blob's current ETag can only ever hit the matching
+    content, and a blob that changed on the server is simply a miss. Files are written next to
+    their final name and renamed into place, so concurrent processes sharing the cache directory
+    never read a partial download. The modification time of a file is its last use: hits touch
+    it, and the least recently used files are evicted once the cache grows past max_bytes.
+    '''
+
+    SUFFIX = ".blob"
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        '''
+        :param cache_dir: Directory holding the cached blobs, created on first use
+        :param max_bytes: Total size the cache is trimmed back to after every download, the
+            blob just downloaded excepted
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        self.bytes_downloaded: int = 0
+        self.bytes_served: int = 0
+
+    @staticmethod
+    def _blob_key(container_name: str, blob_path: str) -> str:
+        return hashlib.sha1(f"{container_name}/{blob_path}".encode()).hexdigest()
+
+    def _path(self, container_name: str, blob_path: str, etag: str) -> str:
+        version = hashlib.sha1(etag.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self._blob_key(container_name, blob_path)}-{version}{self.SUFFIX}")
+
+    def get(self, container_name: str, blob_path: str, etag: str) -> Optional[str]:
+        '''
+        Returns the path of the cached copy of the blob at etag, None on a miss.
+        '''
+        path = self._path(container_name, blob_path, etag)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += size
+        return path
+
+    def put(self, container_name: str, blob_path: str, etag: str, write: Callable) -> str:
+        '''
+        Stores a downloaded blob and returns the path of the cached copy.
+        :param write: Called with a binary file object to write the blob content into
+        '''
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(container_name, blob_path, etag)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file_obj:
+                write(file_obj)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            self.bytes_downloaded += os.path.getsize(path)
+        self._remove_other_versions(container_name, blob_path, path)
+        self._evict(keep=path)
+        return path
+
+    def _remove_other_versions(self, container_name: str, blob_path: str, path: str) -> None:
+        prefix = f"{self._blob_key(container_name, blob_path)}-"
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(prefix) and entry.name.endswith(self.SUFFIX) and entry.path != path:
+                if self._remove(entry.path):
+                    with self._lock:
+                        self.invalidations += 1
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _entries(self) -> list:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        '''
+        Deletes the least recently used blobs until the cache fits in max_bytes.
+        A process still reading a deleted blob keeps its open file.
+        :param keep: Blob just stored, never evicted so that its path can be returned. A blob
+            larger than max_bytes is only evicted by the next download.
+        '''
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                with self._lock:
+                    self.evictions += 1
+                logging.info(f"Evicted {path} ({size} bytes) from the blob cache")
+            total_bytes -= size
+
+    def stats(self) -> dict:
+        entries = self._entries() if os.path.isdir(self.cache_dir) else []
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_dir": self.cache_dir,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_served": self.bytes_served,
+            }
@@ -0,0 +1,62 @@
+import os
+import pickle
+import shutil
+from datetime import datetime, timezone
+
+import pandas as pd
+
+
+class LocalStorageService:
+    '''
+    Directory backed stand-in for AzureStorageService.
+
+    Containers are sub-directories of root_dir and blobs are files inside them. The ETag is
+    derived from the file's modification time and size, so overwriting a blob changes it
+    the same way an upload does on Azure.
+    '''
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def _path(self, container_name, blob_path):
+        return os.path.join(self.root_dir, container_name, blob_path)
+
+    def upload_file(self, local_path, container_name, blob_path, remove=True):
+        target = self._path(container_name, blob_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.tmp"
+        shutil.copyfile(local_path, tmp_path)
+        os.replace(tmp_path, target)
+        if remove:
+            os.remove(local_path)
+
+    def blob_exists(self, container_name, blob_path):
+        return os.path.isfile(self._path(container_name, blob_path))
+
+    def get_blob_properties(self, container_name, blob_path):
+        stat = os.stat(self._path(container_name, blob_path))
+        return {
+            "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        }
+
+    def get_blob_as_dataframe(self, container_name, blob_path):
+        return pd.read_csv(self._path(container_name, blob_path))
+
+    def get_blob_as_object(self, container_name, blob_path):
+        with open(self._path(container_name, blob_path), "rb") as file_obj:
+            return pickle.load(file_obj)
+
+    def download_file(self, container_name, blob_path, local_path):
+        shutil.copyfile(self._path(container_name, blob_path), local_path)
+
+    def delete_blob(self, container_name, blob_path):
+        if self.blob_exists(container_name, blob_path):
+            os.remove(self._path(container_name, blob_path))
+
+    def upload_object(self, obj, container_name, blob_path):
+        target = self._path(container_name, blob_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, "wb") as file_obj:
+            pickle.dump(obj, file_obj)
+        os.replace(tmp_path, target)
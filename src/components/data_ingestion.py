@@ -1,4 +1,3 @@
-import os
 import sys
 import pandas as pd
 
@@ -8,20 +7,93 @@ from src.entity.config_entity import DataIngestionConfig
 from src.exception import MyException
 from src.logger import logging
 from src.data_access.proj1_data import Proj1Data
+from src.data_access.feature_store import FeatureStore
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml, save_dataframe, load_dataframe, memory_per_row
+from src.utils.artifact_writer import ArtifactWriter
 
 
 class DataIngestion:
-    def __init__(self, data_ingestion_config: DataIngestionConfig = DataIngestionConfig()):
+    def __init__(self, data_ingestion_config: DataIngestionConfig = DataIngestionConfig(),
+                 artifact_writer: ArtifactWriter = None):
+        '''
+        :param data_ingestion_config: Configuration for data ingestion
+        :param artifact_writer: Persists the train and test sets, defaults to writing them synchronously
+        '''
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_writer = artifact_writer if artifact_writer is not None else ArtifactWriter()
         
         except Exception as e:
             raise MyException(e, sys)
     
+    def update_feature_store(self, my_data: Proj1Data, feature_store: FeatureStore) -> None:
+        '''
+        Method Name:    update_feature_store
+        Description:    This method appends the documents past the stored watermark to the persistent
+                        feature store as a new partition. The whole collection is exported again
+                        instead (full refresh) when requested, on the first run, or when the
+                        watermark field, the collection columns, their schema dtypes or the
+                        feature store format changed since the last run
+
+        On Failure :    write an exception log and then raise an exception
+        '''
+        try:
+            config = self.data_ingestion_config
+            field = config.watermark_field
+            state = feature_store.read_state()
+            columns = my_data.get_columns(config.collection_name)
+            column_types = [{field.name: str(field.type)} for field in my_data.arrow_schema(columns)]
+            if config.full_refresh:
+                reason = 'full refresh requested'
+            elif state is None:
+                reason = 'feature store is empty'
+            elif state['watermark_field'] != field or state['watermark'] is None:
+                reason = f'no {field} watermark stored'
+            elif state.get('format') != feature_store.FILE_FORMAT:
+                reason = 'feature store format changed'
+            elif state['columns'] != column_types:
+                reason = 'collection columns or schema dtypes changed'
+            else:
+                reason = None
+
+            # Only values of one ordered type can be compared against the watermark
+            ordered = {'$or': [{field: {'$type': 'number'}}, {field: {'$type': 'date'}}]}
+            if reason is not None:
+                logging.info(f'Full refresh of the feature store: {reason}')
+                bounds = my_data.field_bounds(config.collection_name, field, query=ordered)
+                watermark = bounds[1] if bounds is not None else None
+                # Documents added while exporting are left to the next run
+                query = {'$nor': [{field: {'$gt': watermark}}]} if watermark is not None else None
+            else:
+                bounds = my_data.field_bounds(config.collection_name, field,
+                                              query={'$and': [ordered, {field: {'$gt': state['watermark']}}]})
+                if bounds is None:
+                    logging.info(f'No documents past the {field} watermark {state["watermark"]}')
+                    return
+                watermark = bounds[1]
+                logging.info(f'Incremental ingestion of {field} in ({state["watermark"]}, {watermark}]')
+                query = {field: {'$gt': state['watermark'], '$lte': watermark}}
+
+            partition_path = feature_store.new_partition_path()
+            n_rows = my_data.export_collection_to_parquet(collection_name=config.collection_name,
+                                                          file_path=partition_path,
+                                                          batch_size=config.export_batch_size,
+                                                          n_workers=config.export_workers,
+                                                          query=query, columns=columns)
+            feature_store.add_partition(partition_path, n_rows, field, watermark, column_types, replace=reason is not None)
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def export_data_into_feature_store(self) -> pd.DataFrame:
         '''
         Method Name:    export_data_into_feature_store
-        Description:    This method exports data from mongodb to csv file
+        Description:    This method brings the persistent feature store up to date with mongodb,
+                        streaming only the new documents in batches over parallel id-range
+                        partitions, then writes the consolidated view of all its partitions to
+                        the feature store parquet file of this run and loads it as a dataframe
+                        typed by the schema
         
         Output     :    data is returned as a artifact of data ingestion components
         On Failure :    write an exception log and then raise an exception
@@ -30,24 +102,26 @@ class DataIngestion:
         try:
             logging.info(f'Exporting data from mongodb')
             my_data = Proj1Data()
-            dataframe = my_data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
-            logging.info(f'Shape of dataframe: {dataframe.shape}')
+            feature_store = FeatureStore(self.data_ingestion_config.feature_store_root)
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-            logging.info(f'Saving exported data into feature store file path: {feature_store_file_path}')
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            with feature_store.lock():
+                self.update_feature_store(my_data, feature_store)
+                logging.info(f'Consolidating the feature store into: {feature_store_file_path}')
+                n_rows = feature_store.consolidate(feature_store_file_path)
+            logging.info(f'Feature store holds {n_rows} rows')
+            dataframe = load_dataframe(feature_store_file_path, schema_config=read_yaml(SCHEMA_FILE_PATH))
+            logging.info(f'Shape of dataframe: {dataframe.shape}, {memory_per_row(dataframe):.1f} bytes per row in memory')
             return dataframe
         
         except Exception as e:
             raise MyException(e, sys) from e
         
-    def split_data_as_train_test(self, dataframe : pd.DataFrame) -> None:
+    def split_data_as_train_test(self, dataframe : pd.DataFrame) -> tuple:
         '''
         Method Name     :       split_data_as_train_test
         Description     :       This method splits the dataframe into train set and test set based on split ratio
         
-        Output          :       Folder is created in blob bucket
+        Output          :       Returns the train set and test set, handed to the artifact writer
         On Failure      :       Write and exception log and then raise an exception
         '''
         logging.info('Entered split_data_as_train_test method of Data_Ingestion class')
@@ -57,14 +131,12 @@ class DataIngestion:
             logging.info('Performed train test split on the dataframe')
             logging.info('Exited split_data_as_train_test method of Data_Ingestion class')
             
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-            
             logging.info(f'Exporting train and test file path.')
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index = False, header = True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index = False, header = True)
+            self.artifact_writer.save(save_dataframe, self.data_ingestion_config.training_file_path, train_set)
+            self.artifact_writer.save(save_dataframe, self.data_ingestion_config.testing_file_path, test_set)
             
             logging.info(f'Exported train and test file path.')
+            return train_set, test_set
             
         except Exception as e:
             raise MyException(e, sys)
@@ -84,12 +156,15 @@ class DataIngestion:
             
             logging.info('Got the data from mongodb')
             
-            self.split_data_as_train_test(dataframe=dataframe)
+            train_set, test_set = self.split_data_as_train_test(dataframe=dataframe)
+            del dataframe
             
             logging.info('Performed train test split on the dataset')
             logging.info('Exited initiate_data_ingestion method of Data_Ingestion class')
             
             data_ingestion_artifact = DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path, test_file_path=self.data_ingestion_config.testing_file_path)
+            if self.artifact_writer.in_memory:
+                data_ingestion_artifact.train_df, data_ingestion_artifact.test_df = train_set, test_set
             
             logging.info(f'Data ingestion artifact: {data_ingestion_artifact}')
             return data_ingestion_artifact
@@ -13,27 +13,31 @@ from src.entity.artifact_entity import DataTransformationArtifact, DataIngestion
 from src.exception import MyException
 from src.logger import logging
 from src.utils.main_utils import *
+from src.utils.artifact_writer import ArtifactWriter
 
 
 class DataTransformation:
     def __init__(self, data_ingestion_artifact : DataIngestionArtifact,
                  data_transformation_config : DataTransformationArtifact,
-                 data_validation_artifact : DataValidationArtifact):
+                 data_validation_artifact : DataValidationArtifact,
+                 artifact_writer : ArtifactWriter = None):
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_transformation_config = data_transformation_config
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_writer = artifact_writer if artifact_writer is not None else ArtifactWriter()
             self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
         
         except Exception as e:
             raise MyException(e, sys) from e
     @staticmethod   
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns : list = None, schema_config : dict = None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path, columns=columns, schema_config=schema_config)
         
         except Exception as e:
             raise MyException(e, sys) from e
+
         
     
     def get_data_transformer_object(self) -> Pipeline:
@@ -114,6 +118,16 @@ class DataTransformation:
         except Exception as e:
             raise MyException(e, sys) from e
     
+    def _widen_float_columns(self, df : pd.DataFrame) -> pd.DataFrame:
+        ''' Cast float32 columns to float64, the scalers are fitted and applied in float64. '''
+        try:
+
+            logging.info('Casting float32 columns to float64')
+            return df.astype({column: np.float64 for column in df.columns if df[column].dtype == np.float32})
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def _drop_id_column(self, df : pd.DataFrame) -> pd.DataFrame:
         ''' Drop the "id" column if it exists. '''
         try:
@@ -138,9 +152,16 @@ class DataTransformation:
             # if not self.data_validation_artifact.validation_status:
             #     raise Exception(self.data_validation_artifact.message)
             
-            # Load train and test data
-            train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path)
+            # Load the model input and target columns of the train and test data
+            columns = self._schema_config['numerical_columns'] + self._schema_config['categorical_columns']
+            if self.data_ingestion_artifact.train_df is not None:
+                train_df = select_columns(self.data_ingestion_artifact.train_df, columns)
+                test_df = select_columns(self.data_ingestion_artifact.test_df, columns)
+            else:
+                train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path,
+                                          columns=columns, schema_config=self._schema_config)
+                test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path,
+                                         columns=columns, schema_config=self._schema_config)
             logging.info('Train-Test data loaded.')
             
             input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
@@ -156,11 +177,13 @@ class DataTransformation:
             input_feature_train_df = self._drop_id_column(input_feature_train_df)
             input_feature_train_df = self._create_dummy_columns(input_feature_train_df)
             input_feature_train_df = self._rename_columns(input_feature_train_df)
+            input_feature_train_df = self._widen_float_columns(input_feature_train_df)
             
             input_feature_test_df = self._map_gender_column(input_feature_test_df)
             input_feature_test_df = self._drop_id_column(input_feature_test_df)
             input_feature_test_df = self._create_dummy_columns(input_feature_test_df)
             input_feature_test_df = self._rename_columns(input_feature_test_df)
+            input_feature_test_df = self._widen_float_columns(input_feature_test_df)
             logging.info('Custom transformation applied Successfully 😊😊')
             
             logging.info('Starting data transformation')
@@ -187,17 +210,24 @@ class DataTransformation:
             test_arr = np.c_[input_feature_test_final, np.array(target_feature_test_final)]
             logging.info('feature target concatenation done for train-test df.')
             
-            save_object(self.data_transformation_config.transformed_object_file_path, preprocessior)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array = train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array = test_arr)
+            self.artifact_writer.save(save_object, self.data_transformation_config.transformed_object_file_path, preprocessior)
+            self.artifact_writer.save(save_numpy_array_data, self.data_transformation_config.transformed_train_file_path, train_arr)
+            self.artifact_writer.save(save_numpy_array_data, self.data_transformation_config.transformed_test_file_path, test_arr)
+            self.artifact_writer.save(save_dataframe, self.data_transformation_config.test_features_file_path, input_feature_test_df)
             logging.info('Saving transformation object and transformed files.')
             
             logging.info('Data transformation completed successfully')
-            return DataTransformationArtifact(
+            data_transformation_artifact = DataTransformationArtifact(
                 transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+                test_features_file_path=self.data_transformation_config.test_features_file_path
             )
+            if self.artifact_writer.in_memory:
+                data_transformation_artifact.preprocessing_object = preprocessior
+                data_transformation_artifact.train_arr, data_transformation_artifact.test_arr = train_arr, test_arr
+                data_transformation_artifact.test_features = input_feature_test_df
+            return data_transformation_artifact
             
         except Exception as e:
             raise MyException(e, sys) from e
\ No newline at end of file
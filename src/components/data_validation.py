@@ -9,13 +9,16 @@ from src.logger import logging
 from src.utils.main_utils import *
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.entity.config_entity import DataValidationConfig
+from src.data_access.proj1_data import Proj1Data
+from src.utils.validation_engine import ValidationEngine
 from src.constants import *
 
 
 class DataValidation:
     def __init__(self, data_ingestion_artifact : DataIngestionArtifact, data_validation_config : DataValidationConfig):
         '''
-        :param data_ingestion_artifact: Output reference of data ingestion artifact stage
+        :param data_ingestion_artifact: Output reference of data ingestion artifact stage, None to
+                                        validate the collection before it is ingested
         :param data_validation_config: Configuration for data validation
         '''
         try:
@@ -77,10 +80,116 @@ class DataValidation:
             raise MyException(e, sys) from e
         
     
+    def validate_collection_statistics(self, statistics : dict) -> str:
+        '''
+        Method Name:    validate_collection_statistics
+        Description:    This method checks the statistics MongoDB computed on the collection against
+                        the schema: the collection has documents, every schema column is present,
+                        numerical columns only hold numbers or 'na', categorical values are within
+                        categorical_domains, the target column has at least two classes and the
+                        validation_rules.unique columns have no duplicates
+
+        Output     :    Returns the validation error message, empty when the collection is valid
+        On Failure :    Write an exception log and then raise an exception
+        '''
+        try:
+            rows = statistics['rows']
+            if rows == 0:
+                return 'Collection has no documents. '
+
+            validation_error_msg = ''
+            domains = self._schema_config.get('categorical_domains', {})
+            for column, column_statistics in statistics['columns'].items():
+                if column_statistics['missing'] == rows:
+                    validation_error_msg += f'Column {column} is missing from every document. '
+                    continue
+                if column_statistics.get('invalid'):
+                    validation_error_msg += f'Column {column} has {column_statistics["invalid"]} non-numeric values. '
+                if 'values' in column_statistics and column in domains:
+                    unknown = sorted(set(column_statistics['values']) - {str(value) for value in domains[column]})
+                    if unknown:
+                        validation_error_msg += f'Column {column} has values outside its domain: {unknown}. '
+
+            if len(statistics['class_balance']) < 2:
+                validation_error_msg += f'Target column {TARGET_COLUMN} has fewer than two classes. '
+            for column, duplicates in statistics.get('duplicates', {}).items():
+                if duplicates['violations']:
+                    validation_error_msg += (f'Column {column} has {duplicates["duplicated_values"]} duplicated values '
+                                             f'in {duplicates["violations"]} extra documents. ')
+            return validation_error_msg
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def validate_values(self, sources : dict) -> tuple:
+        '''
+        Method Name:    validate_values
+        Description:    This method checks the value rules compiled from the schema (null rates,
+                        ranges, allowed categories) on every dataset of sources
+                        ({name: parquet file or dataframe}), each in a single chunked pass
+
+        Output     :    Returns the validation error message and the report of every dataset
+        On Failure :    Write an exception log and then raise an exception
+        '''
+        try:
+            engine = ValidationEngine(self._schema_config, chunk_rows=self.data_validation_config.chunk_rows)
+            reports = engine.run_all(sources, parallel=self.data_validation_config.parallel_splits)
+            validation_error_msg = ''
+            for name, report in reports.items():
+                failed = [f'{result["rule"]} of {result["column"]} ({result["violations"]} rows)'
+                          for result in report['rules'] if not result['passed']]
+                if failed:
+                    validation_error_msg += f'Value rules failed in {name} dataframe: {", ".join(failed)}. '
+            return validation_error_msg, reports
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _write_report(self, validation_report : dict) -> None:
+        # Ensure the directory for validation_report_file_path exists
+        report_dir = os.path.dirname(self.data_validation_config.validation_report_file_path)
+        os.makedirs(report_dir, exist_ok=True)
+
+        with open(self.data_validation_config.validation_report_file_path, 'w') as report_file:
+            json.dump(validation_report, report_file, indent = 4)
+
+    def initiate_collection_validation(self) -> DataValidationArtifact:
+        '''
+        Method Name     :      initiate_collection_validation
+        Description     :      This method validates the collection before data ingestion exports it.
+                               The per-column statistics are computed by MongoDB aggregations and
+                               written into the validation report, no document is transferred
+
+        Output          :      Returns the validation artifact, rejected when the statistics break the schema
+        On Failure      :      Write an exception log and then raise an exception
+        '''
+        try:
+            logging.info('Starting collection validation')
+            statistics = Proj1Data().collection_statistics(self.data_validation_config.collection_name)
+            logging.info(f'Collection statistics of {statistics["rows"]} documents computed by MongoDB')
+
+            validation_error_msg = self.validate_collection_statistics(statistics)
+            validation_status = len(validation_error_msg) == 0
+            data_validation_artifact = DataValidationArtifact(
+                validation_status=validation_status,
+                message=validation_error_msg,
+                validation_report_file_path=self.data_validation_config.validation_report_file_path
+            )
+            self._write_report({
+                'validation_status' : validation_status,
+                'message' : validation_error_msg.strip(),
+                'collection_statistics' : statistics
+            })
+            logging.info(f'Collection validation artifact: {data_validation_artifact}')
+            return data_validation_artifact
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns : list = None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path, columns=columns)
         except Exception as e:
             raise MyException(e, sys) from e
         
@@ -98,8 +207,15 @@ class DataValidation:
             validation_error_msg = ''
             logging.info('Starting data validation')
             
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
+            if self.data_ingestion_artifact.train_df is not None:
+                train_df, test_df = self.data_ingestion_artifact.train_df, self.data_ingestion_artifact.test_df
+                sources = {'train': train_df, 'test': test_df}
+            else:
+                # The columns are validated on the schemas of the files, the values are streamed in chunks
+                train_df, test_df = (load_dataframe_schema(file_path=self.data_ingestion_artifact.trained_file_path),
+                                     load_dataframe_schema(file_path=self.data_ingestion_artifact.test_file_path))
+                sources = {'train': self.data_ingestion_artifact.trained_file_path,
+                           'test': self.data_ingestion_artifact.test_file_path}
             
             # Checking col len of dataframe for train/test df
             status = self.validate_number_of_columns(dataframe=train_df)
@@ -126,6 +242,10 @@ class DataValidation:
                 validation_error_msg += f'Columns are missing in test dataframe: {status}'
             else:
                 logging.info(f'All categorical/int columns present in test dataframe: {status}')
+
+            # Checking the values of train/test df against the rules of the schema
+            values_error_msg, value_reports = self.validate_values(sources)
+            validation_error_msg += values_error_msg
                 
             validation_status = len(validation_error_msg) == 0
             
@@ -135,18 +255,20 @@ class DataValidation:
                 validation_report_file_path=self.data_validation_config.validation_report_file_path
             )
             
-            # Ensure the directory for validation_report_file_path exists
-            report_dir = os.path.dirname(self.data_validation_config.validation_report_file_path)
-            os.makedirs(report_dir, exist_ok=True)
-            
             # Save validation status and message to a JSON file
             validation_report = {
                 'validation_status' : validation_status,
-                'message' : validation_error_msg.strip()
+                'message' : validation_error_msg.strip(),
+                'value_checks' : value_reports
             }
-            
-            with open(self.data_validation_config.validation_report_file_path, 'w') as report_file:
-                json.dump(validation_report, report_file, indent = 4)
+            # Keep the statistics of the collection validation that ran before ingestion
+            report_file_path = self.data_validation_config.validation_report_file_path
+            if os.path.exists(report_file_path):
+                with open(report_file_path) as report_file:
+                    previous_report = json.load(report_file)
+                if 'collection_statistics' in previous_report:
+                    validation_report['collection_statistics'] = previous_report['collection_statistics']
+            self._write_report(validation_report)
                 
             logging.info('Data validation artifact created and saved to JSON file.')
             logging.info(f'Data validation artifact: {data_validation_artifact}')
@@ -2,10 +2,11 @@ from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.artifact_entity import ModelTrainerArtifact, DataIngestionArtifact, ModelEvaluationArtifact
 from sklearn.metrics import f1_score
 from src.exception import MyException
-from src.constants import TARGET_COLUMN
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
 from src.logger import logging
-from src.utils.main_utils import load_object
+from src.utils.main_utils import load_object, load_dataframe, read_yaml, select_columns
 import sys
+import numpy as np
 import pandas as pd
 from typing import Optional
 from src.entity.azure_estimator import Proj1Estimator
@@ -24,6 +25,7 @@ class ModelEvaluation:
         self.model_eval_config = model_eval_config
         self.data_ingestion_artifact = data_ingestion_artifact
         self.model_trainer_artifact = model_trainer_artifact
+        self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
 
     def get_best_model(self) -> Optional[Proj1Estimator]:
         try:
@@ -58,17 +60,29 @@ class ModelEvaluation:
             df = df.drop("_id", axis=1)
         return df
 
+    def _widen_float_columns(self, df):
+        # The preprocessor was fitted on float64, float32 inputs would be scaled in float32
+        return df.astype({column: np.float64 for column in df.columns if df[column].dtype == np.float32})
+
     def evaluate_model(self) -> EvaluateModelResponse:
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            columns = self._schema_config['numerical_columns'] + self._schema_config['categorical_columns']
+            if self.data_ingestion_artifact.test_df is not None:
+                test_df = select_columns(self.data_ingestion_artifact.test_df, columns)
+            else:
+                test_df = load_dataframe(self.data_ingestion_artifact.test_file_path, columns=columns,
+                                         schema_config=self._schema_config)
             x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
 
             x = self._map_gender_column(x)
             x = self._drop_id_column(x)
             x = self._create_dummy_columns(x)
             x = self._rename_columns(x)
+            x = self._widen_float_columns(x)
 
-            trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
+            trained_model = self.model_trainer_artifact.trained_model
+            if trained_model is None:
+                trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
             trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
 
             best_model_f1_score = None
@@ -96,6 +110,7 @@ class ModelEvaluation:
                 is_model_accepted=evaluate_model_response.is_model_accepted,
                 s3_model_path=self.model_eval_config.s3_model_key_path,
                 trained_model_path=self.model_trainer_artifact.trained_model_file_path,
+                compiled_model_path=self.model_trainer_artifact.compiled_model_file_path,
                 changed_accuracy=evaluate_model_response.difference
             )
             logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
@@ -13,16 +13,21 @@ class ModelPusher:
         self.model_pusher_config = model_pusher_config
         self.proj1_estimator = Proj1Estimator(
             container_name=model_pusher_config.bucket_name,
-            model_path=model_pusher_config.s3_model_key_path
+            model_path=model_pusher_config.s3_model_key_path,
+            compiled_model_path=model_pusher_config.compiled_model_key_path
         )
 
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         try:
             logging.info("Uploading new model to Azure Blob Storage...")
+            # Serving reloads when the pickle changes, so the compiled model has to be in place first
+            compiled_model_path = self.model_evaluation_artifact.compiled_model_path
+            self.proj1_estimator.save_compiled_model(from_file=compiled_model_path)
             self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
             model_pusher_artifact = ModelPusherArtifact(
                 bucket_name=self.model_pusher_config.bucket_name,
-                s3_model_path=self.model_pusher_config.s3_model_key_path
+                s3_model_path=self.model_pusher_config.s3_model_key_path,
+                compiled_model_path=self.model_pusher_config.compiled_model_key_path if compiled_model_path else None
             )
             logging.info(f"Model pusher artifact: [{model_pusher_artifact}]")
             return model_pusher_artifact
@@ -2,25 +2,30 @@ import sys
 from typing import Tuple
 
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import load_numpy_array_data, load_object, save_object
+from src.utils.main_utils import load_numpy_array_data, load_object, save_object, load_dataframe
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.compiled_estimator import CompiledForestModel
+from src.utils.artifact_writer import ArtifactWriter
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
-                 model_trainer_config: ModelTrainerConfig):
+                 model_trainer_config: ModelTrainerConfig, artifact_writer: ArtifactWriter = None):
         """
         :param data_transformation_artifact: Output reference of data transformation artifact stage
         :param model_trainer_config: Configuration for model training
+        :param artifact_writer: Persists the model files, defaults to writing them synchronously
         """
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.artifact_writer = artifact_writer if artifact_writer is not None else ArtifactWriter()
 
     def get_model_object_and_report(self, train: np.array, test: np.array) -> Tuple[object, object]:
         """
@@ -66,6 +71,32 @@ class ModelTrainer:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def export_compiled_model(self, my_model: MyModel, test_features: pd.DataFrame) -> CompiledForestModel:
+        """
+        Method Name :   export_compiled_model
+        Description :   Flattens the scalers and trees of the saved model into contiguous arrays and checks
+                        that the compiled scorer reproduces MyModel.predict exactly on the unscaled test
+                        features, scaling included
+        
+        Output      :   Returns the compiled model, saved next to the trained model
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Exporting compiled flat-array model")
+            compiled_model = CompiledForestModel.from_model(my_model)
+
+            mismatches = int(np.count_nonzero(compiled_model.predict(test_features) != my_model.predict(test_features)))
+            if mismatches:
+                raise Exception(f"Compiled model predictions differ from the trained model on {mismatches} "
+                                f"of {len(test_features)} test rows")
+
+            self.artifact_writer.save(compiled_model.save, self.model_trainer_config.compiled_model_file_path, required=True)
+            logging.info(f"Compiled model verified on {len(test_features)} test rows and saved")
+            return compiled_model
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -79,8 +110,11 @@ class ModelTrainer:
             print("------------------------------------------------------------------------------------------------")
             print("Starting Model Trainer Component")
             # Load transformed train and test data
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            if self.data_transformation_artifact.train_arr is not None:
+                train_arr, test_arr = self.data_transformation_artifact.train_arr, self.data_transformation_artifact.test_arr
+            else:
+                train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
+                test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
             logging.info("train-test data loaded")
             
             # Train model and get metrics
@@ -88,7 +122,9 @@ class ModelTrainer:
             logging.info("Model object and artifact loaded.")
             
             # Load preprocessing object
-            preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj = self.data_transformation_artifact.preprocessing_object
+            if preprocessing_obj is None:
+                preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
             logging.info("Preprocessing obj loaded.")
 
             # Check if the model's accuracy meets the expected threshold
@@ -99,13 +135,21 @@ class ModelTrainer:
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performace is better than previous one.")
             my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path, my_model)
+            self.artifact_writer.save(save_object, self.model_trainer_config.trained_model_file_path, my_model, required=True)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
+            # Export the flat-array scorer used on the serving path
+            test_features = self.data_transformation_artifact.test_features
+            if test_features is None:
+                test_features = load_dataframe(self.data_transformation_artifact.test_features_file_path)
+            self.export_compiled_model(my_model=my_model, test_features=test_features)
+
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path = self.model_trainer_config.trained_model_file_path,
                 metric_artifact = metric_artifact,
+                compiled_model_file_path = self.model_trainer_config.compiled_model_file_path,
+                trained_model = my_model if self.artifact_writer.in_memory else None,
             )
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             print("ModelTrainerArtifact:", model_trainer_artifact)
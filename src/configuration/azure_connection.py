@@ -1,14 +1,34 @@
 from azure.storage.blob import BlobServiceClient
+from src.constants import (AZURE_STORAGE_CONNECTION_STRING_KEY, BLOB_TRANSFER_BLOCK_BYTES, BLOB_TRANSFER_CHUNK_BYTES, BLOB_TRANSFER_SINGLE_GET_BYTES,
+                           BLOB_TRANSFER_SINGLE_PUT_BYTES)
 import os
+import logging
+
+# The SDK logs every HTTP request and response at INFO, a chunked transfer makes dozens of them
+logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
+
+# Sizes above which the SDK splits uploads into blocks and downloads into ranges
+TRANSFER_OPTIONS = {
+    "max_single_put_size": BLOB_TRANSFER_SINGLE_PUT_BYTES,
+    "max_block_size": BLOB_TRANSFER_BLOCK_BYTES,
+    "max_single_get_size": BLOB_TRANSFER_SINGLE_GET_BYTES,
+    "max_chunk_get_size": BLOB_TRANSFER_CHUNK_BYTES,
+}
+
+
+def get_connection_string() -> str:
+    conn_str = os.getenv(AZURE_STORAGE_CONNECTION_STRING_KEY)
+    if not conn_str:
+        raise Exception("AZURE_STORAGE_CONNECTION_STRING not set in environment.")
+    return conn_str
+
 
 class AzureBlobClient:
     blob_service_client = None
 
     def __init__(self):
         if AzureBlobClient.blob_service_client is None:
-            conn_str = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-            if not conn_str:
-                raise Exception("AZURE_STORAGE_CONNECTION_STRING not set in environment.")
-            AzureBlobClient.blob_service_client = BlobServiceClient.from_connection_string(conn_str)
+            AzureBlobClient.blob_service_client = BlobServiceClient.from_connection_string(get_connection_string(),
+                                                                                           **TRANSFER_OPTIONS)
 
-        self.blob_service_client = AzureBlobClient.blob_service_client
\ No newline at end of file
+        self.blob_service_client = AzureBlobClient.blob_service_client
@@ -24,12 +24,12 @@ class MongoDBClient:
 
                 # Establish a new MongoDB client connection
                 MongoDBClient.client = pymongo.MongoClient(mongo_db_url, tlsCAFile = ca)
-                
-                # Use the shared MongoClient for this instance
-                self.client = MongoDBClient.client
-                self.database = self.client[database_name]
-                self.database_name = database_name
                 logging.info('MongoDB connection successful.')
+
+            # Every instance uses the shared MongoClient
+            self.client = MongoDBClient.client
+            self.database = self.client[database_name]
+            self.database_name = database_name
                 
                 
         except Exception as e:
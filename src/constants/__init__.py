@@ -7,18 +7,28 @@ DATABASE_NAME = 'Proj1'
 COLLECTION_NAME = 'Proj1_Data'
 MONGODB_URL_KEY = 'MONGODB_URL'
 
+# For Azure Blob Storage connection
+AZURE_STORAGE_CONNECTION_STRING_KEY = 'AZURE_STORAGE_CONNECTION_STRING'
+
 PIPELINE_NAME: str = ''
 ARTIFACT_DIR: str = 'artifact'
+# sync: stages reload artifacts from disk, async: hand-off in memory and write in the background,
+# deferred: hand-off in memory and only write the model files unless persisting is requested
+PIPELINE_ARTIFACT_PERSISTENCE_ENV_KEY = 'PIPELINE_ARTIFACT_PERSISTENCE'
+PIPELINE_ARTIFACT_PERSISTENCE: str = 'async'
+PIPELINE_ARTIFACT_WRITER_WORKERS: int = 2
 
 MODEL_FILE_NAME = 'model.pkl'
+# Flat-array model pushed next to the pickle, served without unpickling or scikit-learn
+MODEL_COMPILED_FILE_NAME = 'model_compiled.bin'
 
 TARGET_COLUMN = 'Response'
 CURRENT_YEAR = datetime.today().year
 PREPROCESSING_OBJECT_FILE_NAME = 'preprocessing.pkl'
 
-FILE_NAME: str = 'data.csv'
-TRAIN_FILE_NAME: str = 'train.csv'
-TEST_FILE_NAME: str = 'test.csv'
+FILE_NAME: str = 'data.parquet'
+TRAIN_FILE_NAME: str = 'train.parquet'
+TEST_FILE_NAME: str = 'test.parquet'
 SCHEMA_FILE_PATH = os.path.join('config', 'schema.yaml')
 
 
@@ -35,6 +45,23 @@ DATA_INGESTION_DIR_NAME: str = 'data_ingestion'
 DATA_INGESTION_FEATURE_STORE_DIR: str = 'feature_store'
 DATA_INGESTION_INGESTED_DIR: str = 'ingested'
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+# Documents fetched and converted per chunk of the streaming export
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10000
+# Schema columns never exported, left out of the MongoDB projection with the `_id` key
+DATA_INGESTION_EXCLUDED_FIELDS: list = ['_id', 'id']
+# Numeric field the collection is split into ranges of for the parallel export
+DATA_INGESTION_PARTITION_FIELD: str = 'id'
+DATA_INGESTION_EXPORT_WORKERS_ENV_KEY = 'DATA_INGESTION_EXPORT_WORKERS'
+DATA_INGESTION_EXPORT_WORKERS: int = 4
+# Feature store kept across training runs, each run only appends the documents past the watermark
+DATA_INGESTION_FEATURE_STORE_ROOT_ENV_KEY = 'DATA_INGESTION_FEATURE_STORE_ROOT'
+DATA_INGESTION_FEATURE_STORE_ROOT: str = os.path.join(ARTIFACT_DIR, 'feature_store')
+DATA_INGESTION_FEATURE_STORE_STATE_FILE_NAME: str = 'watermark.yaml'
+DATA_INGESTION_FEATURE_STORE_PARTITION_DIR: str = 'partitions'
+# Numeric or date field that grows with every new document, e.g. the id or an update timestamp
+DATA_INGESTION_WATERMARK_FIELD: str = 'id'
+# Set to 1 to re-export the whole collection instead of the documents past the watermark
+DATA_INGESTION_FULL_REFRESH_ENV_KEY = 'DATA_INGESTION_FULL_REFRESH'
 
 
 '''
@@ -42,6 +69,12 @@ Data Validation related content starts with DATA_VALIDATION var name.
 '''
 DATA_VALIDATION_DIR_NAME: str = 'data_validation'
 DATA_VALIDATION_REPORT_FILE_NAME: str = 'report.yaml'
+# Set to 0 to skip the statistics computed on the collection by MongoDB before the export
+DATA_VALIDATION_COLLECTION_STATISTICS_ENV_KEY = 'DATA_VALIDATION_COLLECTION_STATISTICS'
+# Rows checked per chunk by the value rules, memory use of data validation grows with it
+DATA_VALIDATION_CHUNK_ROWS: int = 100000
+# Validate the train and test splits concurrently, only worth it with more than one CPU
+DATA_VALIDATION_PARALLEL_SPLITS: bool = (os.cpu_count() or 1) > 1
 
 '''
 Data Transformation related constant start with DATA_TRANSFORMATION var name.
@@ -49,6 +82,8 @@ Data Transformation related constant start with DATA_TRANSFORMATION var name.
 DATA_TRANSFORMATION_DIR_NAME: str = 'data_transformation'
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = 'transformed'
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = 'transformed_object'
+# Test features after the custom steps and before scaling, the compiled model is checked on them
+DATA_TRANSFORMATION_TEST_FEATURES_FILE_NAME: str = 'test_features.parquet'
 
 '''
 MODEL TRAINER related constant start with MODEL_TRAINER var name.
@@ -56,6 +91,7 @@ MODEL TRAINER related constant start with MODEL_TRAINER var name.
 MODEL_TRAINER_DIR_NAME: str = 'model_trainer'
 MODEL_TRAINER_TRAINED_MODEL_DIR: str = 'trained_model'
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = 'model.pkl'
+MODEL_TRAINER_COMPILED_MODEL_NAME: str = MODEL_COMPILED_FILE_NAME
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join('config','model.yaml')
 MODEL_TRAINER_N_ESTIMATOR: int = 200
@@ -72,6 +108,58 @@ MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.2
 MODEL_BUCKET_NAME: str = 'my-model-mlopsproj'
 MODEL_PUSHER_BLOB_KEY: str = 'East US'
 
+'''
+Model serving related constants start with MODEL_SERVING var name.
+'''
+MODEL_SERVING_RELOAD_INTERVAL_SECONDS: float = 60.0
+MODEL_SERVING_MAX_BATCH_ROWS: int = 10000
+MODEL_SERVING_BULK_CHUNK_ROWS: int = 10000
+MODEL_SERVING_BULK_SPOOL_BYTES: int = 16 * 1024 * 1024
+MODEL_SERVING_BATCH_MAX_WAIT_MS: float = 2.0
+MODEL_SERVING_BATCH_MAX_SIZE: int = 64
+MODEL_SERVING_BATCH_MAX_QUEUE_DEPTH: int = 1024
+MODEL_SERVING_EXECUTOR_KIND: str = 'thread'
+MODEL_SERVING_EXECUTOR_MAX_WORKERS: int = 4
+MODEL_SERVING_EXECUTOR_MAX_QUEUE: int = 16
+MODEL_SERVING_CACHE_MAX_ENTRIES: int = 10000
+MODEL_SERVING_CACHE_TTL_SECONDS: float = 300.0
+MODEL_SERVING_WORKERS_ENV_KEY = 'MODEL_SERVING_WORKERS'
+MODEL_SERVING_SHARED_MODEL_DIR_ENV_KEY = 'MODEL_SERVING_SHARED_MODEL_DIR'
+MODEL_SERVING_SHARED_MODEL_DIR: str = '/dev/shm/vehicle_model' if os.path.isdir('/dev/shm') else os.path.join(ARTIFACT_DIR, 'shared_model')
+MODEL_FEATURE_COLUMNS: list = ['Gender', 'Age', 'Driving_License', 'Region_Code', 'Previously_Insured',
+                               'Annual_Premium', 'Policy_Sales_Channel', 'Vintage', 'Vehicle_Age_It_1_Year',
+                               'Vehicle_Age_gt_2_Years', 'Vehicle_Damage_Yes']
+
+'''
+Blob cache related constants start with BLOB_CACHE var name.
+'''
+BLOB_CACHE_DIR_ENV_KEY = 'BLOB_CACHE_DIR'
+BLOB_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, 'blob_cache')
+# 0 disables the cache
+BLOB_CACHE_MAX_BYTES_ENV_KEY = 'BLOB_CACHE_MAX_BYTES'
+BLOB_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+'''
+Blob transfer related constants start with BLOB_TRANSFER var name.
+Blobs larger than the single put/get sizes move as blocks/ranges over parallel connections.
+'''
+BLOB_TRANSFER_MAX_CONCURRENCY_ENV_KEY = 'BLOB_TRANSFER_MAX_CONCURRENCY'
+BLOB_TRANSFER_MAX_CONCURRENCY: int = 8
+BLOB_TRANSFER_SINGLE_PUT_BYTES: int = 8 * 1024 * 1024
+BLOB_TRANSFER_BLOCK_BYTES: int = 4 * 1024 * 1024
+BLOB_TRANSFER_SINGLE_GET_BYTES: int = 4 * 1024 * 1024
+BLOB_TRANSFER_CHUNK_BYTES: int = 4 * 1024 * 1024
+
+'''
+Training job related constants start with TRAINING_JOB var name.
+'''
+TRAINING_RUN_ID_ENV_KEY = 'TRAINING_RUN_ID'
+TRAINING_JOB_DIR_NAME: str = 'training_jobs'
+TRAINING_JOB_LOCK_FILE_NAME: str = 'training.lock'
+TRAINING_JOB_LOG_FILE_NAME: str = 'training_job.log'
+TRAINING_JOB_NICE_INCREMENT: int = 10
+TRAINING_JOB_CANCEL_GRACE_SECONDS: float = 30.0
+
 
 APP_HOST = '0.0.0.0'
 APP_PORT = 5000
\ No newline at end of file
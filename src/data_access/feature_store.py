@@ -0,0 +1,141 @@
+import os
+import sys
+import fcntl
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from src.constants import DATA_INGESTION_FEATURE_STORE_STATE_FILE_NAME, DATA_INGESTION_FEATURE_STORE_PARTITION_DIR
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml, write_yaml_file, concat_parquet_files
+
+
+class FeatureStore:
+    '''
+    Feature store that persists across training runs and is appended to one partition per run.
+
+    Layout of root_dir:
+        watermark.yaml              state: watermark field and value, columns and the list of partitions
+        partitions/part-N.parquet   one Parquet file per ingestion, all with the same typed columns
+
+    The state file is the only source of truth. A partition is moved into place before the state
+    listing it is written, and the state is replaced atomically, so a run that fails half way
+    leaves at worst an unlisted file behind and the store keeps its previous content. Callers hold
+    lock() around a read-modify-write of the store.
+    '''
+
+    FILE_FORMAT = 'parquet'
+
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+        self.state_file_path = os.path.join(root_dir, DATA_INGESTION_FEATURE_STORE_STATE_FILE_NAME)
+        self.partition_dir = os.path.join(root_dir, DATA_INGESTION_FEATURE_STORE_PARTITION_DIR)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        '''
+        Holds an exclusive flock on the store, shared by every process on the host.
+        '''
+        os.makedirs(self.root_dir, exist_ok=True)
+        with open(os.path.join(self.root_dir, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_state(self) -> Optional[dict]:
+        '''
+        Returns the state of the store, None when nothing was ingested yet.
+        '''
+        if not os.path.exists(self.state_file_path):
+            return None
+        return read_yaml(self.state_file_path)
+
+    def _write_state(self, state: dict) -> None:
+        tmp_path = f'{self.state_file_path}.{os.getpid()}.tmp'
+        write_yaml_file(tmp_path, state)
+        os.replace(tmp_path, self.state_file_path)
+
+    def partition_paths(self, state: Optional[dict] = None) -> List[str]:
+        state = state or self.read_state() or {'partitions': []}
+        return [os.path.join(self.partition_dir, partition['file_name']) for partition in state['partitions']]
+
+    def new_partition_path(self) -> str:
+        '''
+        Returns a scratch path in the store to export the next partition to.
+        '''
+        os.makedirs(self.partition_dir, exist_ok=True)
+        return os.path.join(self.partition_dir, f'.incoming.{os.getpid()}.{self.FILE_FORMAT}')
+
+    def add_partition(self, file_path: str, n_rows: int, watermark_field: str, watermark, columns: list,
+                      replace: bool = False) -> dict:
+        '''
+        Moves the Parquet file at file_path into the store as its newest partition and advances the
+        watermark. columns lists the {name: type} of every column, as in the schema file.
+        With replace=True it becomes the only partition (full refresh) and the previous
+        partitions are deleted.
+        Returns the new state.
+        '''
+        try:
+            # Stored as plain YAML, drivers may return subclasses such as bson's Int64
+            if isinstance(watermark, int):
+                watermark = int(watermark)
+            elif isinstance(watermark, float):
+                watermark = float(watermark)
+            previous_state = self.read_state()
+            sequence = previous_state['next_partition'] if previous_state else 0
+            file_name = f'part-{sequence:05d}.{self.FILE_FORMAT}'
+            os.replace(file_path, os.path.join(self.partition_dir, file_name))
+
+            partition = {
+                'file_name': file_name,
+                'rows': n_rows,
+                'watermark': watermark,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+            }
+            partitions = [partition] if replace or previous_state is None else [*previous_state['partitions'], partition]
+            state = {
+                'format': self.FILE_FORMAT,
+                'watermark_field': watermark_field,
+                'watermark': watermark,
+                'columns': columns,
+                'rows': sum(entry['rows'] for entry in partitions),
+                'next_partition': sequence + 1,
+                'partitions': partitions,
+            }
+            self._write_state(state)
+
+            if replace and previous_state is not None:
+                for path in self.partition_paths(previous_state):
+                    if os.path.exists(path):
+                        os.remove(path)
+            logging.info(f'Added partition {file_name} with {n_rows} rows to the feature store, '
+                         f'{watermark_field} watermark at {watermark}')
+            return state
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def consolidate(self, file_path: str) -> int:
+        '''
+        Writes every partition, oldest first, to a single Parquet file at file_path.
+        Returns the number of rows written.
+        '''
+        try:
+            state = self.read_state()
+            if state is None:
+                raise ValueError(f'Feature store {self.root_dir} is empty.')
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = f'{file_path}.{os.getpid()}.tmp'
+            try:
+                concat_parquet_files(self.partition_paths(state), tmp_path)
+                os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return state['rows']
+
+        except Exception as e:
+            raise MyException(e, sys)
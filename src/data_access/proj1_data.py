@@ -1,54 +1,392 @@
+import os
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
 
 
 from src.configuration.mongo_db_connection import MongoDBClient
 from src.constants import *
 from src.exception import MyException
+from src.utils.main_utils import (read_yaml, concat_csv_files, concat_parquet_files, get_schema_dtypes,
+                                  schema_numpy_dtype, apply_schema_dtypes, memory_per_row)
 
 
 class Proj1Data:
     '''
     A class to export MongoDB records as a pandas DataFrame.
+
+    Only the columns declared in config/schema.yaml are requested from the server (projection
+    pushdown), `_id` and `id` excepted. The collection is read with a cursor in batches of
+    batch_size documents. Each batch is turned into a DataFrame chunk typed by the schema ('na'
+    markers replaced, categoricals and narrow numeric dtypes applied) and the documents are
+    released before the next batch is fetched, so only one batch of BSON documents is ever held
+    as Python dicts.
+
+    With n_workers > 1 the collection is split into ranges of the numeric partition field (`id`)
+    that are exported concurrently by a thread pool sharing the pooled MongoClient, and merged
+    in range order, so the result does not depend on which partition finishes first.
     '''
-    def __init__(self) -> None:
+    def __init__(self, mongo_client=None) -> None:
         '''
         Initializes the MongoDB client connection.
+        :param mongo_client: Object exposing the database as `database`, defaults to MongoDBClient
+        '''
+        try:
+            self.mongo_client = mongo_client if mongo_client is not None else MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+            self._numerical_columns = self._schema_config['numerical_columns']
+            self._schema_dtypes = get_schema_dtypes(self._schema_config)
+            self._projection = {column: 1 for column in self._schema_dtypes if column not in DATA_INGESTION_EXCLUDED_FIELDS}
+            if '_id' not in self._projection:
+                self._projection['_id'] = 0
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        # Access Specified collection from the default or specified database
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def _to_chunk(self, documents: list) -> pd.DataFrame:
+        '''
+        Builds a typed DataFrame chunk from a batch of documents.
+        '''
+        chunk = pd.DataFrame.from_records(documents)
+        for column in chunk.columns:
+            if chunk[column].dtype != object:
+                continue
+            is_na = chunk[column].eq('na')
+            if is_na.any():
+                chunk[column] = chunk[column].mask(is_na, np.nan)
+            if column in self._numerical_columns:
+                chunk[column] = pd.to_numeric(chunk[column])
+        return apply_schema_dtypes(chunk, self._schema_config)
+
+    @staticmethod
+    def _and(*queries: Optional[dict]) -> dict:
+        queries = [query for query in queries if query]
+        if len(queries) == 1:
+            return queries[0]
+        return {'$and': queries} if queries else {}
+
+    def _default_projection(self, projection: Optional[dict]) -> dict:
+        return self._projection if projection is None else projection
+
+    def field_bounds(self, collection_name: str, field: str, database_name: Optional[str] = None,
+                     query: Optional[dict] = None) -> Optional[tuple]:
+        '''
+        Returns the smallest and largest value of field over the documents matching query,
+        None when no document matches.
+        :param query: MongoDB filter, defaults to the documents that have the field
+        '''
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            query = query or {field: {'$exists': True}}
+            bounds = [next(iter(collection.find(query, {field: 1}).sort(field, direction).limit(1)), None)
+                      for direction in (1, -1)]
+            if bounds[0] is None:
+                return None
+            return bounds[0][field], bounds[1][field]
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def collection_statistics(self, collection_name: str, database_name: Optional[str] = None,
+                              query: Optional[dict] = None) -> dict:
+        '''
+        Computes per-column statistics of the schema columns on the server, in one aggregation
+        ($group per column inside a $facet), without transferring any document.
+        Returns a dict with:
+            rows:           number of documents matching query
+            columns:        for numerical columns the missing (absent or null), 'na', invalid
+                            (neither a number nor 'na') counts and the min/max/mean of the numbers,
+                            for categorical columns the missing and 'na' counts and the count of
+                            every value
+            class_balance:  count and ratio of every value of the target column
+            duplicates:     for every validation_rules.unique column, the number of values held by
+                            several documents and of documents repeating an earlier one
+        '''
+        try:
+            numerical_columns = self._numerical_columns
+            categorical_columns = self._schema_config['categorical_columns']
+            summary = {'_id': None, 'rows': {'$sum': 1}}
+            for column in numerical_columns + categorical_columns:
+                value = f'${column}'
+                is_missing = {'$eq': [{'$ifNull': [value, None]}, None]}
+                is_na = {'$eq': [value, 'na']}
+                summary[f'{column}__missing'] = {'$sum': {'$cond': [is_missing, 1, 0]}}
+                summary[f'{column}__na'] = {'$sum': {'$cond': [is_na, 1, 0]}}
+                if column in numerical_columns:
+                    is_number = {'$isNumber': value}
+                    number = {'$cond': [is_number, value, None]}
+                    summary[f'{column}__invalid'] = {'$sum': {'$cond': [{'$or': [is_missing, is_na, is_number]}, 0, 1]}}
+                    # $min, $max and $avg skip the nulls
+                    summary[f'{column}__min'] = {'$min': number}
+                    summary[f'{column}__max'] = {'$max': number}
+                    summary[f'{column}__mean'] = {'$avg': number}
+            facets = {'summary': [{'$group': summary}]}
+            for index, column in enumerate(categorical_columns + [TARGET_COLUMN]):
+                facets[f'values{index}'] = [{'$group': {'_id': f'${column}', 'count': {'$sum': 1}}}]
+            unique_columns = self._schema_config.get('validation_rules', {}).get('unique', [])
+            for index, column in enumerate(unique_columns):
+                facets[f'duplicates{index}'] = [
+                    {'$match': {column: {'$ne': None}}},
+                    {'$group': {'_id': f'${column}', 'count': {'$sum': 1}}},
+                    {'$match': {'count': {'$gt': 1}}},
+                    {'$group': {'_id': None, 'values': {'$sum': 1}, 'documents': {'$sum': '$count'}}},
+                ]
+
+            pipeline = ([{'$match': query}] if query else []) + [{'$facet': facets}]
+            result = next(iter(self._get_collection(collection_name, database_name).aggregate(pipeline, allowDiskUse=True)))
+            summary = result['summary'][0] if result['summary'] else {'rows': 0}
+            rows = int(summary['rows'])
+
+            def number(value):
+                return None if value is None else float(value)
+
+            def counts(index: int) -> dict:
+                return {str(entry['_id']): int(entry['count']) for entry in result[f'values{index}']
+                        if entry['_id'] is not None and entry['_id'] != 'na'}
+
+            columns = {}
+            for column in numerical_columns + categorical_columns:
+                statistics = {'missing': int(summary.get(f'{column}__missing', 0)),
+                              'na': int(summary.get(f'{column}__na', 0))}
+                if column in numerical_columns:
+                    statistics['invalid'] = int(summary.get(f'{column}__invalid', 0))
+                    for name in ('min', 'max', 'mean'):
+                        statistics[name] = number(summary.get(f'{column}__{name}'))
+                else:
+                    statistics['values'] = counts(categorical_columns.index(column))
+                columns[column] = statistics
+
+            class_counts = counts(len(categorical_columns))
+            class_balance = {value: {'count': count, 'ratio': count / rows} for value, count in sorted(class_counts.items())}
+            duplicates = {}
+            for index, column in enumerate(unique_columns):
+                entry = result[f'duplicates{index}'][0] if result[f'duplicates{index}'] else {'values': 0, 'documents': 0}
+                duplicates[column] = {'duplicated_values': int(entry['values']),
+                                      'violations': int(entry['documents']) - int(entry['values'])}
+            return {'rows': rows, 'columns': columns, 'class_balance': class_balance, 'duplicates': duplicates}
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def partition_filters(self, collection_name: str, n_partitions: int, database_name: Optional[str] = None,
+                          partition_field: str = DATA_INGESTION_PARTITION_FIELD,
+                          query: Optional[dict] = None) -> List[dict]:
+        '''
+        Splits the documents matching query into at most n_partitions equal ranges of the numeric
+        partition_field, plus one partition for documents where the field is missing or not a number.
+        Returns the MongoDB filters of the partitions, in ascending range order.
         '''
         try:
-            self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            numeric = {partition_field: {'$type': 'number'}}
+            bounds = self.field_bounds(collection_name, partition_field, database_name, self._and(query, numeric))
+            filters = []
+            if bounds is not None:
+                low, high = bounds
+                edges = np.linspace(low, high, n_partitions + 1)
+                if isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+                    edges = np.unique(np.ceil(edges).astype(np.int64)).tolist()
+                else:
+                    edges = np.unique(edges).tolist()
+                for index in range(len(edges) - 1):
+                    last = index == len(edges) - 2
+                    filters.append({partition_field: {'$gte': edges[index], '$lte' if last else '$lt': edges[index + 1]}})
+                if len(edges) == 1:
+                    filters.append({partition_field: edges[0]})
+            filters.append({'$or': [{partition_field: {'$exists': False}},
+                                    {partition_field: {'$not': {'$type': 'number'}}}]})
+            return [self._and(query, partition) for partition in filters]
+
         except Exception as e:
             raise MyException(e, sys)
-    
-    def export_collection_as_dataframe(self, collection_name : str, database_name : Optional[str] = None) -> pd.DataFrame:
+
+    def get_columns(self, collection_name: str, database_name: Optional[str] = None,
+                    projection: Optional[dict] = None) -> list:
+        '''
+        Returns the exported columns, the fields of the first document of the collection.
+        Documents do not all list their fields in the same order, the first one fixes the column order.
+        '''
+        try:
+            document = self._get_collection(collection_name, database_name).find_one({}, self._default_projection(projection))
+            return list(document) if document is not None else []
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                               batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                               projection: Optional[dict] = None, query: Optional[dict] = None,
+                               sort_field: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        '''
+        Streams a MongoDB collection as typed DataFrame chunks of at most batch_size rows.
+        :param projection: MongoDB projection, defaults to the schema columns except `_id` and `id`
+        :param query: MongoDB filter selecting the documents to export, e.g. one of partition_filters
+        :param sort_field: Field the documents are returned in ascending order of
+        '''
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            cursor = collection.find(query or {}, self._default_projection(projection), batch_size=batch_size)
+            if sort_field is not None:
+                cursor = cursor.sort(sort_field, 1).allow_disk_use(True)
+            try:
+                while True:
+                    documents = list(islice(cursor, batch_size))
+                    if not documents:
+                        break
+                    yield self._to_chunk(documents)
+            finally:
+                cursor.close()
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _map_partitions(self, collection_name: str, database_name: Optional[str], n_workers: int, export_partition,
+                        query: Optional[dict] = None) -> list:
+        '''
+        Runs export_partition(query, index) for every partition of the documents matching query on
+        a thread pool and returns the results in partition order.
+        '''
+        filters = self.partition_filters(collection_name, n_workers, database_name, query=query)
+        with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='mongo-export') as executor:
+            futures = [executor.submit(export_partition, query, index) for index, query in enumerate(filters)]
+            return [future.result() for future in futures]
+
+    def export_collection_as_dataframe(self, collection_name : str, database_name : Optional[str] = None,
+                                       batch_size : int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                       projection : Optional[dict] = None, n_workers : int = 1,
+                                       query : Optional[dict] = None) -> pd.DataFrame:
         '''
         Exports an entire MongoDB collection as a pandas DataFrame.
+        :param n_workers: Partitions exported concurrently, 1 reads the collection with a single cursor
+        :param query: MongoDB filter restricting the export, defaults to every document
         '''
         try:
-            # Access Specified collection from the default or specified database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
-                
-            
             print('Fetching data from mongoDB')
-            df = pd.DataFrame(list(collection.find()))
-            print(f'Data fetched with len: {len(df)}')
-
-            
-            if '_id' in df.columns.to_list():
-                df = df.drop(columns=['_id'], axis=1)
-                
-            if 'id' in df.columns.to_list():
-                df = df.drop(columns=['id'], axis=1)
-                
-            df.replace({'na':np.nan}, inplace = True)
-            
+            if n_workers > 1:
+                partitions = self._map_partitions(
+                    collection_name, database_name, n_workers,
+                    lambda partition, index: list(self.iter_collection_chunks(
+                        collection_name, database_name, batch_size, projection, partition, DATA_INGESTION_PARTITION_FIELD)),
+                    query)
+                chunks = [chunk for partition in partitions for chunk in partition]
+            else:
+                chunks = list(self.iter_collection_chunks(collection_name, database_name, batch_size, projection, query))
+            # Chunks whose categories or narrow dtypes differ are concatenated to wider dtypes, cast back
+            df = apply_schema_dtypes(pd.concat(chunks, ignore_index=True), self._schema_config) if chunks else pd.DataFrame()
+            print(f'Data fetched with len: {len(df)}, {memory_per_row(df):.1f} bytes per row in memory')
             return df
-        
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _write_csv(self, file_path: str, columns: list, chunks: Iterator[pd.DataFrame]) -> int:
+        n_rows = 0
+        with open(file_path, 'w', newline='') as file_obj:
+            pd.DataFrame(columns=columns).to_csv(file_obj, index=False)
+            for chunk in chunks:
+                if not set(columns).issubset(chunk.columns):
+                    # No document of the chunk has some of the columns
+                    chunk = chunk.reindex(columns=columns)
+                chunk.to_csv(file_obj, columns=columns, index=False, header=False)
+                n_rows += len(chunk)
+        return n_rows
+
+    def arrow_schema(self, columns: list):
+        '''
+        Returns the Arrow schema of the exported columns, typed from the schema file.
+        Categorical columns are dictionary encoded, undeclared columns are strings. Numeric columns
+        are stored 64 bit whatever their declared width, values that do not fit it stay readable.
+        '''
+        def arrow_type(column: str):
+            dtype = self._schema_dtypes.get(column)
+            if dtype is None:
+                return pa.string()
+            if dtype == 'category':
+                return pa.dictionary(pa.int32(), pa.string())
+            return pa.int64() if schema_numpy_dtype(dtype).kind == 'i' else pa.float64()
+
+        return pa.schema([(column, arrow_type(column)) for column in columns])
+
+    def _write_parquet(self, file_path: str, columns: list, chunks: Iterator[pd.DataFrame]) -> int:
+        n_rows = 0
+        schema = self.arrow_schema(columns)
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for chunk in chunks:
+                # Every chunk becomes one row group
+                writer.write_table(pa.Table.from_pandas(chunk.reindex(columns=columns), schema=schema, preserve_index=False))
+                n_rows += len(chunk)
+        return n_rows
+
+    def _export_to_file(self, write, concat, collection_name: str, file_path: str, database_name: Optional[str],
+                        batch_size: int, projection: Optional[dict], n_workers: int, query: Optional[dict],
+                        columns: Optional[list]) -> int:
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        projection = self._default_projection(projection)
+        if columns is None:
+            columns = self.get_columns(collection_name, database_name, projection)
+        part_paths = []
+        try:
+            if n_workers > 1:
+                def export_partition(partition: dict, index: int) -> int:
+                    part_path = f'{tmp_path}.part{index}'
+                    part_paths.append(part_path)
+                    return write(part_path, columns, self.iter_collection_chunks(
+                        collection_name, database_name, batch_size, projection, partition, DATA_INGESTION_PARTITION_FIELD))
+
+                partition_rows = self._map_partitions(collection_name, database_name, n_workers, export_partition, query)
+                n_rows = sum(partition_rows)
+                concat([f'{tmp_path}.part{index}' for index in range(len(partition_rows))], tmp_path)
+            else:
+                n_rows = write(tmp_path, columns, self.iter_collection_chunks(
+                    collection_name, database_name, batch_size, projection, query))
+            os.replace(tmp_path, file_path)
+        finally:
+            for path in [tmp_path, *part_paths]:
+                if os.path.exists(path):
+                    os.remove(path)
+        return n_rows
+
+    def export_collection_to_csv(self, collection_name : str, file_path : str, database_name : Optional[str] = None,
+                                 batch_size : int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                 projection : Optional[dict] = None, n_workers : int = 1,
+                                 query : Optional[dict] = None, columns : Optional[list] = None) -> int:
+        '''
+        Writes a MongoDB collection to a CSV file chunk by chunk, memory use does not grow with the
+        collection. The file is written next to file_path and renamed into place once complete.
+        With n_workers > 1 every partition is written to its own part file, the parts are then
+        appended in partition order.
+        :param query: MongoDB filter restricting the export, defaults to every document
+        :param columns: CSV columns, defaults to the fields of the first document of the collection
+        Returns the number of rows written.
+        '''
+        try:
+            return self._export_to_file(self._write_csv, concat_csv_files, collection_name, file_path, database_name,
+                                        batch_size, projection, n_workers, query, columns)
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def export_collection_to_parquet(self, collection_name : str, file_path : str, database_name : Optional[str] = None,
+                                     batch_size : int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                     projection : Optional[dict] = None, n_workers : int = 1,
+                                     query : Optional[dict] = None, columns : Optional[list] = None) -> int:
+        '''
+        Writes a MongoDB collection to a Parquet file typed by arrow_schema, one row group per chunk,
+        the same way export_collection_to_csv writes a CSV file.
+        Returns the number of rows written.
+        '''
+        try:
+            return self._export_to_file(self._write_parquet, concat_parquet_files, collection_name, file_path,
+                                        database_name, batch_size, projection, n_workers, query, columns)
+
         except Exception as e:
             raise MyException(e, sys)
-        
@@ -1,9 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+# Objects handed to the next stages in memory are not part of the artifact's repr, nor set when
+# the pipeline persists its artifacts synchronously and the stages reload them from disk
 
 @dataclass
 class DataIngestionArtifact:
     trained_file_path: str
     test_file_path: str
+    train_df: object = field(default=None, repr=False)
+    test_df: object = field(default=None, repr=False)
     
 @dataclass
 class DataValidationArtifact:
@@ -16,6 +21,11 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    test_features_file_path: str = None
+    preprocessing_object: object = field(default=None, repr=False)
+    train_arr: object = field(default=None, repr=False)
+    test_arr: object = field(default=None, repr=False)
+    test_features: object = field(default=None, repr=False)
     
 @dataclass
 class ClassificationMetricArtifact:
@@ -27,6 +37,8 @@ class ClassificationMetricArtifact:
 class ModelTrainerArtifact:
     trained_model_file_path:str 
     metric_artifact:ClassificationMetricArtifact
+    compiled_model_file_path:str = None
+    trained_model: object = field(default=None, repr=False)
 
 @dataclass
 class ModelEvaluationArtifact:
@@ -34,8 +46,10 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str 
     trained_model_path:str
+    compiled_model_path:str = None
 
 @dataclass
 class ModelPusherArtifact:
     bucket_name:str
-    s3_model_path:str
\ No newline at end of file
+    s3_model_path:str
+    compiled_model_path:str = None
\ No newline at end of file
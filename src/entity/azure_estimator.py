@@ -2,13 +2,15 @@ import sys
 from src.cloud_storage.azure_storage import AzureStorageService
 from src.exception import MyException
 from src.entity.estimator import MyModel
+from src.entity.compiled_estimator import CompiledForestModel
 from pandas import DataFrame
 
 class Proj1Estimator:
-    def __init__(self, container_name: str, model_path: str):
+    def __init__(self, container_name: str, model_path: str, storage=None, compiled_model_path: str = None):
         self.container_name = container_name
         self.model_path = model_path
-        self.azure = AzureStorageService()
+        self.compiled_model_path = compiled_model_path
+        self.azure = storage if storage is not None else AzureStorageService()
         self.loaded_model: MyModel = None
 
     def is_model_present(self, model_path: str) -> bool:
@@ -18,6 +20,12 @@ class Proj1Estimator:
             print(e)
             return False
 
+    def get_model_properties(self) -> dict:
+        try:
+            return self.azure.get_blob_properties(container_name=self.container_name, blob_path=self.model_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
     def load_model(self) -> MyModel:
         try:
             return self.azure.get_blob_as_object(container_name=self.container_name, blob_path=self.model_path)
@@ -33,6 +41,34 @@ class Proj1Estimator:
         except Exception as e:
             raise MyException(e, sys)
 
+    def load_compiled_model(self, local_path: str) -> CompiledForestModel:
+        '''
+        Downloads the compiled model blob to local_path and memory-maps it.
+        Returns None when no compiled model was pushed.
+        '''
+        try:
+            if not self.compiled_model_path or not self.is_model_present(self.compiled_model_path):
+                return None
+            self.azure.download_file(container_name=self.container_name,
+                                     blob_path=self.compiled_model_path,
+                                     local_path=local_path)
+            return CompiledForestModel.load(local_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def save_compiled_model(self, from_file: str, remove: bool = False) -> None:
+        try:
+            if from_file is None:
+                # Never leave a previous version's compiled model next to a new pickle
+                self.azure.delete_blob(container_name=self.container_name, blob_path=self.compiled_model_path)
+                return
+            self.azure.upload_file(local_path=from_file,
+                                   blob_path=self.compiled_model_path,
+                                   container_name=self.container_name,
+                                   remove=remove)
+        except Exception as e:
+            raise MyException(e, sys)
+
     def predict(self, dataframe: DataFrame):
         try:
             if self.loaded_model is None:
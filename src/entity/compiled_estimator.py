@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import mmap
+import struct
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.entity.estimator import MyModel
+from src.exception import MyException
+from src.logger import logging
+
+
+# Compiled model file:
+#   magic (8 bytes) | format version (uint32) | header length (uint32) | JSON header | padding | arrays
+# The JSON header holds the feature names, classes, max depth and scaler parameters, plus the dtype,
+# shape and offset of each tree array. Arrays are little-endian and start on an ARRAY_ALIGNMENT
+# boundary, so they can be used in place from a memory map.
+MODEL_FILE_MAGIC = b"VEHMODEL"
+MODEL_FILE_FORMAT_VERSION = 1
+MODEL_FILE_PREFIX = struct.Struct("<8sII")
+ARRAY_ALIGNMENT = 64
+
+PREPROCESSOR_ARRAY_NAMES = ("column_index", "shift", "divisor", "multiplier", "offset")
+# Tree arrays in constructor order, node ids stay 64-bit so traversal indexes without a cast
+TREE_ARRAY_NAMES = ("node_feature", "node_threshold", "node_left", "node_right", "node_value", "tree_roots")
+TREE_ARRAY_DTYPES = {"node_feature": "<i8", "node_threshold": "<f8", "node_left": "<i8",
+                     "node_right": "<i8", "node_value": "<f8", "tree_roots": "<i8"}
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+class UnsupportedModelFormatError(Exception):
+    '''
+    Raised when a file is not a compiled model or was written in another format version.
+    '''
+
+
+class CompiledForestModel:
+    '''
+    Flat-array version of MyModel for a ColumnTransformer of StandardScaler/MinMaxScaler/passthrough
+    columns followed by a RandomForestClassifier.
+
+    Every output column of the preprocessor is stored as ((x - shift) / divisor) * multiplier + offset
+    of one raw input column, and every tree's feature/threshold/children/leaf-probability arrays are
+    concatenated into contiguous NumPy arrays. Scoring walks all trees for all rows at once, one tree
+    level per step, and accumulates the tree probabilities in the same order and precision as
+    RandomForestClassifier.predict_proba, so predictions match MyModel.predict bit-for-bit.
+    '''
+
+    # Rows scored per traversal step, bounds the (rows x trees) working arrays
+    CHUNK_ROWS = 4096
+
+    def __init__(self, feature_names, column_index, shift, divisor, multiplier, offset,
+                 node_feature, node_threshold, node_left, node_right, node_value, tree_roots,
+                 classes, max_depth: int) -> None:
+        self.feature_names = list(feature_names)
+        self.column_index = column_index
+        self.shift = shift
+        self.divisor = divisor
+        self.multiplier = multiplier
+        self.offset = offset
+        self.node_feature = node_feature
+        self.node_threshold = node_threshold
+        self.node_left = node_left
+        self.node_right = node_right
+        self.node_value = node_value
+        self.tree_roots = tree_roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+
+    @staticmethod
+    def _flatten_preprocessor(preprocessing_object) -> tuple:
+        '''
+        Turns the fitted ColumnTransformer into per-output-column affine parameters.
+        '''
+        # Only compiling needs scikit-learn, loading and scoring a compiled model do not
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
+
+        if isinstance(preprocessing_object, Pipeline):
+            if len(preprocessing_object.steps) != 1:
+                raise Exception("Only a single-step preprocessing pipeline can be compiled.")
+            preprocessing_object = preprocessing_object.steps[0][1]
+        if not isinstance(preprocessing_object, ColumnTransformer):
+            raise Exception(f"Cannot compile preprocessor {type(preprocessing_object).__name__}.")
+
+        feature_names = list(preprocessing_object.feature_names_in_)
+        column_index, shift, divisor, multiplier, offset = [], [], [], [], []
+        for _, transformer, columns in preprocessing_object.transformers_:
+            if transformer == "drop":
+                continue
+            columns = [feature_names[column] if isinstance(column, (int, np.integer)) else column
+                       for column in columns]
+            if len(columns) == 0:
+                continue
+            n_columns = len(columns)
+            column_index.extend(feature_names.index(column) for column in columns)
+
+            # A passthrough remainder is fitted as an identity FunctionTransformer
+            is_identity = isinstance(transformer, FunctionTransformer) and transformer.func is None
+            if transformer == "passthrough" or is_identity:
+                shift.extend([0.0] * n_columns)
+                divisor.extend([1.0] * n_columns)
+                multiplier.extend([1.0] * n_columns)
+                offset.extend([0.0] * n_columns)
+            elif isinstance(transformer, StandardScaler):
+                # mean_ is fitted even with with_mean=False, but then not subtracted
+                with_mean = transformer.with_mean and transformer.mean_ is not None
+                with_std = transformer.with_std and transformer.scale_ is not None
+                shift.extend(transformer.mean_ if with_mean else [0.0] * n_columns)
+                divisor.extend(transformer.scale_ if with_std else [1.0] * n_columns)
+                multiplier.extend([1.0] * n_columns)
+                offset.extend([0.0] * n_columns)
+            elif isinstance(transformer, MinMaxScaler):
+                if transformer.clip:
+                    raise Exception("MinMaxScaler with clip=True cannot be compiled.")
+                shift.extend([0.0] * n_columns)
+                divisor.extend([1.0] * n_columns)
+                multiplier.extend(transformer.scale_)
+                offset.extend(transformer.min_)
+            else:
+                raise Exception(f"Cannot compile transformer {type(transformer).__name__}.")
+
+        return (feature_names, np.asarray(column_index, dtype=np.intp),
+                np.asarray(shift, dtype=np.float64), np.asarray(divisor, dtype=np.float64),
+                np.asarray(multiplier, dtype=np.float64), np.asarray(offset, dtype=np.float64))
+
+    @staticmethod
+    def _flatten_forest(forest) -> tuple:
+        '''
+        Concatenates the trees of a fitted RandomForestClassifier into flat node arrays.
+        Leaves point to themselves so extra traversal steps keep rows on their leaf.
+        '''
+        if forest.n_outputs_ != 1:
+            raise Exception("Only single-output forests can be compiled.")
+        n_classes = int(forest.n_classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        node_offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            roots.append(node_offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.intp) + node_offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.intp) + node_offset)
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            node_offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return (np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                np.concatenate(rights), np.ascontiguousarray(np.concatenate(values)),
+                np.asarray(roots, dtype=np.intp), max_depth)
+
+    @classmethod
+    def from_model(cls, model: MyModel) -> "CompiledForestModel":
+        '''
+        Compiles a trained MyModel into flat arrays.
+        '''
+        try:
+            preprocessor_arrays = cls._flatten_preprocessor(model.preprocessing_object)
+            forest = model.trained_model_object
+            forest_arrays = cls._flatten_forest(forest)
+            return cls(*preprocessor_arrays, *forest_arrays[:6], forest.classes_, forest_arrays[6])
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        '''
+        Applies the flattened scalers to raw feature rows (columns in feature_names order).
+        '''
+        raw = features[:, self.column_index]
+        return ((raw - self.shift) / self.divisor) * self.multiplier + self.offset
+
+    def _predict_proba_transformed(self, transformed: np.ndarray) -> np.ndarray:
+        # Trees compare float32 features against float64 thresholds, as in sklearn
+        transformed = np.asarray(transformed, dtype=np.float32)
+        n_rows = transformed.shape[0]
+        n_trees = self.tree_roots.shape[0]
+        probabilities = np.zeros((n_rows, self.node_value.shape[1]), dtype=np.float64)
+
+        for start in range(0, n_rows, self.CHUNK_ROWS):
+            chunk = transformed[start:start + self.CHUNK_ROWS]
+            row_ids = np.arange(chunk.shape[0])[:, np.newaxis]
+            nodes = np.repeat(self.tree_roots[np.newaxis, :], chunk.shape[0], axis=0)
+            for _ in range(self.max_depth):
+                go_left = chunk[row_ids, self.node_feature[nodes]] <= self.node_threshold[nodes]
+                nodes = np.where(go_left, self.node_left[nodes], self.node_right[nodes])
+
+            # Accumulate tree by tree, like RandomForestClassifier.predict_proba
+            leaf_values = self.node_value[nodes]
+            accumulated = probabilities[start:start + self.CHUNK_ROWS]
+            for tree_index in range(n_trees):
+                accumulated += leaf_values[:, tree_index, :]
+
+        probabilities /= n_trees
+        return probabilities
+
+    def predict_transformed(self, transformed: np.ndarray) -> np.ndarray:
+        '''
+        Forest-only prediction on already scaled features, same as RandomForestClassifier.predict.
+        '''
+        probabilities = self._predict_proba_transformed(transformed)
+        return self.classes_.take(np.argmax(probabilities, axis=1), axis=0)
+
+    def predict_array_with_probability(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Scores raw feature rows given as a 2D array in feature_names order.
+        '''
+        probabilities = self._predict_proba_transformed(self.transform(np.asarray(features, dtype=np.float64)))
+        return self.classes_.take(np.argmax(probabilities, axis=1), axis=0), probabilities
+
+    def predict_with_probability(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        try:
+            return self.predict_array_with_probability(dataframe[self.feature_names].to_numpy(dtype=np.float64))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict(self, dataframe: pd.DataFrame) -> np.ndarray:
+        '''
+        Drop-in replacement for MyModel.predict on a DataFrame of raw feature columns.
+        '''
+        return self.predict_with_probability(dataframe)[0]
+
+    def save(self, file_path: str) -> None:
+        '''
+        Writes the model in the compiled model file format (see MODEL_FILE_MAGIC). The file is
+        written next to its destination and renamed into place, so readers never see a partial model.
+        '''
+        try:
+            dir_path = os.path.dirname(file_path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+
+            arrays = {name: np.ascontiguousarray(getattr(self, name)).astype(TREE_ARRAY_DTYPES[name], copy=False)
+                      for name in TREE_ARRAY_NAMES}
+            array_entries = {}
+            array_offset = 0
+            for name, array in arrays.items():
+                array_entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": array_offset}
+                array_offset = _aligned(array_offset + array.nbytes)
+
+            header = json.dumps({
+                "feature_names": self.feature_names,
+                "classes": self.classes_.tolist(),
+                "classes_dtype": self.classes_.dtype.str,
+                "max_depth": self.max_depth,
+                # Floats are written with repr and parse back to the same float64
+                "preprocessor": {name: getattr(self, name).tolist() for name in PREPROCESSOR_ARRAY_NAMES},
+                "arrays": array_entries,
+            }).encode("utf-8")
+            data_start = _aligned(MODEL_FILE_PREFIX.size + len(header))
+
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file_obj:
+                file_obj.write(MODEL_FILE_PREFIX.pack(MODEL_FILE_MAGIC, MODEL_FILE_FORMAT_VERSION, len(header)))
+                file_obj.write(header)
+                for name, array in arrays.items():
+                    file_obj.seek(data_start + array_entries[name]["offset"])
+                    file_obj.write(memoryview(array).cast("B"))
+            os.replace(tmp_path, file_path)
+            logging.info(f"Compiled model saved to {file_path}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @classmethod
+    def load(cls, file_path: str) -> "CompiledForestModel":
+        '''
+        Memory-maps a compiled model file. The tree arrays are read-only views on the mapping:
+        nothing is copied into the heap, pages are read on first use and every process mapping the
+        same file shares them. The file can be unlinked once loaded, the mapping keeps it alive.
+        Raises UnsupportedModelFormatError for files of another format version.
+        '''
+        with open(file_path, "rb") as file_obj:
+            mapping = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, format_version, header_length = MODEL_FILE_PREFIX.unpack_from(mapping, 0)
+        except struct.error:
+            magic, format_version = None, None
+        if magic != MODEL_FILE_MAGIC or format_version != MODEL_FILE_FORMAT_VERSION:
+            mapping.close()
+            raise UnsupportedModelFormatError(
+                f"{file_path} is not a compiled model of format version {MODEL_FILE_FORMAT_VERSION}.")
+
+        try:
+            header_end = MODEL_FILE_PREFIX.size + header_length
+            header = json.loads(mapping[MODEL_FILE_PREFIX.size:header_end].decode("utf-8"))
+            data_start = _aligned(header_end)
+
+            # Each array holds a reference to the mapping, which is unmapped with the last of them
+            arrays = {}
+            for name in TREE_ARRAY_NAMES:
+                entry = header["arrays"][name]
+                dtype = np.dtype(entry["dtype"])
+                count = int(np.prod(entry["shape"]))
+                arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count,
+                                             offset=data_start + entry["offset"]).reshape(entry["shape"])
+
+            preprocessor = header["preprocessor"]
+            return cls(header["feature_names"],
+                       np.asarray(preprocessor["column_index"], dtype=np.intp),
+                       *(np.asarray(preprocessor[name], dtype=np.float64) for name in PREPROCESSOR_ARRAY_NAMES[1:]),
+                       *(arrays[name] for name in TREE_ARRAY_NAMES),
+                       np.asarray(header["classes"], dtype=np.dtype(header["classes_dtype"])),
+                       header["max_depth"])
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def __repr__(self):
+        return f"CompiledForestModel(trees={len(self.tree_roots)}, nodes={len(self.node_feature)})"
+
+    def __str__(self):
+        return self.__repr__()
@@ -4,13 +4,16 @@ from src.constants import *
 from dataclasses import dataclass
 from datetime import datetime
 
-TIMESTAMP: str = datetime.now().strftime('%m_%d_%Y_%H_%M_%S')
+# Training jobs pass their own run id so every run writes to its own artifact directory
+TIMESTAMP: str = os.getenv(TRAINING_RUN_ID_ENV_KEY) or datetime.now().strftime('%m_%d_%Y_%H_%M_%S')
 
 @dataclass
 class TrainingPipelineConfig:
     pipeline_name: str = PIPELINE_NAME
     artifact_dir: str = os.path.join(ARTIFACT_DIR, TIMESTAMP)
     timestamp: str = TIMESTAMP
+    artifact_persistence: str = os.getenv(PIPELINE_ARTIFACT_PERSISTENCE_ENV_KEY, PIPELINE_ARTIFACT_PERSISTENCE)
+    artifact_writer_workers: int = PIPELINE_ARTIFACT_WRITER_WORKERS
     
 
 training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
@@ -23,25 +26,36 @@ class DataIngestionConfig:
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    export_batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE
+    export_workers: int = int(os.getenv(DATA_INGESTION_EXPORT_WORKERS_ENV_KEY, DATA_INGESTION_EXPORT_WORKERS))
+    feature_store_root: str = os.getenv(DATA_INGESTION_FEATURE_STORE_ROOT_ENV_KEY, DATA_INGESTION_FEATURE_STORE_ROOT)
+    watermark_field: str = DATA_INGESTION_WATERMARK_FIELD
+    full_refresh: bool = os.getenv(DATA_INGESTION_FULL_REFRESH_ENV_KEY, '0').lower() in ('1', 'true', 'yes')
     
 @dataclass
 class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)
     validation_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+    collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    collection_statistics: bool = os.getenv(DATA_VALIDATION_COLLECTION_STATISTICS_ENV_KEY, '1').lower() in ('1', 'true', 'yes')
+    chunk_rows: int = DATA_VALIDATION_CHUNK_ROWS
+    parallel_splits: bool = DATA_VALIDATION_PARALLEL_SPLITS
 
 
 @dataclass
 class DataTransformationConfig:
     data_transformation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
-    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_FILE_NAME.replace('csv', 'npy'))
-    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_FILE_NAME.replace('csv', 'npy'))
+    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_FILE_NAME.replace('parquet', 'npy'))
+    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_FILE_NAME.replace('parquet', 'npy'))
     transformed_object_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, PREPROCESSING_OBJECT_FILE_NAME)
+    test_features_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, DATA_TRANSFORMATION_TEST_FEATURES_FILE_NAME)
     
     
 @dataclass
 class ModelTrainerConfig:
     model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
+    compiled_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_COMPILED_MODEL_NAME)
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
     model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
     _n_estimators = MODEL_TRAINER_N_ESTIMATOR
@@ -61,8 +75,28 @@ class ModelEvaluationConfig:
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    compiled_model_key_path: str = MODEL_COMPILED_FILE_NAME
     
 @dataclass
 class VehiclePredictorConfig:
     model_file_path: str = MODEL_FILE_NAME
-    model_bucket_name: str = MODEL_BUCKET_NAME
\ No newline at end of file
+    compiled_model_file_path: str = MODEL_COMPILED_FILE_NAME
+    model_bucket_name: str = MODEL_BUCKET_NAME
+    reload_interval_seconds: float = MODEL_SERVING_RELOAD_INTERVAL_SECONDS
+    batch_max_wait_ms: float = MODEL_SERVING_BATCH_MAX_WAIT_MS
+    batch_max_size: int = MODEL_SERVING_BATCH_MAX_SIZE
+    batch_max_queue_depth: int = MODEL_SERVING_BATCH_MAX_QUEUE_DEPTH
+    executor_kind: str = MODEL_SERVING_EXECUTOR_KIND
+    executor_max_workers: int = MODEL_SERVING_EXECUTOR_MAX_WORKERS
+    executor_max_queue: int = MODEL_SERVING_EXECUTOR_MAX_QUEUE
+    cache_max_entries: int = MODEL_SERVING_CACHE_MAX_ENTRIES
+    cache_ttl_seconds: float = MODEL_SERVING_CACHE_TTL_SECONDS
+    # Set in multi-worker mode: workers memory-map one shared copy of the compiled model
+    shared_model_dir: str = os.getenv(MODEL_SERVING_SHARED_MODEL_DIR_ENV_KEY)
+
+@dataclass
+class TrainingJobConfig:
+    training_job_dir: str = os.path.join(ARTIFACT_DIR, TRAINING_JOB_DIR_NAME)
+    lock_file_path: str = os.path.join(ARTIFACT_DIR, TRAINING_JOB_DIR_NAME, TRAINING_JOB_LOCK_FILE_NAME)
+    nice_increment: int = TRAINING_JOB_NICE_INCREMENT
+    cancel_grace_seconds: float = TRAINING_JOB_CANCEL_GRACE_SECONDS
@@ -1,8 +1,13 @@
 import sys
+from typing import TYPE_CHECKING, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from sklearn.pipeline import Pipeline
+
+# scikit-learn is only imported when a pickled model is loaded, serving from a compiled model never needs it
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 from src.exception import MyException
 from src.logger import logging
@@ -18,7 +23,7 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    def __init__(self, preprocessing_object: "Pipeline", trained_model_object: object):
         """
         :param preprocessing_object: Input Object of preprocesser
         :param trained_model_object: Input Object of trained model 
@@ -26,6 +31,10 @@ class MyModel:
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
 
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.trained_model_object.classes_
+
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
         Function accepts preprocessed inputs (with all custom transformations already applied),
@@ -48,6 +57,36 @@ class MyModel:
             raise MyException(e, sys) from e
 
 
+    def transform(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """
+        Applies only the scaling step, for callers that time it separately from the forest.
+        """
+        return self.preprocessing_object.transform(dataframe)
+
+    def predict_transformed(self, transformed_feature: np.ndarray) -> np.ndarray:
+        """
+        Forest-only prediction on features already scaled by transform.
+        """
+        return self.trained_model_object.predict(transformed_feature)
+
+    def predict_with_probability(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a whole batch with a single transform and a single forest traversal.
+        Returns the predicted labels and the per-class probabilities, in input order.
+        """
+        try:
+            logging.info(f"Starting batch prediction for {len(dataframe)} rows.")
+            transformed_feature = self.preprocessing_object.transform(dataframe)
+            probabilities = self.trained_model_object.predict_proba(transformed_feature)
+
+            # Same label selection as RandomForestClassifier.predict, without traversing the trees twice
+            predictions = self.trained_model_object.classes_.take(np.argmax(probabilities, axis=1), axis=0)
+            return predictions, probabilities
+
+        except Exception as e:
+            logging.error("Error occurred in predict_with_probability method", exc_info=True)
+            raise MyException(e, sys) from e
+
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
 
@@ -1,44 +1,165 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import json
+import time
+import queue
+import atexit
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from from_root import from_root
-from datetime import datetime
+from datetime import datetime, timezone
 
 LOG_DIR = 'logs'
-LOG_FILE = f'{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log'
+LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 MAX_LOG_SIZE = 5 * 1024 * 1024 #5 MB
 BACKUP_COUNT = 3 #Number of backup log to keep
 
+# 'queue' hands records to a background listener thread, 'sync' writes them on the calling thread
+LOG_MODE_ENV_KEY = 'LOG_MODE'
+# 'text' or 'json' (one JSON object per line)
+LOG_FORMAT_ENV_KEY = 'LOG_FORMAT'
+# Comma-separated '<logger or module>=<rule>' pairs, a rule is a fraction of records to keep
+# ('0.01') or a rate limit ('10/s'). Only INFO and DEBUG records are ever dropped.
+LOG_SAMPLING_ENV_KEY = 'LOG_SAMPLING'
+# The prediction hot path logs on every request
+DEFAULT_LOG_SAMPLING = 'estimator=10/s,prediction_pipeline=10/s'
+
 #Construct log file path
-log_dir_path = os.path.join(from_root(), LOG_DIR)
-os.makedirs(log_dir_path, exist_ok=True)
-log_dir_path = os.path.join(log_dir_path,LOG_FILE)
+log_dir_path = os.path.join(from_root(), LOG_DIR, LOG_FILE)
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+    Formats every record as a single-line JSON object.
+    '''
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    Drops INFO/DEBUG records of noisy loggers or modules before they are formatted or queued.
+
+    Rules are matched on the logger name first, then on the module the record comes from (most
+    of this project logs through the root logger). A fraction keeps every n-th record, a rate
+    keeps at most n records per second.
+    '''
+    def __init__(self, rules: dict) -> None:
+        super().__init__()
+        self.rules = rules
+        self._state: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_rules(spec: str) -> dict:
+        rules = {}
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            key, rule = item.split('=', 1)
+            if rule.endswith('/s'):
+                rules[key.strip()] = ('rate', float(rule[:-2]))
+            else:
+                fraction = float(rule)
+                rules[key.strip()] = ('every', max(1, round(1 / fraction)) if fraction > 0 else 0)
+        return rules
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rules:
+            return True
+        key = record.name if record.name in self.rules else record.module
+        rule = self.rules.get(key)
+        if rule is None:
+            return True
+
+        kind, value = rule
+        with self._lock:
+            if kind == 'every':
+                seen = self._state.get(key, 0)
+                self._state[key] = seen + 1
+                return value > 0 and seen % value == 0
+
+            # Token bucket refilled at value tokens per second
+            now = time.monotonic()
+            tokens, updated_at = self._state.get(key, (value, now))
+            tokens = min(value, tokens + (now - updated_at) * value)
+            if tokens < 1:
+                self._state[key] = (tokens, now)
+                return False
+            self._state[key] = (tokens - 1, now)
+            return True
+
+
+_listener = None
+
+
+def _start_listener(log_queue, *handlers) -> None:
+    global _listener
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    # Flushes the records still queued when the process exits
+    if _listener is not None:
+        _listener.stop()
+
 
 def configure_logger():
     '''
     Configures logging with a rotation file handler and a console handler.
+    In queue mode (the default) the calling thread only enqueues the record, a background
+    listener does the formatting and the file/console I/O.
     '''
     # Create a custom logger
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
-    
+
     # Define formatter
-    formatter = logging.Formatter('[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s')
-    
-    # File handler with rotation
-    file_handler = RotatingFileHandler(log_dir_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT)
+    if os.getenv(LOG_FORMAT_ENV_KEY, 'text') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s')
+
+    # File handler with rotation, the file is only created when the first record is written
+    os.makedirs(os.path.dirname(log_dir_path), exist_ok=True)
+    file_handler = RotatingFileHandler(log_dir_path, maxBytes=MAX_LOG_SIZE, backupCount=BACKUP_COUNT, delay=True)
     file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.DEBUG)
-    
+
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
-    
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+
+    sampling_filter = SamplingFilter(SamplingFilter.parse_rules(os.getenv(LOG_SAMPLING_ENV_KEY, DEFAULT_LOG_SAMPLING)))
+
+    if os.getenv(LOG_MODE_ENV_KEY, 'queue') == 'sync':
+        # Add handlers to the logger
+        for handler in (file_handler, console_handler):
+            handler.addFilter(sampling_filter)
+            logger.addHandler(handler)
+        return
+
+    # Unbounded queue: putting a record never blocks the request thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(sampling_filter)
+    logger.addHandler(queue_handler)
+    _start_listener(log_queue, file_handler, console_handler)
+    atexit.register(_stop_listener)
+    # A forked child (e.g. a process pool worker) does not inherit the listener thread
+    os.register_at_fork(after_in_child=lambda: _start_listener(log_queue, file_handler, console_handler))
 
 
 # Configure the logger
-configure_logger()
\ No newline at end of file
+configure_logger()
@@ -0,0 +1,197 @@
+import io
+import sys
+import asyncio
+import argparse
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.constants import MODEL_FEATURE_COLUMNS, MODEL_SERVING_BULK_CHUNK_ROWS, SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml
+
+
+_schema_config: Optional[dict] = None
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+def _get_schema_config() -> dict:
+    global _schema_config
+    if _schema_config is None:
+        _schema_config = read_yaml(file_path=SCHEMA_FILE_PATH)
+    return _schema_config
+
+
+def prepare_features(raw_df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[pd.Series], pd.Series]:
+    '''
+    Applies the custom feature steps of DataTransformation to a chunk of raw records.
+    'na' markers are read as missing values, as in data ingestion. Records with a missing or
+    non-numeric number, an unknown Gender or a Vehicle_Age/Vehicle_Damage outside its domain are
+    not scored, the reason is returned for each of them instead.
+    Vehicle_Age and Vehicle_Damage are cast to categoricals with the domains from the schema
+    before pd.get_dummies, so every chunk gets the same dummy columns whatever values it contains.
+    Returns the model features of the valid records in MODEL_FEATURE_COLUMNS order, the id column
+    when present and the error of every record, empty for valid records.
+    '''
+    try:
+        schema_config = _get_schema_config()
+        domains = schema_config['categorical_domains']
+        ids = raw_df['id'] if 'id' in raw_df.columns else None
+        df = raw_df.drop(columns=[column for column in ('_id', 'id', TARGET_COLUMN) if column in raw_df.columns])
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].mask(df[column].eq('na'))
+
+        errors = pd.Series('', index=df.index, dtype=object)
+
+        def flag(invalid: np.ndarray, message: str) -> None:
+            # Every record keeps its first error
+            errors[np.asarray(invalid) & errors.eq('').to_numpy()] = message
+
+        for column in schema_config['numerical_columns']:
+            if column == TARGET_COLUMN:
+                continue
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+            flag(df[column].isna().to_numpy(), f'invalid {column}')
+        df['Gender'] = df['Gender'].map({'Female': 0, 'Male': 1})
+        flag(df['Gender'].isna().to_numpy(), 'invalid Gender')
+        for column in ('Vehicle_Age', 'Vehicle_Damage'):
+            df[column] = pd.Categorical(df[column], categories=domains[column])
+            flag(df[column].isna().to_numpy(), f'invalid {column}')
+
+        valid = errors.eq('').to_numpy()
+        if not valid.all():
+            df = df[valid]
+        df['Gender'] = df['Gender'].astype(int)
+        df = pd.get_dummies(df, drop_first=True)
+        df = df.rename(columns={
+            'Vehicle_Age_< 1 Year': 'Vehicle_Age_It_1_Year',
+            'Vehicle_Age_> 2 Years': 'Vehicle_Age_gt_2_Years'
+        })
+        for col in ['Vehicle_Age_It_1_Year', 'Vehicle_Age_gt_2_Years', 'Vehicle_Damage_Yes']:
+            df[col] = df[col].astype('int')
+        return df[MODEL_FEATURE_COLUMNS], ids, errors
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def iter_raw_chunks(source, data_format: str, chunk_rows: int = MODEL_SERVING_BULK_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    '''
+    Reads a CSV or NDJSON path or binary file object in chunks of chunk_rows raw records.
+    '''
+    if data_format == "csv":
+        reader = pd.read_csv(source, chunksize=chunk_rows)
+    elif data_format == "ndjson":
+        if not isinstance(source, str):
+            source = io.TextIOWrapper(source, encoding="utf-8")
+        reader = pd.read_json(source, lines=True, chunksize=chunk_rows)
+    else:
+        raise Exception(f"Unsupported bulk-scoring format: {data_format}")
+    with reader:
+        yield from reader
+
+
+def format_predictions(ids: Optional[pd.Series], predictions: np.ndarray, probabilities: np.ndarray,
+                       include_header: bool, errors: Optional[pd.Series] = None) -> str:
+    '''
+    Renders the predictions of one chunk as CSV text, in input order. With errors, predictions
+    and probabilities only hold the valid records, the others get an empty prediction and their error.
+    '''
+    if errors is None:
+        errors = pd.Series("", index=range(len(predictions)), dtype=object)
+    valid = errors.eq("").to_numpy()
+    prediction_column = pd.array([pd.NA] * len(valid), dtype="Int64")
+    probability_column = np.full(len(valid), np.nan)
+    prediction_column[valid] = predictions.astype(int)
+    probability_column[valid] = probabilities
+    output = pd.DataFrame({"prediction": prediction_column, "probability": probability_column, "error": errors.to_numpy()})
+    if ids is not None:
+        output.insert(0, "id", ids.to_numpy())
+    return output.to_csv(index=False, header=include_header)
+
+
+def format_error_trailer(message: str, columns: list, include_header: bool) -> str:
+    '''
+    Renders the last row of a stream that could not be scored to the end, the message in its error column.
+    '''
+    output = pd.DataFrame([{column: message if column == "error" else None for column in columns}], columns=columns)
+    return output.to_csv(index=False, header=include_header)
+
+
+def score_raw_chunk(predict_batch_fn, raw_df: pd.DataFrame, include_header: bool) -> str:
+    '''
+    Prepares and scores one chunk of raw records and returns its predictions as CSV text.
+    '''
+    features, ids, errors = prepare_features(raw_df)
+    if len(features):
+        predictions, probabilities = predict_batch_fn(features)
+    else:
+        predictions, probabilities = np.empty(0, dtype=int), np.empty(0)
+    return format_predictions(ids, predictions, probabilities, include_header, errors)
+
+
+async def stream_predictions(source, data_format: str, predict_batch_fn, executor,
+                             chunk_rows: int = MODEL_SERVING_BULK_CHUNK_ROWS):
+    '''
+    Async generator behind the bulk-scoring endpoint. Parses the spooled upload chunk by chunk in a
+    worker thread, scores every chunk on the inference executor and yields the CSV predictions as
+    soon as they are produced, so only one chunk is held in memory at a time.
+    Invalid records get an error row. The response status is sent with the first chunk, so when a
+    chunk cannot be scored at all the stream ends with an error row (see format_error_trailer)
+    rather than silently cut short.
+    '''
+    chunks = iter_raw_chunks(source, data_format, chunk_rows)
+    include_header = True
+    columns = ["prediction", "probability", "error"]
+    try:
+        while True:
+            raw_df = await asyncio.to_thread(next, chunks, None)
+            if raw_df is None:
+                break
+            if "id" in raw_df.columns:
+                columns = ["id", "prediction", "probability", "error"]
+            yield await executor.run_waiting(score_raw_chunk, predict_batch_fn, raw_df, include_header)
+            include_header = False
+    except Exception as e:
+        logging.error(f"Bulk scoring aborted: {e}")
+        yield format_error_trailer(f"scoring aborted: {e}", columns, include_header)
+
+
+def score_file(input_path: str, output_path: str, data_format: str, predict_batch_fn,
+               chunk_rows: int = MODEL_SERVING_BULK_CHUNK_ROWS) -> int:
+    '''
+    Scores a CSV or NDJSON file chunk by chunk and writes the predictions to output_path.
+    Returns the number of rows scored.
+    '''
+    try:
+        row_count = 0
+        with open(output_path, "w", newline="") as output_file:
+            for raw_df in iter_raw_chunks(input_path, data_format, chunk_rows):
+                output_file.write(score_raw_chunk(predict_batch_fn, raw_df, include_header=row_count == 0))
+                row_count += len(raw_df)
+                logging.info(f"Bulk scoring: {row_count} rows scored")
+        return row_count
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+if __name__ == "__main__":
+    from src.pipeline.prediction_pipeline import VehicleDataClassifier
+
+    parser = argparse.ArgumentParser(description="Score a CSV or NDJSON file of raw vehicle records in chunks.")
+    parser.add_argument("input_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--format", dest="data_format", choices=SUPPORTED_FORMATS, default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=MODEL_SERVING_BULK_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    classifier = VehicleDataClassifier()
+    classifier.model_holder.load()
+    scored = score_file(args.input_path, args.output_path, args.data_format, classifier.predict_batch,
+                        chunk_rows=args.chunk_rows)
+    print(f"Scored {scored} rows into {args.output_path}")
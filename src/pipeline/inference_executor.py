@@ -0,0 +1,129 @@
+import time
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
+from src.logger import logging
+from src.pipeline.model_holder import ModelHolder
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+
+
+class InferenceExecutorBusyError(Exception):
+    '''
+    Raised when the executor already has as many tasks in flight as it is allowed to queue.
+    '''
+
+
+# Last time the model of a process pool worker was compared with the pushed one
+_last_reload_check: float = 0.0
+
+
+def _init_model_worker() -> None:
+    '''
+    Process pool initializer: every worker process loads and warms its own model once.
+    '''
+    global _last_reload_check
+    ModelHolder.get_instance().load()
+    _last_reload_check = time.monotonic()
+
+
+def predict_in_model_worker(method_name: str, *args):
+    '''
+    Calls VehicleDataClassifier.<method_name> with the model of the current process pool worker.
+    Workers follow hot-reloads by checking the blob at the same interval as the serving process.
+    '''
+    global _last_reload_check
+    model_holder = ModelHolder.get_instance()
+    now = time.monotonic()
+    if now - _last_reload_check >= model_holder.prediction_pipeline_config.reload_interval_seconds:
+        _last_reload_check = now
+        try:
+            model_holder.reload_if_changed()
+        except Exception as e:
+            logging.error(f"Model hot-reload failed in inference worker: {e}")
+    return getattr(VehicleDataClassifier(model_holder=model_holder), method_name)(*args)
+
+
+class InferenceExecutor:
+    '''
+    Sized executor that runs CPU-bound inference off the asyncio event loop.
+
+    At most max_workers tasks run at once and at most max_queue more may wait for a worker.
+    Beyond that run() fails immediately with InferenceExecutorBusyError so the server can
+    answer with a fast 503 instead of letting latency grow without bound.
+    '''
+
+    CAPACITY_POLL_SECONDS = 0.005
+
+    def __init__(self, max_workers: int, max_queue: int, kind: str = "thread") -> None:
+        '''
+        :param max_workers: Threads or processes running inference
+        :param max_queue: Tasks allowed to wait for a free worker
+        :param kind: "thread", or "process" for GIL-heavy paths (functions and arguments must be picklable)
+        '''
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.in_flight: int = 0
+        self.rejected: int = 0
+        self._executor: Executor = None
+
+    def start(self) -> None:
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_model_worker)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    def model_function(self, method_name: str, model_holder: ModelHolder = None) -> Callable:
+        '''
+        Returns VehicleDataClassifier.<method_name> bound to the model this executor's workers use.
+        '''
+        if self.kind == "process":
+            return partial(predict_in_model_worker, method_name)
+        return getattr(VehicleDataClassifier(model_holder=model_holder), method_name)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_workers + self.max_queue
+
+    async def run(self, fn: Callable, *args):
+        '''
+        Runs fn(*args) on the executor and waits for its result without blocking the event loop.
+        '''
+        if self._executor is None:
+            raise Exception("Inference executor is not started.")
+        if not self.has_capacity:
+            self.rejected += 1
+            raise InferenceExecutorBusyError(f"Inference executor is busy ({self.in_flight} tasks in flight).")
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+        finally:
+            self.in_flight -= 1
+
+    async def run_waiting(self, fn: Callable, *args):
+        '''
+        Like run(), but waits for free capacity instead of failing. Meant for long-lived bulk
+        streams that should slow down under load rather than abort half way.
+        '''
+        while not self.has_capacity:
+            await asyncio.sleep(self.CAPACITY_POLL_SECONDS)
+        return await self.run(fn, *args)
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,166 @@
+import time
+import asyncio
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.logger import logging
+from src.pipeline.inference_executor import InferenceExecutor
+from src.pipeline.serving_metrics import STAGE_SECONDS
+from src.utils.metrics import Histogram
+
+
+class InferenceQueueFullError(Exception):
+    '''
+    Raised when a request cannot be queued because the scheduler is at its queue depth.
+    '''
+
+
+def score_rows(predict_fn: Callable[[np.ndarray], object], rows: list):
+    '''
+    Stacks the feature rows into one preallocated batch array and scores it.
+    Runs on the inference executor, not on the event loop.
+    '''
+    features = np.empty((len(rows), len(MODEL_FEATURE_COLUMNS)), dtype=np.float64)
+    np.stack(rows, out=features)
+    return predict_fn(features)
+
+
+class InferenceScheduler:
+    '''
+    Dynamic micro-batching scheduler for single-row predictions.
+
+    Concurrent requests are collected until max_batch_size rows are queued or the oldest one
+    has waited max_wait_ms, then scored in a single predict call on the inference executor.
+    Each waiting coroutine gets back the prediction of its own row. No more batches are in
+    flight than the executor has workers, so rows keep accumulating while all workers are busy.
+    '''
+    def __init__(self, predict_fn: Callable[[np.ndarray], object], executor: InferenceExecutor,
+                 max_wait_ms: float, max_batch_size: int, max_queue_depth: int) -> None:
+        '''
+        :param predict_fn: Function scoring a 2D array of feature rows, e.g. VehicleDataClassifier.predict_array
+        :param executor: Executor the batches are scored on
+        :param max_wait_ms: Longest time the first row of a batch waits for more rows
+        :param max_batch_size: Upper bound of rows scored together
+        :param max_queue_depth: Rows that may wait for scoring before new requests are rejected
+        '''
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches: set = set()
+
+        self.batch_size_histogram = Histogram(
+            "inference_batch_size", "Rows scored per micro-batch",
+            buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+        )
+        self.wait_time_histogram = Histogram(
+            "inference_queue_wait_seconds", "Time a row waited in the scheduler queue",
+            buckets=[0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25],
+        )
+
+    def start(self) -> None:
+        '''
+        Starts the batching worker on the running event loop.
+        '''
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        '''
+        Stops the worker, lets dispatched batches finish and fails the rows that were still waiting.
+        '''
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(Exception("Inference scheduler stopped."))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, row: np.ndarray):
+        '''
+        Queues one float64 feature row in MODEL_FEATURE_COLUMNS order and waits for its prediction.
+        '''
+        if self._queue is None:
+            raise Exception("Inference scheduler is not started.")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise InferenceQueueFullError(f"Inference queue is full ({self.max_queue_depth} rows waiting).")
+        return await future
+
+    async def _collect_batch(self) -> list:
+        first = await self._queue.get()
+        batch = [first]
+        deadline = first[2] + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding, then wait for the rest of the window
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _score_batch(self, batch: list) -> None:
+        dispatched_at = time.perf_counter()
+        self.batch_size_histogram.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_time_histogram.observe(dispatched_at - enqueued_at)
+
+        try:
+            rows = [row for row, _, _ in batch]
+            with STAGE_SECONDS.time(stage="inference"):
+                predictions = await self.executor.run(score_rows, self.predict_fn, rows)
+            for (_, future, _), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+        except Exception as e:
+            logging.error(f"Micro-batch of {len(batch)} rows failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _run(self) -> None:
+        slots = asyncio.Semaphore(self.executor.max_workers)
+        while True:
+            await slots.acquire()
+            batch = await self._collect_batch()
+            task = asyncio.create_task(self._score_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "max_queue_depth": self.max_queue_depth,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "wait_seconds": self.wait_time_histogram.snapshot(),
+        }
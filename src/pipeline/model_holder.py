@@ -0,0 +1,364 @@
+import os
+import sys
+import time
+import fcntl
+import shutil
+import asyncio
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from pandas import DataFrame
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.azure_estimator import Proj1Estimator
+from src.entity.estimator import MyModel
+from src.entity.compiled_estimator import CompiledForestModel
+from src.exception import MyException
+from src.logger import logging
+
+
+# Synthetic, already feature-engineered row used to warm the model after it is loaded
+WARMUP_SAMPLE = {
+    "Gender": [1],
+    "Age": [35],
+    "Driving_License": [1],
+    "Region_Code": [28.0],
+    "Previously_Insured": [0],
+    "Annual_Premium": [30000.0],
+    "Policy_Sales_Channel": [152.0],
+    "Vintage": [150],
+    "Vehicle_Age_It_1_Year": [0],
+    "Vehicle_Age_gt_2_Years": [0],
+    "Vehicle_Damage_Yes": [1],
+}
+
+# Serialises publishing of the shared compiled model between worker processes
+SHARED_MODEL_LOCK_FILE_NAME = ".publish.lock"
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    '''
+    A loaded model version with everything known about it, published by ModelHolder in a
+    single assignment so that readers never mix two versions.
+    '''
+    compiled_model: Optional[CompiledForestModel]
+    model: Optional[MyModel]
+    version: str
+    # "compiled" (pushed compiled model), "pickle" (compiled here from the unpickled model)
+    # or "shared" (mapped from the file another worker published)
+    model_source: str
+    last_modified: object
+    loaded_at: float
+    load_seconds: float
+
+
+def process_memory() -> dict:
+    '''
+    Returns the resident (RSS) and proportional (PSS, shared pages split between the processes
+    mapping them) memory of the current process, in bytes. Linux only, None elsewhere.
+    '''
+    memory = {"rss_bytes": None, "pss_bytes": None}
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            for line in smaps:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    memory[f"{key.lower()}_bytes"] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return memory
+
+
+class ModelHolder:
+    '''
+    Process-wide holder of the production model.
+
+    The compiled flat-array model pushed next to the pickle is downloaded and memory-mapped,
+    without unpickling anything or importing scikit-learn. When there is none (or it is of an
+    unsupported format version) the pickle is downloaded, unpickled and compiled instead. The
+    model is warmed with a synthetic prediction and then shared by every request handled by
+    this process.
+    A background task polls the blob's ETag and swaps in a newly pushed model; requests
+    that already picked up the previous model finish on it.
+
+    With a shared model directory configured (multi-worker mode), the compiled model of every
+    version is published once as a file and memory-mapped read-only by all worker
+    processes, so the tree arrays live in the page cache once per host instead of once per worker.
+    '''
+
+    instance = None
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 storage=None) -> None:
+        '''
+        :param prediction_pipeline_config: Configuration of the model blob to serve
+        :param storage: Storage service to read the model from, defaults to AzureStorageService
+        '''
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.storage = storage
+        self._loaded: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self.reload_count: int = 0
+        self.last_reload_error: Optional[str] = None
+
+    @classmethod
+    def get_instance(cls) -> "ModelHolder":
+        '''
+        Returns the holder shared by the whole process, creating it on first use.
+        '''
+        if ModelHolder.instance is None:
+            ModelHolder.instance = cls()
+        return ModelHolder.instance
+
+    @property
+    def is_ready(self) -> bool:
+        return self._loaded is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        loaded = self._loaded
+        return loaded.version if loaded is not None else None
+
+    @property
+    def model_source(self) -> Optional[str]:
+        loaded = self._loaded
+        return loaded.model_source if loaded is not None else None
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        loaded = self._loaded
+        return loaded.loaded_at if loaded is not None else None
+
+    @property
+    def load_seconds(self) -> Optional[float]:
+        loaded = self._loaded
+        return loaded.load_seconds if loaded is not None else None
+
+    @property
+    def model(self) -> MyModel:
+        '''
+        Returns the unpickled model. Never touches blob storage.
+        In multi-worker mode only the memory-mapped compiled model is kept, use scorer instead.
+        '''
+        loaded = self._loaded
+        if loaded is None or loaded.model is None:
+            raise Exception("Unpickled model is not loaded in this process.")
+        return loaded.model
+
+    @property
+    def scorer(self):
+        '''
+        Returns the compiled scorer when the model could be compiled, the loaded MyModel otherwise.
+        Both expose predict, predict_with_probability and classes_.
+        '''
+        loaded = self._loaded
+        if loaded is None:
+            raise Exception("Model is not loaded in this process.")
+        return loaded.compiled_model if loaded.compiled_model is not None else loaded.model
+
+    @staticmethod
+    def compile(model: MyModel) -> Optional[CompiledForestModel]:
+        '''
+        Compiles the model for the serving path and checks it agrees with MyModel on the warm-up row.
+        Returns None when the model cannot be compiled, requests then fall back to MyModel.
+        '''
+        try:
+            compiled_model = CompiledForestModel.from_model(model)
+            sample = DataFrame(WARMUP_SAMPLE)
+            if list(compiled_model.predict(sample)) != list(model.predict(sample)):
+                raise Exception("Compiled model disagrees with the loaded model on the warm-up row.")
+            return compiled_model
+        except Exception as e:
+            logging.error(f"Serving the unpickled model, compilation failed: {e}")
+            return None
+
+    @staticmethod
+    def warm_up(model: MyModel) -> None:
+        '''
+        Runs a synthetic prediction so the first real request does not pay lazy initialisation
+        costs. Also acts as a smoke test for a freshly downloaded model.
+        '''
+        try:
+            predictions = model.predict(DataFrame(WARMUP_SAMPLE))
+            if len(predictions) != 1:
+                raise Exception(f"Model returned {len(predictions)} predictions for a single row.")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _get_estimator(self) -> Proj1Estimator:
+        return Proj1Estimator(
+            container_name=self.prediction_pipeline_config.model_bucket_name,
+            model_path=self.prediction_pipeline_config.model_file_path,
+            storage=self.storage,
+            compiled_model_path=self.prediction_pipeline_config.compiled_model_file_path,
+        )
+
+    @staticmethod
+    def _download_compiled(estimator: Proj1Estimator, local_path: str) -> Optional[CompiledForestModel]:
+        '''
+        Downloads and memory-maps the pushed compiled model. Returns None when there is none or it
+        cannot be loaded, the caller then falls back to the pickle.
+        '''
+        try:
+            return estimator.load_compiled_model(local_path)
+        except Exception as e:
+            logging.warning(f"Ignoring the pushed compiled model, loading the pickle instead: {e}")
+            return None
+
+    def _load_pickle(self, estimator: Proj1Estimator) -> Tuple[Optional[CompiledForestModel], MyModel]:
+        model = estimator.load_model()
+        self.warm_up(model)
+        return self.compile(model), model
+
+    def _load_local(self, estimator: Proj1Estimator) -> Tuple[Optional[CompiledForestModel], Optional[MyModel], str]:
+        # The mapping keeps the downloaded file alive after it is unlinked
+        file_descriptor, local_path = tempfile.mkstemp(suffix=".compiled")
+        os.close(file_descriptor)
+        try:
+            compiled_model = self._download_compiled(estimator, local_path)
+        finally:
+            os.remove(local_path)
+        if compiled_model is not None:
+            return compiled_model, None, "compiled"
+        return (*self._load_pickle(estimator), "pickle")
+
+    def _load_shared(self, estimator: Proj1Estimator, version: str) -> Tuple[Optional[CompiledForestModel], Optional[MyModel], str]:
+        '''
+        Memory-maps the compiled model published for this version in the shared model directory.
+        The first worker to see a version publishes it, from the pushed compiled model or else by
+        unpickling and compiling the pickle; the others only map it. Falls back to the unpickled
+        model when it cannot be compiled.
+        '''
+        shared_model_dir = self.prediction_pipeline_config.shared_model_dir
+        version_file = os.path.join(shared_model_dir, f"{hashlib.sha1(version.encode()).hexdigest()[:16]}.compiled")
+        os.makedirs(shared_model_dir, exist_ok=True)
+        # Workers starting together wait for the one publishing instead of all downloading the model
+        with open(os.path.join(shared_model_dir, SHARED_MODEL_LOCK_FILE_NAME), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.isfile(version_file):
+                model_source = "shared"
+            else:
+                tmp_path = f"{version_file}.{os.getpid()}.tmp"
+                if self._download_compiled(estimator, tmp_path) is not None:
+                    os.replace(tmp_path, version_file)
+                    model_source = "compiled"
+                else:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    compiled_model, model = self._load_pickle(estimator)
+                    if compiled_model is None:
+                        return None, model, "pickle"
+                    compiled_model.save(version_file)
+                    model_source = "pickle"
+                logging.info(f"Model version {version} published to {version_file}")
+                self._remove_stale_versions(shared_model_dir, version_file)
+
+        return CompiledForestModel.load(version_file), None, model_source
+
+    @staticmethod
+    def _remove_stale_versions(shared_model_dir: str, version_file: str) -> None:
+        '''
+        Deletes the published files of older versions. Workers still serving them keep their
+        mappings, the pages are freed once the last one unmaps them.
+        '''
+        for entry in os.scandir(shared_model_dir):
+            if entry.path == version_file or entry.name == SHARED_MODEL_LOCK_FILE_NAME:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+
+    def _load_from(self, estimator: Proj1Estimator, properties: dict) -> None:
+        start = time.perf_counter()
+        if self.prediction_pipeline_config.shared_model_dir:
+            compiled_model, model, model_source = self._load_shared(estimator, properties["etag"])
+        else:
+            compiled_model, model, model_source = self._load_local(estimator)
+        if model is None:
+            self.warm_up(compiled_model)
+
+        # A single reference swap publishes the new version, requests holding the old model keep using it
+        loaded = LoadedModel(compiled_model=compiled_model, model=model, version=properties["etag"],
+                             model_source=model_source, last_modified=properties["last_modified"],
+                             loaded_at=time.time(), load_seconds=time.perf_counter() - start)
+        self._loaded = loaded
+        logging.info(f"Production model version {loaded.version} loaded from the {model_source} model "
+                     f"and warmed in {loaded.load_seconds:.3f}s")
+
+    def load(self):
+        '''
+        Downloads and warms the production model, then makes it available to requests.
+        Returns the scorer requests will use.
+        '''
+        try:
+            with self._lock:
+                logging.info("Loading production model into the process-wide model holder")
+                estimator = self._get_estimator()
+                # Properties are read before the download so a push racing with it is picked up on the next poll
+                properties = estimator.get_model_properties()
+                self._load_from(estimator, properties)
+                return self.scorer
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def reload_if_changed(self) -> bool:
+        '''
+        Reloads the model only when the blob's ETag differs from the loaded version.
+        Returns True when a new model was swapped in.
+        '''
+        try:
+            with self._lock:
+                estimator = self._get_estimator()
+                properties = estimator.get_model_properties()
+                if properties["etag"] == self.version:
+                    return False
+
+                logging.info(f"Model blob changed from {self.version} to {properties['etag']}, reloading")
+                self._load_from(estimator, properties)
+                self.reload_count += 1
+                self.last_reload_error = None
+                return True
+
+        except Exception as e:
+            self.last_reload_error = str(e)
+            raise MyException(e, sys) from e
+
+    async def poll_for_updates(self, interval_seconds: Optional[float] = None) -> None:
+        '''
+        Background task that keeps the served model in sync with the pushed one.
+        Download, loading and validation run in a worker thread, off the event loop.
+        '''
+        if interval_seconds is None:
+            interval_seconds = self.prediction_pipeline_config.reload_interval_seconds
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                # Keep serving the current model, the next poll retries
+                logging.error(f"Model hot-reload failed: {e}")
+
+    def status(self) -> dict:
+        loaded = self._loaded
+        model = loaded.model if loaded is not None else None
+        return {
+            "ready": loaded is not None,
+            "model": str(model) if model is not None else None,
+            "compiled": loaded is not None and loaded.compiled_model is not None,
+            "model_source": loaded.model_source if loaded is not None else None,
+            "shared": bool(self.prediction_pipeline_config.shared_model_dir) and loaded is not None and model is None,
+            "pid": os.getpid(),
+            **process_memory(),
+            "version": loaded.version if loaded is not None else None,
+            "last_modified": loaded.last_modified.isoformat() if loaded is not None and loaded.last_modified is not None else None,
+            "loaded_at": loaded.loaded_at if loaded is not None else None,
+            "load_seconds": loaded.load_seconds if loaded is not None else None,
+            "reload_count": self.reload_count,
+            "last_reload_error": self.last_reload_error,
+        }
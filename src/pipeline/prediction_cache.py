@@ -0,0 +1,125 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+
+class PredictionCache:
+    '''
+    Bounded LRU/TTL cache of single-row predictions with single-flight request coalescing.
+
+    Entries are keyed on the model version and the canonical feature tuple (the coerced float64
+    row of VehicleData, so "35", "35.0" and 35 are the same key). Identical concurrent requests
+    share one computation. When the served model version changes, the whole cache is dropped.
+    Only meant to be used from the event loop thread.
+    '''
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        '''
+        :param max_entries: Maximum cached predictions, 0 disables caching
+        :param ttl_seconds: Lifetime of a cached prediction
+        '''
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: dict = {}
+        self._model_version: Optional[str] = None
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.coalesced: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self.invalidations: int = 0
+
+    @staticmethod
+    def make_key(row: np.ndarray) -> tuple:
+        '''
+        Returns the canonical feature tuple of a coerced feature row.
+        '''
+        return tuple(row.tolist())
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self.invalidations += 1
+
+    def _sync_model_version(self, model_version: Optional[str]) -> None:
+        if model_version != self._model_version:
+            if self._model_version is not None:
+                self.invalidate()
+            self._model_version = model_version
+
+    def _store(self, key: tuple, value) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, row: np.ndarray, model_version: Optional[str], compute: Callable[[], Awaitable]):
+        '''
+        Returns the cached prediction of the row for model_version, joins an identical in-flight
+        computation, or awaits compute() and caches its result. Waiters of a cancelled computation
+        retry it rather than being cancelled with it.
+        '''
+        if self.max_entries <= 0:
+            return await compute()
+
+        self._sync_model_version(model_version)
+        key = (model_version, self.make_key(row))
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+
+        while (in_flight := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not this request: compute it again, as the new leader
+                # unless another waiter already took over
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if self._model_version == model_version:
+                self._store(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "model_version": self._model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,12 +1,46 @@
 import sys
+from typing import List, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.constants import MODEL_FEATURE_COLUMNS, SCHEMA_FILE_PATH
+from src.entity.compiled_estimator import CompiledForestModel
 from src.entity.config_entity import VehiclePredictorConfig
-from src.entity.azure_estimator import Proj1Estimator
+from src.pipeline.model_holder import ModelHolder
+from src.pipeline.serving_metrics import STAGE_SECONDS
 from src.exception import MyException
 from src.logger import logging
+from src.utils.main_utils import read_yaml
 from pandas import DataFrame
 
 
+def _load_integer_feature_mask() -> np.ndarray:
+    """
+    Reads the model feature types from config/schema.yaml, in MODEL_FEATURE_COLUMNS order.
+    Returns a boolean mask of the features that must hold whole numbers.
+    """
+    feature_types = {}
+    for feature in read_yaml(file_path=SCHEMA_FILE_PATH)["model_features"]:
+        feature_types.update(feature)
+    return np.array([feature_types[column] == "int" for column in MODEL_FEATURE_COLUMNS], dtype=bool)
+
+
+INTEGER_FEATURE_MASK = _load_integer_feature_mask()
+
+
+def _feature_property(index: int) -> property:
+    return property(lambda self: self.features[index].item())
+
+
 class VehicleData:
+    """
+    One vehicle record backed by a float64 row in MODEL_FEATURE_COLUMNS order.
+    Raw values (form strings or numbers) are coerced in one vectorized call and the integer
+    features declared in config/schema.yaml are checked to be whole numbers.
+    """
+    __slots__ = ("features",)
+
     def __init__(self,
                 Gender,
                 Age,
@@ -25,24 +59,34 @@ class VehicleData:
         Input: all features of the trained model for prediction
         """
         try:
-            self.Gender = Gender
-            self.Age = Age
-            self.Driving_License = Driving_License
-            self.Region_Code = Region_Code
-            self.Previously_Insured = Previously_Insured
-            self.Annual_Premium = Annual_Premium
-            self.Policy_Sales_Channel = Policy_Sales_Channel
-            self.Vintage = Vintage
-            self.Vehicle_Age_It_1_Year = Vehicle_Age_It_1_Year
-            self.Vehicle_Age_gt_2_Years = Vehicle_Age_gt_2_Years
-            self.Vehicle_Damage_Yes = Vehicle_Damage_Yes
+            self.features = np.array((Gender, Age, Driving_License, Region_Code, Previously_Insured,
+                                      Annual_Premium, Policy_Sales_Channel, Vintage, Vehicle_Age_It_1_Year,
+                                      Vehicle_Age_gt_2_Years, Vehicle_Damage_Yes), dtype=np.float64)
+
+            integer_features = self.features[INTEGER_FEATURE_MASK]
+            if not np.array_equal(integer_features, np.trunc(integer_features)):
+                invalid = [column for column, is_int, value in zip(MODEL_FEATURE_COLUMNS, INTEGER_FEATURE_MASK, self.features)
+                           if is_int and value != np.trunc(value)]
+                raise ValueError(f"Features {invalid} must be whole numbers.")
 
         except Exception as e:
             raise MyException(e, sys) from e
 
+    Gender = _feature_property(0)
+    Age = _feature_property(1)
+    Driving_License = _feature_property(2)
+    Region_Code = _feature_property(3)
+    Previously_Insured = _feature_property(4)
+    Annual_Premium = _feature_property(5)
+    Policy_Sales_Channel = _feature_property(6)
+    Vintage = _feature_property(7)
+    Vehicle_Age_It_1_Year = _feature_property(8)
+    Vehicle_Age_gt_2_Years = _feature_property(9)
+    Vehicle_Damage_Yes = _feature_property(10)
+
     def get_vehicle_input_data_frame(self)-> DataFrame:
         """
-        This function returns a DataFrame from USvisaData class input
+        This function returns a DataFrame from VehicleData class input
         """
         try:
             
@@ -52,42 +96,60 @@ class VehicleData:
         except Exception as e:
             raise MyException(e, sys) from e
 
-
     def get_vehicle_data_as_dict(self):
         """
         This function returns a dictionary from VehicleData class input
         """
-        logging.info("Entered get_usvisa_data_as_dict method as VehicleData class")
+        try:
+            return {column: [value] for column, value in zip(MODEL_FEATURE_COLUMNS, self.features.tolist())}
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+class VehicleRecord(BaseModel):
+    """
+    One JSON record of the batch prediction API, same features as VehicleData.
+    """
+    Gender: int
+    Age: int
+    Driving_License: int
+    Region_Code: float
+    Previously_Insured: int
+    Annual_Premium: float
+    Policy_Sales_Channel: float
+    Vintage: int
+    Vehicle_Age_It_1_Year: int
+    Vehicle_Age_gt_2_Years: int
+    Vehicle_Damage_Yes: int
 
+    @staticmethod
+    def get_batch_input_data_frame(records: List["VehicleRecord"]) -> DataFrame:
+        """
+        Builds one typed column per feature for the whole batch, in input order.
+        """
         try:
-            input_data = {
-                "Gender": [self.Gender],
-                "Age": [self.Age],
-                "Driving_License": [self.Driving_License],
-                "Region_Code": [self.Region_Code],
-                "Previously_Insured": [self.Previously_Insured],
-                "Annual_Premium": [self.Annual_Premium],
-                "Policy_Sales_Channel": [self.Policy_Sales_Channel],
-                "Vintage": [self.Vintage],
-                "Vehicle_Age_It_1_Year": [self.Vehicle_Age_It_1_Year],
-                "Vehicle_Age_gt_2_Years": [self.Vehicle_Age_gt_2_Years],
-                "Vehicle_Damage_Yes": [self.Vehicle_Damage_Yes]
-            }
-
-            logging.info("Created vehicle data dict")
-            logging.info("Exited get_vehicle_data_as_dict method as VehicleData class")
-            return input_data
+            row_count = len(records)
+            columns = {}
+            for column in MODEL_FEATURE_COLUMNS:
+                dtype = np.float64 if VehicleRecord.model_fields[column].annotation is float else np.int64
+                columns[column] = np.fromiter((getattr(record, column) for record in records),
+                                              dtype=dtype, count=row_count)
+            return DataFrame(columns, copy=False)
 
         except Exception as e:
             raise MyException(e, sys) from e
 
+
 class VehicleDataClassifier:
-    def __init__(self,prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),) -> None:
+    def __init__(self,prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 model_holder: ModelHolder = None) -> None:
         """
         :param prediction_pipeline_config: Configuration for prediction the value
+        :param model_holder: Holder of the already loaded model, defaults to the process-wide one
         """
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
+            self.model_holder = model_holder if model_holder is not None else ModelHolder.get_instance()
         except Exception as e:
             raise MyException(e, sys)
 
@@ -98,13 +160,52 @@ class VehicleDataClassifier:
         """
         try:
             logging.info("Entered predict method of VehicleDataClassifier class")
-            model = Proj1Estimator(
-                container_name=self.prediction_pipeline_config.model_bucket_name,
-                model_path=self.prediction_pipeline_config.model_file_path,
-            )
-            result =  model.predict(dataframe)
+            result = self.model_holder.scorer.predict(dataframe)
             
             return result
         
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def predict_array(self, features: np.ndarray) -> np.ndarray:
+        """
+        Scores a 2D float64 array of feature rows in MODEL_FEATURE_COLUMNS order.
+        Goes straight to the compiled scorer, a DataFrame is only built for the MyModel fallback.
+        Scaling and forest traversal are timed as the transform and forest_predict stages.
+        """
+        try:
+            scorer = self.model_holder.scorer
+            if not isinstance(scorer, CompiledForestModel):
+                features = DataFrame(features, columns=MODEL_FEATURE_COLUMNS)
+            elif scorer.feature_names != MODEL_FEATURE_COLUMNS:
+                features = DataFrame(features, columns=MODEL_FEATURE_COLUMNS)[scorer.feature_names].to_numpy(dtype=np.float64)
+
+            with STAGE_SECONDS.time(stage="transform"):
+                transformed = scorer.transform(features)
+            with STAGE_SECONDS.time(stage="forest_predict"):
+                return scorer.predict_transformed(transformed)
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_batch(self, dataframe: DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores all rows of the dataframe at once.
+        Returns: predicted labels and probability of the positive class, in input order
+        """
+        try:
+            logging.info("Entered predict_batch method of VehicleDataClassifier class")
+            scorer = self.model_holder.scorer
+            with STAGE_SECONDS.time(stage="batch_predict"):
+                predictions, probabilities = scorer.predict_with_probability(dataframe)
+            positive_index = list(scorer.classes_).index(1)
+            return predictions, probabilities[:, positive_index]
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_records(self, records: List[VehicleRecord]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the columnar batch from JSON records and scores it with predict_batch.
+        """
+        return self.predict_batch(VehicleRecord.get_batch_input_data_frame(records))
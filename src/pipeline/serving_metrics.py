@@ -0,0 +1,106 @@
+import time
+
+from src.pipeline.model_holder import process_memory
+from src.utils.metrics import REGISTRY, Counter, Gauge, Histogram
+
+
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages of the prediction path:
+#   form_parse, feature_build, prediction (cache lookup + queue + inference), render  -- per request
+#   inference (executor round trip of a micro-batch)                                  -- per batch
+#   transform, forest_predict                                                         -- per scored array
+#   batch_predict (scaling + forest on a batch or bulk chunk)                          -- per DataFrame batch
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "prediction_stage_duration_seconds", "Time spent in each stage of the prediction path",
+    buckets=LATENCY_BUCKETS, label_names=("stage",),
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    buckets=REQUEST_BUCKETS, label_names=("route",),
+))
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by method, route and status code",
+    label_names=("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+))
+PREDICTION_ERRORS = REGISTRY.register(Counter(
+    "prediction_errors_total", "Prediction requests that failed, by route and reason",
+    label_names=("route", "reason"),
+))
+
+
+class MetricsMiddleware:
+    '''
+    Plain ASGI middleware counting requests, in-flight requests and latency per route template,
+    so path parameters such as training job ids do not create new series.
+    '''
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "other")
+            REQUESTS.inc(method=scope["method"], route=route, status=status_code)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route)
+
+
+def bind_serving_metrics(model_holder, executor, scheduler, cache) -> None:
+    '''
+    Exposes the state the serving objects already keep as scrape-time metrics.
+    '''
+    REGISTRY.register(scheduler.batch_size_histogram)
+    REGISTRY.register(scheduler.wait_time_histogram)
+
+    def model_info() -> list:
+        if not model_holder.is_ready:
+            return []
+        status = model_holder.status()
+        return [({"version": status["version"], "compiled": status["compiled"], "shared": status["shared"]}, 1)]
+
+    metrics = [
+        (Gauge("model_load_seconds", "Time the served model took to download, load and warm up"),
+         lambda: model_holder.load_seconds),
+        (Gauge("model_loaded_timestamp_seconds", "Unix time the served model was loaded"),
+         lambda: model_holder.loaded_at),
+        (Gauge("model_info", "Version of the served model", label_names=("version", "compiled", "shared")),
+         model_info),
+        (Counter("model_reloads_total", "Hot-reloads of a newly pushed model"),
+         lambda: model_holder.reload_count),
+        (Gauge("inference_queue_depth", "Rows waiting for the micro-batching scheduler"),
+         lambda: scheduler.queue_depth),
+        (Gauge("inference_executor_in_flight", "Tasks running or waiting on the inference executor"),
+         lambda: executor.in_flight),
+        (Counter("inference_executor_rejected_total", "Tasks rejected because the inference executor was busy"),
+         lambda: executor.rejected),
+        (Gauge("prediction_cache_entries", "Predictions held by the prediction cache"),
+         lambda: cache.stats()["entries"]),
+        (Counter("prediction_cache_requests_total", "Prediction cache lookups by result", label_names=("result",)),
+         lambda: [({"result": result}, getattr(cache, result)) for result in ("hits", "misses", "coalesced")]),
+        (Gauge("process_resident_memory_bytes", "Resident memory of this worker process"),
+         lambda: process_memory()["rss_bytes"]),
+    ]
+    for metric, function in metrics:
+        metric.set_function(function)
+        REGISTRY.register(metric)
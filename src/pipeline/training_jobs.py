@@ -0,0 +1,294 @@
+import os
+import re
+import sys
+import json
+import uuid
+import fcntl
+import signal
+import threading
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.constants import (ARTIFACT_DIR, DATA_INGESTION_FULL_REFRESH_ENV_KEY, TRAINING_JOB_LOG_FILE_NAME,
+                           TRAINING_RUN_ID_ENV_KEY)
+from src.entity.config_entity import TrainingJobConfig
+from src.exception import MyException
+from src.logger import logging
+
+
+TERMINAL_STATUSES = ("succeeded", "rejected", "failed", "cancelled")
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{12}$")
+
+
+class TrainingJobConflictError(Exception):
+    '''
+    Raised when a training job is requested while another one still holds the training lock.
+    '''
+    def __init__(self, active_job_id: Optional[str]) -> None:
+        super().__init__(f"Training job {active_job_id} is already running.")
+        self.active_job_id = active_job_id
+
+
+class TrainingJobNotFoundError(Exception):
+    '''
+    Raised for an unknown or malformed training job id.
+    '''
+
+
+class TrainingJobCancelled(BaseException):
+    '''
+    Raised inside the training process on SIGTERM. Derives from BaseException so the
+    `except Exception` blocks of the pipeline components do not swallow it.
+    '''
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _read_status(status_file_path: str) -> Optional[dict]:
+    try:
+        with open(status_file_path) as status_file:
+            return json.load(status_file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_status(status_file_path: str, status: dict) -> None:
+    '''
+    Replaces the status file atomically so readers never see a partial document.
+    '''
+    tmp_path = f"{status_file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as status_file:
+        json.dump(status, status_file, indent=2)
+    os.replace(tmp_path, status_file_path)
+
+
+class TrainingJobManager:
+    '''
+    Runs TrainPipeline as a background job in its own process, so the Mongo export, resampling
+    and forest fit never block the serving event loop or compete with it for the GIL.
+
+    - At most one job runs at a time, enforced by an flock on a lock file that is handed over to
+      the training process. The lock is released by the kernel when that process exits, whatever
+      the reason, and it is shared by every server worker on the host.
+    - Every job writes to its own artifact directory (artifact/<timestamp>_<job_id>).
+    - The training process keeps a JSON status file with its stage and progress up to date, so any
+      server worker can answer status requests.
+    - Cancellation sends SIGTERM to the job's process group and SIGKILL after a grace period.
+    '''
+
+    def __init__(self, training_job_config: TrainingJobConfig = TrainingJobConfig()) -> None:
+        self.training_job_config = training_job_config
+        self._processes: dict = {}
+
+    def _status_file_path(self, job_id: str) -> str:
+        if not JOB_ID_PATTERN.match(job_id):
+            raise TrainingJobNotFoundError(f"Unknown training job {job_id}.")
+        return os.path.join(self.training_job_config.training_job_dir, f"{job_id}.json")
+
+    def _cancel_file_path(self, job_id: str) -> str:
+        return os.path.join(self.training_job_config.training_job_dir, f"{job_id}.cancel")
+
+    @staticmethod
+    def _read_lock_owner(lock_fd: int) -> Optional[str]:
+        owner = os.pread(lock_fd, 64, 0).decode().strip()
+        return owner or None
+
+    def submit(self, full_refresh: bool = False) -> dict:
+        '''
+        Starts a training job and returns its initial status.
+        Raises TrainingJobConflictError when another job is still running.
+        :param full_refresh: Re-export the whole collection instead of the documents past the feature store watermark
+        '''
+        os.makedirs(self.training_job_config.training_job_dir, exist_ok=True)
+        lock_fd = os.open(self.training_job_config.lock_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise TrainingJobConflictError(self._read_lock_owner(lock_fd))
+
+            job_id = uuid.uuid4().hex[:12]
+            run_id = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{job_id}"
+            artifact_dir = os.path.join(ARTIFACT_DIR, run_id)
+            os.makedirs(artifact_dir, exist_ok=True)
+            os.ftruncate(lock_fd, 0)
+            os.pwrite(lock_fd, job_id.encode(), 0)
+
+            status = {
+                "job_id": job_id,
+                "status": "pending",
+                "stage": None,
+                "stages_completed": 0,
+                "total_stages": None,
+                "artifact_dir": artifact_dir,
+                "full_refresh": full_refresh,
+                "pid": None,
+                "submitted_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            status_file_path = self._status_file_path(job_id)
+            _write_status(status_file_path, status)
+
+            # The child inherits the locked file description and keeps the lock until it exits.
+            # A new session makes it the leader of a process group that cancel() can signal as a whole.
+            env = dict(os.environ, **{TRAINING_RUN_ID_ENV_KEY: run_id})
+            if full_refresh:
+                env[DATA_INGESTION_FULL_REFRESH_ENV_KEY] = "1"
+            with open(os.path.join(artifact_dir, TRAINING_JOB_LOG_FILE_NAME), "ab") as log_file:
+                process = subprocess.Popen(
+                    [sys.executable, "-m", "src.pipeline.training_jobs", job_id],
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    pass_fds=(lock_fd,),
+                    start_new_session=True,
+                )
+            self._processes[job_id] = process
+            threading.Thread(target=self._wait_for_exit, args=(job_id, process),
+                             name=f"training-job-{job_id}", daemon=True).start()
+            logging.info(f"Training job {job_id} started in process {process.pid}, artifacts in {artifact_dir}")
+            return status
+
+        finally:
+            os.close(lock_fd)
+
+    def _wait_for_exit(self, job_id: str, process: subprocess.Popen) -> None:
+        '''
+        Reaps the training process and records its outcome when it died without writing one.
+        '''
+        return_code = process.wait()
+        self._processes.pop(job_id, None)
+        status_file_path = self._status_file_path(job_id)
+        status = _read_status(status_file_path)
+        if status is not None and status["status"] not in TERMINAL_STATUSES:
+            cancelled = os.path.exists(self._cancel_file_path(job_id))
+            status["status"] = "cancelled" if cancelled else "failed"
+            status["error"] = None if cancelled else f"Training process exited with code {return_code}."
+            status["finished_at"] = _now()
+            _write_status(status_file_path, status)
+        logging.info(f"Training job {job_id} exited with code {return_code}")
+
+    def get_status(self, job_id: str) -> dict:
+        status = _read_status(self._status_file_path(job_id))
+        if status is None:
+            raise TrainingJobNotFoundError(f"Unknown training job {job_id}.")
+        return status
+
+    @staticmethod
+    def get_progress(status: dict) -> dict:
+        total_stages = status["total_stages"]
+        return {
+            "job_id": status["job_id"],
+            "status": status["status"],
+            "stage": status["stage"],
+            "stages_completed": status["stages_completed"],
+            "total_stages": total_stages,
+            "progress": status["stages_completed"] / total_stages if total_stages else 0.0,
+        }
+
+    def active_job_id(self) -> Optional[str]:
+        '''
+        Returns the id of the running job, None when the training lock is free.
+        '''
+        if not os.path.exists(self.training_job_config.lock_file_path):
+            return None
+        lock_fd = os.open(self.training_job_config.lock_file_path, os.O_RDONLY)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return self._read_lock_owner(lock_fd)
+            return None
+        finally:
+            os.close(lock_fd)
+
+    def cancel(self, job_id: str) -> dict:
+        '''
+        Asks a pending or running job to stop. Returns its current status.
+        '''
+        status = self.get_status(job_id)
+        if status["status"] in TERMINAL_STATUSES:
+            return status
+
+        # A job that has not started yet sees the marker and exits right away
+        open(self._cancel_file_path(job_id), "w").close()
+        process = self._processes.get(job_id)
+        pid = process.pid if process is not None else status["pid"]
+        if pid is not None:
+            self._signal_job(pid, signal.SIGTERM)
+            timer = threading.Timer(self.training_job_config.cancel_grace_seconds, self._kill_if_running,
+                                    args=(job_id, pid))
+            timer.daemon = True
+            timer.start()
+        logging.info(f"Cancellation of training job {job_id} requested")
+        return self.get_status(job_id)
+
+    def _kill_if_running(self, job_id: str, pid: int) -> None:
+        status = _read_status(self._status_file_path(job_id))
+        if status is not None and status["status"] not in TERMINAL_STATUSES:
+            logging.warning(f"Training job {job_id} ignored SIGTERM, killing it")
+            self._signal_job(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _signal_job(pid: int, signum: int) -> None:
+        try:
+            os.killpg(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def _raise_cancelled(signum, frame) -> None:
+    raise TrainingJobCancelled()
+
+
+def run_training_job(job_id: str, training_job_config: TrainingJobConfig = TrainingJobConfig()) -> None:
+    '''
+    Entry point of the training process: runs the pipeline and keeps the job status file up to date.
+    '''
+    manager = TrainingJobManager(training_job_config)
+    status_file_path = manager._status_file_path(job_id)
+    status = manager.get_status(job_id)
+    try:
+        if os.path.exists(manager._cancel_file_path(job_id)):
+            raise TrainingJobCancelled()
+        signal.signal(signal.SIGTERM, _raise_cancelled)
+        # Training yields the CPU to the serving workers on the same host
+        os.nice(training_job_config.nice_increment)
+
+        from src.pipeline.training_pipeline import TrainPipeline
+
+        stages = TrainPipeline.PIPELINE_STAGES
+        status.update(status="running", pid=os.getpid(), started_at=_now(), total_stages=len(stages))
+        _write_status(status_file_path, status)
+
+        def report_stage(stage: str) -> None:
+            status.update(stage=stage, stages_completed=stages.index(stage))
+            _write_status(status_file_path, status)
+
+        model_pusher_artifact = TrainPipeline().run_pipeline(progress_callback=report_stage)
+        status.update(status="succeeded" if model_pusher_artifact is not None else "rejected",
+                      stages_completed=len(stages))
+
+    except TrainingJobCancelled:
+        status["status"] = "cancelled"
+    except Exception as e:
+        status.update(status="failed", error=str(e))
+        logging.error(f"Training job {job_id} failed: {e}")
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        status["finished_at"] = _now()
+        _write_status(status_file_path, status)
+
+
+if __name__ == "__main__":
+    try:
+        run_training_job(sys.argv[1])
+    except Exception as e:
+        raise MyException(e, sys) from e
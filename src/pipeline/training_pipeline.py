@@ -1,4 +1,6 @@
 import sys
+from typing import Callable, Optional
+
 from src.exception import MyException
 from src.logger import logging
 
@@ -9,7 +11,10 @@ from src.components.model_trainer import ModelTrainer
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
 
-from src.entity.config_entity import (DataIngestionConfig,
+from src.utils.artifact_writer import ArtifactWriter
+
+from src.entity.config_entity import (training_pipeline_config,
+                                      DataIngestionConfig,
                                       DataValidationConfig,
                                       DataTransformationConfig,
                                       ModelTrainerConfig,
@@ -26,6 +31,10 @@ from src.entity.artifact_entity import (DataIngestionArtifact,
 
 
 class TrainPipeline:
+    # Stages of run_pipeline in execution order, as reported to its progress callback
+    PIPELINE_STAGES = ("collection_validation", "data_ingestion", "data_validation", "data_transformation",
+                       "model_trainer", "model_evaluation", "model_pusher")
+
     def __init__(self):
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
@@ -33,9 +42,32 @@ class TrainPipeline:
         self.model_trainer_config = ModelTrainerConfig()
         self.model_evaluation_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
+        # Hands artifacts from stage to stage in memory and writes them off the critical path,
+        # unless the persistence mode is sync
+        self.artifact_writer = ArtifactWriter(mode=training_pipeline_config.artifact_persistence,
+                                              max_workers=training_pipeline_config.artifact_writer_workers)
         
         
         
+    def start_collection_validation(self) -> Optional[DataValidationArtifact]:
+        '''
+        This method of TrainPipeline class is responsible for validating the collection before it is ingested.
+        Raises when the statistics MongoDB computed on the collection break the schema, before any export starts.
+        '''
+        try:
+            if not self.data_validation_config.collection_statistics:
+                logging.info('Collection validation disabled, skipped')
+                return None
+            data_validation = DataValidation(data_ingestion_artifact=None,
+                                             data_validation_config=self.data_validation_config)
+            data_validation_artifact = data_validation.initiate_collection_validation()
+            if not data_validation_artifact.validation_status:
+                raise Exception(f'Collection rejected: {data_validation_artifact.message.strip()}')
+            return data_validation_artifact
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def start_data_ingestion(self) -> DataIngestionArtifact:
         '''
         This method of TrainPipeline class is responsible for starting data ingestion component.
@@ -43,7 +75,8 @@ class TrainPipeline:
         try:
             logging.info('Entered the start_data_ingestion method of TrainPipeline class')
             logging.info('Getting the data from mongodb')
-            data_ingestion = DataIngestion(data_ingestion_config = self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config = self.data_ingestion_config,
+                                           artifact_writer = self.artifact_writer)
             data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
             logging.info('Got the train_set and test_set from mongodb')
             logging.info('Exited the start_data_ingestion method of TrainPipeline class')
@@ -56,6 +89,7 @@ class TrainPipeline:
     def start_data_validation(self, data_ingestion_artifact : DataIngestionArtifact) -> DataValidationArtifact:
         '''
         This method of TrainPipeline class is responsible for starting data validation component
+        Raises when the train or test split breaks the columns or value rules of the schema.
         '''
         logging.info('Entered the start_data_validation method of TrainPipeline class')
         
@@ -66,9 +100,11 @@ class TrainPipeline:
             data_validation_artifact = data_validation.initiate_data_validation()
             
             logging.info('Performed the data validation operation')
+            if not data_validation_artifact.validation_status:
+                raise Exception(f'Data rejected: {data_validation_artifact.message.strip()}')
             
             logging.info('Exited the start_data_validation method of TrainPipeline class')
-            return data_ingestion_artifact
+            return data_validation_artifact
         
         except Exception as e:
             raise MyException(e, sys) from e
@@ -82,7 +118,8 @@ class TrainPipeline:
             data_transformation = DataTransformation(
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_transformation_config=self.data_transformation_config,
-                data_validation_artifact=data_validation_artifact
+                data_validation_artifact=data_validation_artifact,
+                artifact_writer=self.artifact_writer
             )
             
             data_transformation_artifact = data_transformation.initiate_data_transformation()
@@ -97,7 +134,8 @@ class TrainPipeline:
         '''
         try:
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
-                                         model_trainer_config=self.model_trainer_config)
+                                         model_trainer_config=self.model_trainer_config,
+                                         artifact_writer=self.artifact_writer)
             
             model_trainer_artifact = model_trainer.initiate_model_trainer()
             
@@ -124,6 +162,8 @@ class TrainPipeline:
         This method of TrainPipeline class is responsible for starting model pushing
         """
         try:
+            # The model pusher uploads the model files, they have to be on disk
+            self.artifact_writer.wait()
             model_pusher = ModelPusher(model_evaluation_artifact=model_evaluation_artifact,
                                        model_pusher_config=self.model_pusher_config
                                        )
@@ -132,24 +172,51 @@ class TrainPipeline:
         except Exception as e:
             raise MyException(e, sys)
         
-    def run_pipeline(self) -> None:
+    def persist_artifacts(self) -> None:
+        '''
+        Writes the artifacts the deferred persistence mode keeps in memory, the ones of the
+        stages still to run included. Also works after run_pipeline returned.
+        '''
+        self.artifact_writer.persist()
+
+    def run_pipeline(self, progress_callback: Optional[Callable[[str], None]] = None) -> Optional[ModelPusherArtifact]:
         '''
         This method of TrainPipeline class is responsible for running complete pipeline
+        :param progress_callback: Called with the name of every stage in PIPELINE_STAGES before it starts
+        Returns: the model pusher artifact, or None when the trained model was not accepted
+        Artifacts still being written in the background are waited for before it returns.
         '''
         try:
+            return self._run_stages(progress_callback)
+        finally:
+            self.artifact_writer.close()
+
+    def _run_stages(self, progress_callback: Optional[Callable[[str], None]]) -> Optional[ModelPusherArtifact]:
+        try:
+            report_stage = progress_callback if progress_callback is not None else (lambda stage: None)
+
+            report_stage("collection_validation")
+            self.start_collection_validation()
+            report_stage("data_ingestion")
             data_ingestion_artifact = self.start_data_ingestion()
+            report_stage("data_validation")
             data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            report_stage("data_transformation")
             data_transformation_artifact = self.start_data_transformation(
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact
             )
+            report_stage("model_trainer")
             model_trainer_artifact = self.start_model_trainer(data_transformation_artifact =data_transformation_artifact)
+            report_stage("model_evaluation")
             model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
                                                                     model_trainer_artifact=model_trainer_artifact)
             if not model_evaluation_artifact.is_model_accepted:
                 logging.info(f"Model not accepted.")
                 return None
+            report_stage("model_pusher")
             model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            return model_pusher_artifact
             
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
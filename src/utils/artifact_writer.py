@@ -0,0 +1,102 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from src.logger import logging
+
+
+class ArtifactWriter:
+    '''
+    Persists the artifacts of a training pipeline run in one of three modes:
+
+    - sync: every artifact is written before save() returns, and the stages hand each other file
+      paths and reload from disk, as the pipeline always did.
+    - async: the stages hand each other the objects themselves, and the artifacts are written by
+      background threads while the next stages already run.
+    - deferred: like async, but only the artifacts marked required (the model files evaluation and
+      the model pusher read) are written. The others are kept until persist() is called, which
+      also works once the writer is closed.
+
+    Objects passed to save() are written as they are, without a copy, so they must not be
+    modified afterwards.
+    '''
+
+    MODES = ('sync', 'async', 'deferred')
+
+    def __init__(self, mode: str = 'sync', max_workers: int = 2) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown artifact persistence mode {mode!r}, expected one of {self.MODES}')
+        self.mode = mode
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if mode != 'sync':
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='artifact-writer')
+        self._futures: List = []
+        self._deferred: List[tuple] = []
+        self._persist_requested = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def in_memory(self) -> bool:
+        '''
+        True when the stages hand off artifacts in memory instead of reloading them from disk.
+        '''
+        return self.mode != 'sync'
+
+    @staticmethod
+    def _write(save_function: Callable, args: tuple) -> None:
+        start = time.perf_counter()
+        save_function(*args)
+        logging.info(f'Persisted {args[0]} in {time.perf_counter() - start:.3f}s')
+
+    def save(self, save_function: Callable, file_path: str, *args, required: bool = False) -> None:
+        '''
+        Writes an artifact with save_function(file_path, *args) as the mode dictates.
+        :param required: A later stage reads the file, it is written in deferred mode too
+        '''
+        args = (file_path, *args)
+        if self._executor is None or self._closed:
+            self._write(save_function, args)
+        elif self.mode == 'deferred' and not required and not self._persist_requested:
+            with self._lock:
+                self._deferred.append((save_function, args))
+        else:
+            with self._lock:
+                self._futures.append(self._executor.submit(self._write, save_function, args))
+
+    def persist(self) -> None:
+        '''
+        Writes the artifacts deferred so far and every later one. After close() the deferred
+        artifacts are written before it returns.
+        '''
+        with self._lock:
+            self._persist_requested = True
+            deferred, self._deferred = self._deferred, []
+        for save_function, args in deferred:
+            self.save(save_function, *args, required=True)
+
+    def wait(self) -> None:
+        '''
+        Blocks until every started write is done. Raises the first write error.
+        '''
+        with self._lock:
+            futures, self._futures = self._futures, []
+        errors = [future.exception() for future in futures]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        '''
+        Waits for the started writes and stops the background threads. Deferred artifacts stay in
+        memory until persist() is called.
+        '''
+        try:
+            self.wait()
+        finally:
+            self._closed = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            if self._deferred:
+                logging.info(f'{len(self._deferred)} deferred artifacts are not persisted')
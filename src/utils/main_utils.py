@@ -1,5 +1,6 @@
 import os
 import sys
+import shutil
 
 import numpy as np
 import dill
@@ -30,6 +31,171 @@ def write_yaml_file(file_path : str, content : object, replace : bool = False) -
     except Exception as e:
         raise MyException(e, sys) from e
     
+def concat_csv_files(file_paths : list, file_path : str) -> None:
+    '''
+    Concatenates CSV files that share the same header into file_path, keeping the first header only.
+    file_paths: list of CSV files, appended in the given order
+    '''
+    try:
+        with open(file_path, 'wb') as file_obj:
+            for index, part_path in enumerate(file_paths):
+                with open(part_path, 'rb') as part:
+                    header = part.readline()
+                    if index == 0:
+                        file_obj.write(header)
+                    shutil.copyfileobj(part, file_obj)
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def concat_parquet_files(file_paths : list, file_path : str) -> None:
+    '''
+    Concatenates Parquet files that share the same schema into file_path, one row group at a time.
+    file_paths: list of Parquet files, appended in the given order
+    '''
+    try:
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(file_paths[0])
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for part_path in file_paths:
+                part = pq.ParquetFile(part_path)
+                for index in range(part.num_row_groups):
+                    writer.write_table(part.read_row_group(index))
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def get_schema_dtypes(schema_config : dict) -> dict:
+    '''
+    Returns the type of every column declared in the schema: category, int or float, optionally
+    with a width such as int8 or float32.
+    Columns listed under categorical_columns are categories even when absent from columns.
+    '''
+    dtypes = {column: dtype for entry in schema_config['columns'] for column, dtype in entry.items()}
+    for column in schema_config['categorical_columns']:
+        dtypes[column] = 'category'
+    return dtypes
+
+def schema_numpy_dtype(dtype : str) -> np.dtype:
+    '''
+    Returns the numpy dtype of an int or float schema type, int and float without a width are 64 bit.
+    '''
+    return np.dtype({'int': 'int64', 'float': 'float64'}.get(dtype, dtype))
+
+def apply_schema_dtypes(df : pd.DataFrame, schema_config : dict) -> pd.DataFrame:
+    '''
+    Casts the columns of df to the dtypes declared in the schema.
+    Categories follow categorical_domains, values outside the domain are kept as extra categories
+    after it. Integer columns with missing values stay float64, as pandas reads them from a CSV.
+    Narrow types are only applied when no value changes: integers out of the declared range stay
+    int64 and floats that float32 cannot represent exactly stay float64.
+    '''
+    try:
+        domains = schema_config.get('categorical_domains', {})
+        for column, dtype in get_schema_dtypes(schema_config).items():
+            if column not in df.columns:
+                continue
+            values = df[column]
+            if dtype == 'category':
+                domain = list(domains.get(column, []))
+                observed = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else values.dropna().unique()
+                categories = domain + sorted(set(observed) - set(domain), key=str)
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    if list(values.cat.categories) != categories:
+                        df[column] = values.cat.set_categories(categories)
+                else:
+                    df[column] = pd.Categorical(values, categories=categories)
+                continue
+
+            target = schema_numpy_dtype(dtype)
+            if values.dtype == target:
+                continue
+            if not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+                values = pd.to_numeric(values)
+            if target.kind == 'i':
+                if values.isna().any():
+                    values = values.astype(np.float64)
+                elif len(values) and (values.min() < np.iinfo(target).min or values.max() > np.iinfo(target).max):
+                    logging.info(f'{column} does not fit in {target}, kept as int64')
+                    values = values.astype(np.int64)
+                else:
+                    values = values.astype(target)
+            else:
+                values = values.astype(np.float64)
+                if target != np.float64:
+                    narrowed = values.astype(target)
+                    if np.array_equal(narrowed.to_numpy(np.float64), values.to_numpy(), equal_nan=True):
+                        values = narrowed
+                    else:
+                        logging.info(f'{column} is not exactly representable as {target}, kept as float64')
+            if values.dtype != df[column].dtype:
+                df[column] = values
+        return df
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def memory_per_row(df : pd.DataFrame) -> float:
+    '''
+    Returns the bytes of memory df takes per row, strings and categories included.
+    '''
+    return float(df.memory_usage(deep=True).sum()) / max(len(df), 1)
+
+def save_dataframe(file_path : str, df : pd.DataFrame) -> None:
+    '''
+    save dataframe to a Parquet file, dtypes and categories included
+    file_path: str location of file to save
+    '''
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        df.to_parquet(file_path, index=False)
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def load_dataframe(file_path : str, columns : list = None, schema_config : dict = None) -> pd.DataFrame:
+    '''
+    load dataframe from a Parquet file, only reading the given columns
+    file_path: str location of file to load
+    columns: columns to read, returned in file order, defaults to every column
+    schema_config: schema the dtypes are cast to after loading
+    '''
+    try:
+        if columns is not None:
+            import pyarrow.parquet as pq
+
+            wanted = set(columns)
+            columns = [column for column in pq.read_schema(file_path).names if column in wanted]
+        df = pd.read_parquet(file_path, columns=columns)
+        return apply_schema_dtypes(df, schema_config) if schema_config is not None else df
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def select_columns(df : pd.DataFrame, columns : list) -> pd.DataFrame:
+    '''
+    Restricts an in-memory dataframe to the given columns, kept in their order in df.
+    Returns df itself, not a copy, when it has no other column.
+    '''
+    wanted = set(columns)
+    if wanted.issuperset(df.columns):
+        return df
+    return df[[column for column in df.columns if column in wanted]]
+
+def load_dataframe_schema(file_path : str) -> pd.DataFrame:
+    '''
+    Returns an empty dataframe with the columns and dtypes of a Parquet file, without reading its data
+    file_path: str location of file to load
+    '''
+    try:
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(file_path).empty_table().to_pandas()
+
+    except Exception as e:
+        raise MyException(e, sys) from e
+
 def load_object(file_path : str) -> object:
     '''
     Returns model/object from projects directory.
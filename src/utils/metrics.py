@@ -0,0 +1,191 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    '''
+    Base of the Prometheus-style metrics below: a name, a description and optional label names.
+    A metric can also be backed by a callback read at scrape time, for values some other
+    object already keeps (queue depth, cache counters, model load time).
+    '''
+    metric_type = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Iterable[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+        self._function: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def set_function(self, function: Callable) -> None:
+        '''
+        Reads the value from function() at scrape time. For labelled metrics function returns
+        a list of (labels dict, value) pairs.
+        '''
+        self._function = function
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        '''
+        Returns (name suffix, labels, value) for every series of the metric.
+        '''
+        if self._function is not None:
+            value = self._function()
+            if value is None:
+                return []
+            if not self.label_names:
+                return [("", {}, value)]
+            return [("", {name: str(labels[name]) for name in self.label_names}, series_value)
+                    for labels, series_value in value]
+        with self._lock:
+            values = list(self._values.items())
+        return [("", dict(zip(self.label_names, key)), value) for key, value in values]
+
+
+class Counter(Metric):
+    '''
+    Monotonically increasing count.
+    '''
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    '''
+    Value that can go up and down, e.g. requests in flight.
+    '''
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    '''
+    Fixed-bucket histogram, cumulative on read like a Prometheus histogram.
+    Observing a value is a bisect plus two additions under a lock.
+    '''
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Iterable[float], label_names: Iterable[str] = ()) -> None:
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        index = bisect_left(self.buckets, value)
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        '''
+        Observes the duration of the with-block in seconds.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _cumulative(self, key: tuple) -> Tuple[List[Tuple[float, int]], float, int]:
+        with self._lock:
+            series = self._series.get(key)
+            counts = list(series[0]) if series is not None else [0] * (len(self.buckets) + 1)
+            total = series[1] if series is not None else 0.0
+        cumulative = []
+        running = 0
+        for upper_bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative.append((upper_bound, running))
+        return cumulative, total, running
+
+    def snapshot(self, **labels) -> dict:
+        '''
+        Returns the cumulative bucket counts, the sum and the count of observed values.
+        '''
+        cumulative, total, count = self._cumulative(self._key(labels))
+        buckets = {"+Inf" if upper_bound == float("inf") else str(upper_bound): running
+                   for upper_bound, running in cumulative}
+        return {"buckets": buckets, "sum": total, "count": count}
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            keys = list(self._series)
+        samples = []
+        for key in keys:
+            labels = dict(zip(self.label_names, key))
+            cumulative, total, count = self._cumulative(key)
+            for upper_bound, running in cumulative:
+                samples.append(("_bucket", {**labels, "le": _format_value(upper_bound)}, running))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    '''
+    Set of metrics rendered together in the Prometheus text exposition format.
+    Registering a metric under an existing name replaces the previous one.
+    '''
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
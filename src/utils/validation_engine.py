@@ -0,0 +1,172 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.logger import logging
+
+
+class RangeRule:
+    '''
+    Numbers outside the inclusive range [low, high]. Missing values are left to the null rate rule.
+    '''
+    kind = 'range'
+
+    def __init__(self, column: str, low: float, high: float) -> None:
+        self.column, self.low, self.high = column, low, high
+        self.violations = 0
+
+    def update(self, values: pd.Series) -> None:
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        # NaN compares False on both sides
+        self.violations += int(np.count_nonzero((numbers < self.low) | (numbers > self.high)))
+
+    def result(self, rows: int) -> dict:
+        return {'min': self.low, 'max': self.high, 'violations': self.violations, 'passed': self.violations == 0}
+
+
+class CategoryRule:
+    '''
+    Values outside the allowed categories. Missing values are left to the null rate rule.
+    '''
+    kind = 'category'
+
+    def __init__(self, column: str, domain: list) -> None:
+        self.column, self.domain = column, [str(value) for value in domain]
+        self.violations = 0
+
+    def update(self, values: pd.Series) -> None:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # One lookup per category, then a gather over the integer codes
+            unknown = np.append(~values.cat.categories.astype(str).isin(self.domain), False)
+            self.violations += int(np.count_nonzero(unknown[values.cat.codes.to_numpy()]))
+        else:
+            self.violations += int(np.count_nonzero(values.notna().to_numpy() & ~values.astype(str).isin(self.domain).to_numpy()))
+
+    def result(self, rows: int) -> dict:
+        return {'allowed': self.domain, 'violations': self.violations, 'passed': self.violations == 0}
+
+
+class NullRateRule:
+    '''
+    Share of missing values above max_rate. Every missing value counts as a violating row.
+    '''
+    kind = 'null_rate'
+
+    def __init__(self, column: str, max_rate: float) -> None:
+        self.column, self.max_rate = column, max_rate
+        self.violations = 0
+
+    def update(self, values: pd.Series) -> None:
+        self.violations += int(values.isna().sum())
+
+    def result(self, rows: int) -> dict:
+        rate = self.violations / rows if rows else 0.0
+        return {'max_rate': self.max_rate, 'rate': rate, 'violations': self.violations, 'passed': rate <= self.max_rate}
+
+
+class ValidationEngine:
+    '''
+    Checks the value rules of config/schema.yaml on a dataset in a single pass over chunks of
+    chunk_rows rows, with vectorized operations on every chunk:
+
+    - null_rate: share of missing values of every schema column, max_null_rate or its null_rates override
+    - range: numbers within validation_rules.ranges
+    - category: values within categorical_domains
+
+    Duplicates of the validation_rules.unique columns are checked on the collection before
+    ingestion, the identifiers do not reach the splits.
+    Parquet files are streamed one record batch at a time and only the checked columns are read,
+    so memory use depends on chunk_rows, not on the file size. Rules on columns absent from a
+    dataset are reported as skipped.
+    '''
+
+    def __init__(self, schema_config: dict, chunk_rows: int = 100000) -> None:
+        self.schema_config = schema_config
+        self.chunk_rows = chunk_rows
+
+    def compile_rules(self) -> list:
+        '''
+        Returns a new set of rules with empty counters, one set per pass.
+        '''
+        rules_config = self.schema_config.get('validation_rules', {})
+        columns = self.schema_config['numerical_columns'] + self.schema_config['categorical_columns']
+        null_rates = rules_config.get('null_rates', {})
+        max_null_rate = rules_config.get('max_null_rate', 0.0)
+
+        rules = [NullRateRule(column, null_rates.get(column, max_null_rate)) for column in columns]
+        rules += [RangeRule(column, low, high) for column, (low, high) in rules_config.get('ranges', {}).items()]
+        rules += [CategoryRule(column, domain) for column, domain in self.schema_config.get('categorical_domains', {}).items()]
+        return rules
+
+    def _iter_chunks(self, source: Union[str, pd.DataFrame], columns: list) -> Iterator[pd.DataFrame]:
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), self.chunk_rows):
+                yield source.iloc[start:start + self.chunk_rows][columns]
+        else:
+            parquet_file = pq.ParquetFile(source)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, columns=columns):
+                yield batch.to_pandas()
+
+    @staticmethod
+    def _columns(source: Union[str, pd.DataFrame]) -> list:
+        if isinstance(source, pd.DataFrame):
+            return list(source.columns)
+        return pq.read_schema(source).names
+
+    @staticmethod
+    def _num_rows(source: Union[str, pd.DataFrame]) -> int:
+        if isinstance(source, pd.DataFrame):
+            return len(source)
+        return pq.ParquetFile(source).metadata.num_rows
+
+    def run(self, source: Union[str, pd.DataFrame], name: str = 'data') -> dict:
+        '''
+        Checks every rule on a Parquet file or a dataframe in one pass.
+        Returns the report of the dataset: its rows, chunks, whether every rule passed and the
+        result of every rule with its count of violating rows.
+        '''
+        start = time.perf_counter()
+        rules = self.compile_rules()
+        available = set(self._columns(source))
+        active = [rule for rule in rules if rule.column in available]
+        # Every column is read once, whatever the number of rules on it
+        columns = list(dict.fromkeys(rule.column for rule in active))
+
+        rows, chunks = 0, 0
+        if columns:
+            for chunk in self._iter_chunks(source, columns):
+                rows += len(chunk)
+                chunks += 1
+                for rule in active:
+                    rule.update(chunk[rule.column])
+        else:
+            rows = self._num_rows(source)
+
+        results = []
+        for rule in rules:
+            result = {'rule': rule.kind, 'column': rule.column}
+            if rule.column in available:
+                result.update(rule.result(rows))
+            else:
+                result.update({'skipped': 'column not in data', 'passed': True})
+            results.append(result)
+        seconds = time.perf_counter() - start
+        passed = all(result['passed'] for result in results)
+        logging.info(f'Validated {rows} rows of {name} in {chunks} chunks in {seconds:.3f}s, '
+                     f'{sum(not result["passed"] for result in results)} rules failed')
+        return {'rows': rows, 'chunks': chunks, 'passed': passed, 'seconds': round(seconds, 3), 'rules': results}
+
+    def run_all(self, sources: dict, parallel: bool = False) -> dict:
+        '''
+        Runs every dataset of sources ({name: Parquet file or dataframe}), concurrently on a
+        thread pool when parallel is set. Returns {name: report}, in the order of sources.
+        '''
+        if not parallel or len(sources) < 2:
+            return {name: self.run(source, name) for name, source in sources.items()}
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='data-validation') as executor:
+            futures = {name: executor.submit(self.run, source, name) for name, source in sources.items()}
+            return {name: future.result() for name, future in futures.items()}
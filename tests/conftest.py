@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.estimator import MyModel
+
+
+def make_features(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    '''
+    Synthetic rows of MODEL_FEATURE_COLUMNS, as produced by the custom feature steps.
+    '''
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 86, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630.0, 60000.0, n_rows),
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_It_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    })[MODEL_FEATURE_COLUMNS]
+
+
+@pytest.fixture
+def features() -> pd.DataFrame:
+    return make_features(2000, seed=1)
+
+
+@pytest.fixture
+def train_model():
+    '''
+    Returns a function training a small MyModel with the preprocessor of DataTransformation.
+    '''
+    pytest.importorskip("sklearn")
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    def train(n_estimators: int = 10, seed: int = 0, **scaler_kwargs) -> MyModel:
+        train_features = make_features(3000, seed)
+        target = ((train_features["Age"] > 45) ^ (train_features["Vehicle_Damage_Yes"] == 1)).astype(int)
+        preprocessor = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+            transformers=[
+                ("StandardScaler", StandardScaler(**scaler_kwargs), ["Age", "Vintage"]),
+                ("MinMaxScaler", MinMaxScaler(), ["Annual_Premium"])
+            ],
+            remainder="passthrough"
+        ))])
+        transformed = preprocessor.fit_transform(train_features)
+        trained_model = RandomForestClassifier(n_estimators=n_estimators, max_depth=8, random_state=seed)
+        return MyModel(preprocessor, trained_model.fit(transformed, target))
+
+    return train
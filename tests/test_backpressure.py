@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from src.pipeline.inference_executor import InferenceExecutor, InferenceExecutorBusyError
+
+RECORD = {
+    "Gender": 1, "Age": 35, "Driving_License": 1, "Region_Code": 28.0, "Previously_Insured": 0,
+    "Annual_Premium": 30000.0, "Policy_Sales_Channel": 152.0, "Vintage": 150,
+    "Vehicle_Age_It_1_Year": 0, "Vehicle_Age_gt_2_Years": 0, "Vehicle_Damage_Yes": 1,
+}
+
+
+def make_busy_executor() -> InferenceExecutor:
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    executor.start()
+    executor.in_flight = 1
+    return executor
+
+
+def test_executor_rejects_tasks_beyond_capacity():
+    executor = make_busy_executor()
+    try:
+        with pytest.raises(InferenceExecutorBusyError):
+            asyncio.run(executor.run(lambda: None))
+        assert executor.rejected == 1
+    finally:
+        executor.shutdown()
+
+
+def test_run_waiting_waits_for_capacity():
+    executor = make_busy_executor()
+
+    async def main():
+        task = asyncio.create_task(executor.run_waiting(lambda value: value * 2, 21))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        executor.in_flight = 0
+        return await task
+
+    try:
+        assert asyncio.run(main()) == 42
+        assert executor.rejected == 0
+    finally:
+        executor.shutdown()
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from app import app
+
+    # The lifespan, which loads the production model, is not run
+    app.state.inference_executor = make_busy_executor()
+    try:
+        yield TestClient(app)
+    finally:
+        app.state.inference_executor.shutdown()
+
+
+def test_batch_endpoint_answers_503_when_executor_is_busy(client):
+    response = client.post("/predict/batch", json=[RECORD])
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["status"] is False
+
+
+def test_bulk_endpoint_answers_503_when_executor_is_busy(client):
+    response = client.post("/predict/bulk?format=csv", content=b"id,Gender\n1,Male\n")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
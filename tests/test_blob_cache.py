@@ -0,0 +1,53 @@
+import os
+
+from src.cloud_storage.blob_cache import BlobCache
+
+
+def write_bytes(n_bytes: int):
+    return lambda file_obj: file_obj.write(b"x" * n_bytes)
+
+
+def test_put_keeps_blob_larger_than_max_bytes(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=10)
+
+    path = cache.put("container", "model.pkl", "etag-1", write_bytes(100))
+
+    assert os.path.exists(path)
+    assert os.path.getsize(path) == 100
+    assert cache.get("container", "model.pkl", "etag-1") == path
+    assert cache.stats()["evictions"] == 0
+
+
+def test_put_keeps_new_blob_when_older_ones_are_more_recently_used(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=150)
+    old_path = cache.put("container", "old.pkl", "etag-1", write_bytes(100))
+    # Another process using the old blob after the new one is written
+    os.utime(old_path, ns=(2 ** 62, 2 ** 62))
+
+    path = cache.put("container", "new.pkl", "etag-1", write_bytes(100))
+
+    assert os.path.exists(path)
+    assert not os.path.exists(old_path)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=250)
+    first = cache.put("container", "a.pkl", "etag-1", write_bytes(100))
+    os.utime(first, ns=(1, 1))
+    second = cache.put("container", "b.pkl", "etag-1", write_bytes(100))
+    third = cache.put("container", "c.pkl", "etag-1", write_bytes(100))
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+
+
+def test_new_etag_replaces_cached_version(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=1000)
+    old_path = cache.put("container", "model.pkl", "etag-1", write_bytes(10))
+
+    path = cache.put("container", "model.pkl", "etag-2", write_bytes(20))
+
+    assert path != old_path and not os.path.exists(old_path)
+    assert cache.get("container", "model.pkl", "etag-1") is None
+    assert cache.get("container", "model.pkl", "etag-2") == path
@@ -0,0 +1,63 @@
+import io
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.pipeline.bulk_scoring import stream_predictions
+
+
+HEADER = "id,Gender,Age,Driving_License,Region_Code,Previously_Insured,Vehicle_Age,Vehicle_Damage,Annual_Premium,Policy_Sales_Channel,Vintage\n"
+GOOD_ROW = "{id},Male,44,1,28.0,0,> 2 Years,Yes,40454.0,26.0,217\n"
+BAD_ROW = "{id},X,na,1,28.0,0,> 2 Years,Yes,40454.0,26.0,217\n"
+
+
+class InlineExecutor:
+    async def run_waiting(self, fn, *args):
+        return fn(*args)
+
+
+def predict_batch(features: pd.DataFrame):
+    assert list(features.columns) == MODEL_FEATURE_COLUMNS
+    return np.ones(len(features), dtype=int), np.full(len(features), 0.75)
+
+
+def collect(upload: bytes, predict_batch_fn=predict_batch, chunk_rows: int = 2) -> pd.DataFrame:
+    async def run():
+        parts = []
+        async for part in stream_predictions(io.BytesIO(upload), "csv", predict_batch_fn, InlineExecutor(), chunk_rows):
+            parts.append(part)
+        return "".join(parts)
+    return pd.read_csv(io.StringIO(asyncio.run(run())))
+
+
+def test_bad_row_after_first_chunk_gets_an_error_row():
+    rows = [GOOD_ROW.format(id=1), GOOD_ROW.format(id=2), GOOD_ROW.format(id=3), BAD_ROW.format(id=4), GOOD_ROW.format(id=5)]
+    output = collect((HEADER + "".join(rows)).encode())
+
+    assert output["id"].tolist() == [1, 2, 3, 4, 5]
+    bad = output[output["id"] == 4].iloc[0]
+    assert bad["error"] == "invalid Age"
+    assert pd.isna(bad["prediction"]) and pd.isna(bad["probability"])
+    good = output[output["id"] != 4]
+    assert good["error"].isna().all()
+    assert good["prediction"].tolist() == [1, 1, 1, 1]
+
+
+def test_failure_after_first_chunk_ends_with_error_trailer():
+    calls = []
+
+    def failing_predict_batch(features):
+        calls.append(len(features))
+        if len(calls) > 1:
+            raise RuntimeError("model unavailable")
+        return predict_batch(features)
+
+    rows = [GOOD_ROW.format(id=i) for i in range(1, 5)]
+    output = collect((HEADER + "".join(rows)).encode(), failing_predict_batch)
+
+    assert output["id"].tolist()[:2] == [1, 2]
+    trailer = output.iloc[-1]
+    assert pd.isna(trailer["id"])
+    assert trailer["error"].startswith("scoring aborted")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import src.components.model_trainer as model_trainer
+from src.entity.compiled_estimator import CompiledForestModel
+from src.entity.config_entity import ModelTrainerConfig
+from src.exception import MyException
+
+
+@pytest.mark.parametrize("scaler_kwargs", [
+    {},
+    {"with_mean": False},
+    {"with_std": False},
+    {"with_mean": False, "with_std": False},
+])
+def test_compiled_model_matches_my_model(train_model, features, scaler_kwargs):
+    model = train_model(**scaler_kwargs)
+
+    compiled_model = CompiledForestModel.from_model(model)
+
+    np.testing.assert_allclose(
+        compiled_model.transform(features[compiled_model.feature_names].to_numpy(dtype=np.float64)),
+        model.preprocessing_object.transform(features),
+    )
+    np.testing.assert_array_equal(compiled_model.predict(features), model.predict(features))
+    _, probabilities = compiled_model.predict_with_probability(features)
+    np.testing.assert_allclose(probabilities, model.trained_model_object.predict_proba(
+        model.preprocessing_object.transform(features)))
+
+
+def test_saved_compiled_model_loads_with_same_predictions(tmp_path, train_model, features):
+    model = train_model()
+    file_path = str(tmp_path / "model_compiled.bin")
+
+    CompiledForestModel.from_model(model).save(file_path)
+    compiled_model = CompiledForestModel.load(file_path)
+
+    np.testing.assert_array_equal(compiled_model.predict(features), model.predict(features))
+
+
+def make_trainer(tmp_path) -> model_trainer.ModelTrainer:
+    config = ModelTrainerConfig(compiled_model_file_path=str(tmp_path / "model_compiled.bin"))
+    return model_trainer.ModelTrainer(data_transformation_artifact=None, model_trainer_config=config)
+
+
+def test_export_compiled_model_saves_matching_model(tmp_path, train_model, features):
+    model = train_model()
+
+    make_trainer(tmp_path).export_compiled_model(model, features)
+
+    compiled_model = CompiledForestModel.load(str(tmp_path / "model_compiled.bin"))
+    np.testing.assert_array_equal(compiled_model.predict(features), model.predict(features))
+
+
+def test_export_compiled_model_refuses_mismatching_model(tmp_path, train_model, features, monkeypatch):
+    from_model = CompiledForestModel.from_model
+
+    def mis_scaled(model):
+        compiled_model = from_model(model)
+        compiled_model.shift = compiled_model.shift + 10.0
+        compiled_model.offset = compiled_model.offset + 0.3
+        return compiled_model
+
+    monkeypatch.setattr(model_trainer.CompiledForestModel, "from_model", staticmethod(mis_scaled))
+
+    with pytest.raises(MyException, match="differ from the trained model"):
+        make_trainer(tmp_path).export_compiled_model(train_model(), features)
+    assert not (tmp_path / "model_compiled.bin").exists()
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from src.constants import SCHEMA_FILE_PATH
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataValidationConfig
+from src.exception import MyException
+from src.pipeline.training_pipeline import TrainPipeline
+from src.utils.main_utils import apply_schema_dtypes, read_yaml
+from src.utils.validation_engine import ValidationEngine
+
+
+def make_split(n_rows: int) -> pd.DataFrame:
+    '''
+    Ingested split, typed by the schema and without the `_id` and `id` fields.
+    '''
+    return apply_schema_dtypes(pd.DataFrame({
+        "Gender": ["Male", "Female"] * (n_rows // 2),
+        "Age": [20 + index % 60 for index in range(n_rows)],
+        "Driving_License": [1] * n_rows,
+        "Region_Code": [28.0] * n_rows,
+        "Previously_Insured": [index % 2 for index in range(n_rows)],
+        "Vehicle_Age": ["< 1 Year", "1-2 Year"] * (n_rows // 2),
+        "Vehicle_Damage": ["Yes", "No"] * (n_rows // 2),
+        "Annual_Premium": [30000.0] * n_rows,
+        "Policy_Sales_Channel": [152.0] * n_rows,
+        "Vintage": [10 + index % 300 for index in range(n_rows)],
+        "Response": [index % 2 for index in range(n_rows)],
+    }), read_yaml(SCHEMA_FILE_PATH))
+
+
+def start_data_validation(tmp_path, train_df: pd.DataFrame, test_df: pd.DataFrame) -> DataValidationArtifact:
+    pipeline = TrainPipeline()
+    pipeline.data_validation_config = DataValidationConfig(
+        data_validation_dir=str(tmp_path), validation_report_file_path=str(tmp_path / "report.yaml"))
+    data_ingestion_artifact = DataIngestionArtifact(trained_file_path=None, test_file_path=None,
+                                                    train_df=train_df, test_df=test_df)
+    try:
+        return pipeline.start_data_validation(data_ingestion_artifact)
+    finally:
+        pipeline.artifact_writer.close()
+
+
+def test_valid_splits_return_validation_artifact(tmp_path):
+    artifact = start_data_validation(tmp_path, make_split(300), make_split(100))
+
+    assert isinstance(artifact, DataValidationArtifact)
+    assert artifact.validation_status
+
+
+def test_value_rule_violation_stops_training(tmp_path):
+    train_df = make_split(300)
+    train_df.loc[5, "Age"] = 150
+
+    with pytest.raises(MyException, match="Data rejected"):
+        start_data_validation(tmp_path, train_df, make_split(100))
+
+
+def test_engine_reports_value_rules_of_splits():
+    schema_config = read_yaml(SCHEMA_FILE_PATH)
+    split = make_split(300)
+    split.loc[0, "Vintage"] = 400
+
+    report = ValidationEngine(schema_config, chunk_rows=64).run(split)
+
+    assert report["rows"] == 300 and report["chunks"] == 5
+    assert not report["passed"]
+    failed = [(result["rule"], result["column"]) for result in report["rules"] if not result["passed"]]
+    assert failed == [("range", "Vintage")]
+    assert not any(result.get("skipped") for result in report["rules"])
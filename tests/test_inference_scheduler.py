@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.pipeline.inference_executor import InferenceExecutor
+from src.pipeline.inference_scheduler import InferenceQueueFullError, InferenceScheduler
+
+
+class RecordingPredictor:
+    '''
+    Predicts the first feature of every row and records the size of every batch.
+    '''
+    def __init__(self, release: threading.Event = None) -> None:
+        self.batch_sizes = []
+        self.release = release
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        if self.release is not None:
+            self.release.wait(5)
+        self.batch_sizes.append(len(features))
+        return features[:, 0].copy()
+
+
+def make_row(value: float) -> np.ndarray:
+    return np.full(11, value, dtype=np.float64)
+
+
+def run_scheduler(test, predictor, max_wait_ms: float, max_batch_size: int, max_queue_depth: int = 100,
+                  max_workers: int = 1):
+    async def main():
+        executor = InferenceExecutor(max_workers=max_workers, max_queue=10)
+        executor.start()
+        scheduler = InferenceScheduler(predictor, executor, max_wait_ms=max_wait_ms,
+                                       max_batch_size=max_batch_size, max_queue_depth=max_queue_depth)
+        scheduler.start()
+        try:
+            return await test(scheduler)
+        finally:
+            await scheduler.stop()
+            executor.shutdown()
+    return asyncio.run(main())
+
+
+def test_concurrent_rows_are_scored_in_one_batch():
+    predictor = RecordingPredictor()
+
+    async def test(scheduler):
+        return await asyncio.gather(*(scheduler.submit(make_row(value)) for value in range(8)))
+
+    predictions = run_scheduler(test, predictor, max_wait_ms=1000, max_batch_size=8)
+
+    assert list(predictions) == list(range(8))
+    assert predictor.batch_sizes == [8]
+
+
+def test_batches_are_split_at_max_batch_size():
+    predictor = RecordingPredictor()
+
+    async def test(scheduler):
+        return await asyncio.gather(*(scheduler.submit(make_row(value)) for value in range(10)))
+
+    predictions = run_scheduler(test, predictor, max_wait_ms=50, max_batch_size=4)
+
+    assert list(predictions) == list(range(10))
+    assert predictor.batch_sizes == [4, 4, 2]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    predictor = RecordingPredictor()
+
+    async def test(scheduler):
+        return await asyncio.wait_for(asyncio.gather(*(scheduler.submit(make_row(value)) for value in range(3))), 2)
+
+    predictions = run_scheduler(test, predictor, max_wait_ms=20, max_batch_size=100)
+
+    assert list(predictions) == [0, 1, 2]
+    assert predictor.batch_sizes == [3]
+
+
+def test_full_queue_rejects_new_rows():
+    release = threading.Event()
+    predictor = RecordingPredictor(release)
+
+    async def test(scheduler):
+        # The only worker is busy with the first row, the next ones wait in the queue
+        first = asyncio.create_task(scheduler.submit(make_row(0)))
+        while not scheduler.executor.in_flight:
+            await asyncio.sleep(0.001)
+        waiting = [asyncio.create_task(scheduler.submit(make_row(value))) for value in (1, 2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(InferenceQueueFullError):
+            await scheduler.submit(make_row(3))
+        release.set()
+        return await asyncio.gather(first, *waiting)
+
+    predictions = run_scheduler(test, predictor, max_wait_ms=0, max_batch_size=1, max_queue_depth=2)
+
+    assert list(predictions) == [0, 1, 2]
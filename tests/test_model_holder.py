@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+from src.cloud_storage.local_storage import LocalStorageService
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.model_holder import ModelHolder
+
+
+def push_model(storage: LocalStorageService, config: VehiclePredictorConfig, model, mtime_ns: int) -> str:
+    storage.upload_object(model, config.model_bucket_name, config.model_file_path)
+    # The ETag derives from the modification time, do not rely on the clock resolution
+    os.utime(os.path.join(storage.root_dir, config.model_bucket_name, config.model_file_path), ns=(mtime_ns, mtime_ns))
+    return storage.get_blob_properties(config.model_bucket_name, config.model_file_path)["etag"]
+
+
+def make_holder(tmp_path, shared_model_dir=None):
+    storage = LocalStorageService(str(tmp_path / "storage"))
+    config = VehiclePredictorConfig(model_bucket_name="models", shared_model_dir=shared_model_dir)
+    return ModelHolder(config, storage=storage), storage, config
+
+
+def test_reload_swaps_model_when_etag_changes(tmp_path, train_model, features):
+    holder, storage, config = make_holder(tmp_path)
+    first_model, second_model = train_model(seed=0), train_model(seed=1)
+    first_etag = push_model(storage, config, first_model, 10 ** 18)
+
+    holder.load()
+
+    assert holder.version == first_etag
+    assert holder.model_source == "pickle"
+    assert holder.reload_if_changed() is False
+    np.testing.assert_array_equal(holder.scorer.predict(features), first_model.predict(features))
+
+    second_etag = push_model(storage, config, second_model, 2 * 10 ** 18)
+    assert second_etag != first_etag
+
+    assert holder.reload_if_changed() is True
+    assert holder.version == second_etag
+    assert holder.reload_count == 1
+    assert holder.status()["version"] == second_etag
+    np.testing.assert_array_equal(holder.model.predict(features), second_model.predict(features))
+    np.testing.assert_array_equal(holder.scorer.predict(features), second_model.predict(features))
+
+
+def test_shared_mode_serves_compiled_model_of_new_version(tmp_path, train_model, features):
+    holder, storage, config = make_holder(tmp_path, shared_model_dir=str(tmp_path / "shared"))
+    push_model(storage, config, train_model(seed=0), 10 ** 18)
+    holder.load()
+    second_model = train_model(seed=1)
+    second_etag = push_model(storage, config, second_model, 2 * 10 ** 18)
+
+    assert holder.reload_if_changed() is True
+
+    status = holder.status()
+    assert status["version"] == second_etag
+    assert status["shared"] and status["compiled"]
+    np.testing.assert_array_equal(holder.scorer.predict(features), second_model.predict(features))
+    assert len(os.listdir(tmp_path / "shared")) == 2
@@ -0,0 +1,131 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.pipeline.prediction_cache import PredictionCache
+
+ROW = np.array([1.0, 35.0, 30000.0])
+
+
+class SlowCompute:
+    '''
+    Counts its calls and returns the call number after a short delay.
+    '''
+    def __init__(self, seconds: float = 0.05) -> None:
+        self.seconds = seconds
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.seconds)
+        return call
+
+
+def test_repeated_row_is_served_from_cache():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    compute = SlowCompute(0)
+
+    async def main():
+        return [await cache.get_or_compute(ROW.copy(), "v1", compute) for _ in range(3)]
+
+    assert asyncio.run(main()) == [1, 1, 1]
+    assert compute.calls == 1
+    assert (cache.misses, cache.hits) == (1, 2)
+
+
+def test_concurrent_identical_rows_share_one_computation():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    compute = SlowCompute()
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute(ROW, "v1", compute) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert compute.calls == 1
+    assert (cache.misses, cache.coalesced) == (1, 4)
+
+
+def test_waiters_retry_when_leader_is_cancelled():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    compute = SlowCompute()
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_compute(ROW, "v1", compute))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_compute(ROW, "v1", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(leader, *waiters, return_exceptions=True)
+
+    leader_result, *waiter_results = asyncio.run(main())
+
+    assert isinstance(leader_result, asyncio.CancelledError)
+    # One waiter became the new leader, the others joined its computation
+    assert waiter_results == [2, 2, 2]
+    assert compute.calls == 2
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    compute = SlowCompute()
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_compute(ROW, "v1", compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_compute(ROW, "v1", compute))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await asyncio.gather(leader, waiter, return_exceptions=True)
+
+    leader_result, waiter_result = asyncio.run(main())
+
+    assert leader_result == 1
+    assert isinstance(waiter_result, asyncio.CancelledError)
+    assert compute.calls == 1
+
+
+def test_failed_computation_is_shared_and_not_cached():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model unavailable")
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_compute(ROW, "v1", failing) for _ in range(3)),
+                                       return_exceptions=True)
+        return results, await cache.get_or_compute(ROW, "v1", SlowCompute(0))
+
+    results, retried = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == 1
+
+
+def test_new_model_version_invalidates_cache():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    compute = SlowCompute(0)
+
+    async def main():
+        await cache.get_or_compute(ROW, "v1", compute)
+        return await cache.get_or_compute(ROW, "v2", compute)
+
+    assert asyncio.run(main()) == 2
+    assert cache.invalidations == 1
+    assert cache.stats()["model_version"] == "v2"
+
+
+@pytest.mark.parametrize("max_entries, ttl_seconds", [(1, 60), (10, 0)])
+def test_evicted_or_expired_rows_are_computed_again(max_entries, ttl_seconds):
+    cache = PredictionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    compute = SlowCompute(0)
+
+    async def main():
+        await cache.get_or_compute(ROW, "v1", compute)
+        await cache.get_or_compute(ROW + 1, "v1", compute)
+        return await cache.get_or_compute(ROW, "v1", compute)
+
+    assert asyncio.run(main()) == 3
+    assert cache.evictions + cache.expirations >= 1
@@ -0,0 +1,52 @@
+import pytest
+
+from src.data_access.proj1_data import Proj1Data
+
+mongomock = pytest.importorskip("mongomock")
+
+
+class MockMongoClient:
+    def __init__(self) -> None:
+        self.client = mongomock.MongoClient()
+        self.database = self.client["Proj1"]
+
+
+def make_documents(n_documents: int) -> list:
+    return [{
+        "id": index,
+        "Gender": "Male" if index % 2 else "Female",
+        "Age": 20 + index % 60,
+        "Driving_License": 1,
+        "Region_Code": float(index % 50),
+        "Previously_Insured": index % 2,
+        "Vehicle_Age": ("< 1 Year", "1-2 Year", "> 2 Years")[index % 3],
+        "Vehicle_Damage": "Yes" if index % 3 else "No",
+        "Annual_Premium": 2630.0 + index,
+        "Policy_Sales_Channel": float(1 + index % 160),
+        "Vintage": 10 + index % 280,
+        "Response": int(index % 8 == 0),
+    } for index in range(1, n_documents + 1)]
+
+
+@pytest.fixture
+def proj1_data():
+    mongo_client = MockMongoClient()
+    mongo_client.database["Proj1_Data"].insert_many(make_documents(1000))
+    return Proj1Data(mongo_client)
+
+
+@pytest.mark.parametrize("n_workers", [1, 4])
+def test_export_returns_every_document_once(proj1_data, n_workers):
+    df = proj1_data.export_collection_as_dataframe("Proj1_Data", n_workers=n_workers, projection={"_id": 0})
+
+    assert len(df) == 1000
+    assert df["id"].is_unique
+    assert sorted(df["id"].tolist()) == list(range(1, 1001))
+
+
+def test_partitioned_export_applies_query(proj1_data):
+    df = proj1_data.export_collection_as_dataframe("Proj1_Data", n_workers=4, projection={"_id": 0},
+                                                   query={"Response": 1})
+
+    assert len(df) == 125
+    assert df["id"].is_unique